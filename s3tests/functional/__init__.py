@@ -4,6 +4,7 @@ from botocore import UNSIGNED
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from botocore.handlers import disable_signing
+import concurrent.futures
 import configparser
 import datetime
 import time
@@ -14,6 +15,7 @@ import string
 import itertools
 import urllib3
 import re
+import requests
 
 config = munch.Munch
 
@@ -160,6 +162,26 @@ def nuke_prefixed_buckets(prefix, client=None):
 
     print('Done with cleanup of buckets in tests.')
 
+def nuke_each(func, client, names, workers=8, missing_codes=()):
+    """
+    Call func(client, name) for every name on a pool of workers threads,
+    to clean up many resources at once. A ClientError doesn't stop the
+    cleanup of the others, but the last one is raised afterwards so that
+    leaks don't go unnoticed. Errors with one of missing_codes mean the
+    resource is already gone, and are ignored.
+    """
+    err = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(func, client, name) for name in names]
+        for f in futures:
+            try:
+                f.result()
+            except ClientError as e:
+                if e.response['Error']['Code'] not in missing_codes:
+                    err = e
+    if err:
+        raise err
+
 def configured_storage_classes():
     sc = ['STANDARD']
 
@@ -294,12 +316,27 @@ def configure():
     config.iam_name_prefix = choose_bucket_prefix(template=template)
     template = cfg.get('fixtures', "iam path prefix", fallback="/s3-tests/")
     config.iam_path_prefix = choose_bucket_prefix(template=template)
+    config.dataset_bucket_prefix = cfg.get('fixtures', "dataset bucket prefix", fallback="")
+    config.http_pool_size = cfg.getint('fixtures', "http pool size", fallback=10)
 
     if cfg.has_section("s3 cloud"):
         get_cloud_config(cfg)
     else:
         config.cloud_storage_class = None
 
+    # the local oidc issuer must listen where the gateway can reach it
+    config.oidc_issuer_host = cfg.get('oidc issuer', "host", fallback="localhost")
+    config.oidc_issuer_port = cfg.getint('oidc issuer', "port", fallback=0)
+    # and so must the local receiver of bucket notifications
+    config.notification_receiver_host = cfg.get('notification receiver', "host", fallback="localhost")
+    config.notification_receiver_port = cfg.getint('notification receiver', "port", fallback=0)
+
+    # benchmarks only run when the config file has a benchmark section
+    if cfg.has_section("benchmark"):
+        config.benchmark = dict(cfg.items("benchmark"))
+    else:
+        config.benchmark = None
+
 def setup():
     alt_client = get_alt_client()
     tenant_client = get_tenant_client()
@@ -343,6 +380,39 @@ def setup_teardown(configfile):
     yield
     teardown()
 
+class _HTTPSession(requests.Session):
+    def merge_environment_settings(self, url, proxies, stream, verify, cert):
+        # requests lets REQUESTS_CA_BUNDLE or CURL_CA_BUNDLE override the
+        # session's verify, turning ssl_verify = False back on; as a per
+        # request setting, it's only replaced when it's True
+        if verify is None:
+            verify = self.verify
+        return super().merge_environment_settings(url, proxies, stream, verify, cert)
+
+_http_session = None
+
+def get_http_session():
+    """
+    The requests.Session shared by the tests that send raw http requests,
+    so they reuse connections like the boto3 clients do. Its pool keeps up
+    to 'http pool size' connections per host, and it verifies certificates
+    according to ssl_verify.
+    """
+    global _http_session
+    if _http_session is None:
+        session = _HTTPSession()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=config.http_pool_size,
+                                                pool_maxsize=config.http_pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.verify = config.default_ssl_verify
+        _http_session = session
+    return _http_session
+
+@pytest.fixture
+def http_session(configfile):
+    return get_http_session()
+
 def check_webidentity():
     cfg = configparser.RawConfigParser()
     try:
@@ -434,14 +504,17 @@ def get_client(client_config=None):
                         config=client_config)
     return client
 
-def get_v2_client():
+def get_v2_client(client_config=None):
+    if client_config == None:
+        client_config = Config(signature_version='s3')
+
     client = boto3.client(service_name='s3',
                         aws_access_key_id=config.main_access_key,
                         aws_secret_access_key=config.main_secret_key,
                         endpoint_url=config.default_endpoint,
                         use_ssl=config.default_is_secure,
                         verify=config.default_ssl_verify,
-                        config=Config(signature_version='s3'))
+                        config=client_config)
     return client
 
 def get_sts_client(**kwargs):
@@ -784,6 +857,9 @@ def make_iam_name(name):
 def get_iam_path_prefix():
     return config.iam_path_prefix
 
+def get_dataset_bucket_prefix():
+    return config.dataset_bucket_prefix
+
 def get_iam_access_key():
     return config.iam_access_key
 
@@ -841,6 +917,21 @@ def get_cloud_target_by_bucket():
 def get_cloud_target_by_bucket_prefix():
     return config.cloud_target_by_bucket_prefix
 
+def get_oidc_issuer_host():
+    return config.oidc_issuer_host
+
+def get_oidc_issuer_port():
+    return config.oidc_issuer_port
+
+def get_notification_receiver_host():
+    return config.notification_receiver_host
+
+def get_notification_receiver_port():
+    return config.notification_receiver_port
+
+def get_benchmark_config():
+    return config.benchmark
+
 def create_iam_user_s3client(client):
     prefix = get_iam_path_prefix()
 
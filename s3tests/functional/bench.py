@@ -0,0 +1,199 @@
+import contextlib
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from . import get_benchmark_config
+
+log = logging.getLogger(__name__)
+
+@pytest.fixture
+def bench_config(configfile):
+    """
+    Skip benchmarks unless the config file has a [benchmark] section.
+    """
+    cfg = get_benchmark_config()
+    if cfg is None:
+        pytest.skip('config file has no [benchmark] section')
+    return cfg
+
+_size_re = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', re.IGNORECASE)
+_size_units = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+def parse_size(value):
+    """
+    Parse a size like '512', '64KB' or '2G' into a number of bytes.
+    """
+    if isinstance(value, int):
+        return value
+    m = _size_re.match(value)
+    if not m:
+        raise ValueError('invalid size {!r}'.format(value))
+    return int(float(m.group(1)) * _size_units[m.group(2).upper()])
+
+def _convert(value, default):
+    if isinstance(default, bool):
+        return value.strip().lower() in ('1', 'yes', 'true', 'on')
+    if isinstance(default, int):
+        return parse_size(value)
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, (list, tuple)):
+        items = [v.strip() for v in value.split(',') if v.strip()]
+        if default:
+            return [_convert(v, default[0]) for v in items]
+        return items
+    return value
+
+def option(name, default):
+    """
+    Read an option from the [benchmark] section, converted to the type of
+    default. Integer options accept size suffixes, and list options are
+    comma separated.
+    """
+    cfg = get_benchmark_config() or {}
+    value = cfg.get(name)
+    if value is None or value == '':
+        return default
+    return _convert(value, default)
+
+def get_workers():
+    return option('workers', 8)
+
+class Latencies(object):
+    """
+    Collect the latency samples of one operation. add() and time() are
+    safe to call from worker threads.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.samples = []
+        self.errors = 0
+        self.wall = None
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    @contextlib.contextmanager
+    def time(self):
+        start = time.perf_counter()
+        yield
+        self.add(time.perf_counter() - start)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        count = len(self.samples)
+        total = sum(self.samples)
+        result = {
+            'name': self.name,
+            'count': count,
+            'errors': self.errors,
+            'total': total,
+            'mean': total / count if count else None,
+            'min': min(self.samples) if count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': max(self.samples) if count else None,
+            }
+        if self.wall:
+            result['wall'] = self.wall
+            result['ops_per_sec'] = count / self.wall
+        return result
+
+def run_concurrent(func, items, workers=None, latencies=None):
+    """
+    Call func(item) for every item on a pool of worker threads and return
+    the results in the order of items. When latencies is given, each call
+    is timed into it, and the wall time of the whole run is recorded so
+    the summary reports throughput. The first exception is re-raised after
+    all calls have finished.
+    """
+    if workers is None:
+        workers = get_workers()
+
+    def call(item):
+        if latencies is None:
+            return func(item)
+        start = time.perf_counter()
+        try:
+            result = func(item)
+        except Exception:
+            latencies.error()
+            raise
+        latencies.add(time.perf_counter() - start)
+        return result
+
+    workers = max(1, workers)
+    results = []
+    error = None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # submit in windows, so huge item lists don't queue up all at once
+        items = iter(items)
+        while True:
+            window = [executor.submit(call, item)
+                      for item in itertools.islice(items, workers * 64)]
+            if not window:
+                break
+            for f in window:
+                try:
+                    results.append(f.result())
+                except Exception as e:
+                    results.append(None)
+                    if error is None:
+                        error = e
+    if latencies is not None:
+        latencies.wall = time.perf_counter() - start
+    if error is not None:
+        raise error
+    return results
+
+def timed_iter(iterable, latencies):
+    """
+    Yield from iterable, timing how long each item took to produce. For a
+    boto3 paginator this is the latency of every page request.
+    """
+    it = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        latencies.add(time.perf_counter() - start)
+        yield item
+
+def report(name, **fields):
+    """
+    Log one benchmark result, and append it as a json line to the file
+    named by the 'results file' option, if any.
+    """
+    record = dict(benchmark=name, time=time.time(), **fields)
+    log.info('benchmark %s: %s', name, json.dumps(fields, sort_keys=True, default=str))
+    path = option('results file', '')
+    if path:
+        with open(path, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True, default=str) + '\n')
+    return record
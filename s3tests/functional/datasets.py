@@ -0,0 +1,148 @@
+import hashlib
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from . import (
+    get_client,
+    get_dataset_bucket_prefix,
+    get_new_bucket,
+    nuke_bucket,
+    )
+from .populate import populate_bucket
+from .s3select import upload_chunks
+
+# bump to invalidate every cached dataset, e.g. when a generator changes
+DATASET_VERSION = 1
+
+def dataset_digest(name, params):
+    """ Content address of a dataset: a hash of its name and generation params. """
+    blob = json.dumps([DATASET_VERSION, name, params], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+def _list_objects(client, bucket):
+    objects = []
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket):
+        objects += [{'Key': o['Key'], 'ETag': o['ETag'], 'Size': o['Size']}
+                    for o in page.get('Contents', [])]
+    return objects
+
+class DatasetCache(object):
+    """
+    Buckets of objects that read-only tests share, instead of uploading
+    the same content for every test. Sharing is opt-in: without a
+    configured dataset bucket prefix, every get() builds the dataset in a
+    new bucket of the run, which the per-test cleanup removes. The prefix
+    must be unique per runner, as concurrent runs would rebuild each
+    other's buckets.
+
+    Each dataset lives in its own bucket, named after the digest of its
+    generation params under the dataset bucket prefix, so the per-test
+    cleanup leaves it alone and later runs find it again. Its
+    manifest (the key, ETag and size of every object) is written to the
+    index bucket only once the dataset is complete. A dataset is reused
+    when a listing of its bucket matches the manifest, and is checked once
+    per run; anything else rebuilds it.
+
+    Tests that modify their objects must keep using fresh buckets.
+    """
+    def __init__(self, client=None):
+        if client is None:
+            client = get_client()
+        self.client = client
+        self.prefix = get_dataset_bucket_prefix()
+        self.index = self.prefix + 'index'
+        self.verified = {}
+
+    def _load_manifest(self, digest):
+        try:
+            r = self.client.get_object(Bucket=self.index, Key=digest)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', 'NoSuchBucket'):
+                return None
+            raise
+        return json.loads(r['Body'].read())
+
+    def _is_intact(self, bucket, manifest):
+        if manifest is None:
+            return False
+        try:
+            return _list_objects(self.client, bucket) == manifest['objects']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchBucket':
+                return False
+            raise
+
+    def _create_bucket(self, bucket):
+        try:
+            self.client.create_bucket(Bucket=bucket)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'BucketAlreadyOwnedByYou':
+                raise
+
+    def _build(self, name, params, digest, bucket, populate):
+        self._create_bucket(self.index)
+        # drop the manifest first, so an interrupted build is never reused
+        self.client.delete_object(Bucket=self.index, Key=digest)
+        try:
+            nuke_bucket(self.client, bucket)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchBucket':
+                raise
+        self.client.create_bucket(Bucket=bucket)
+        populate(self.client, bucket)
+
+        manifest = {'name': name, 'params': params,
+                    'objects': _list_objects(self.client, bucket)}
+        self.client.put_object(Bucket=self.index, Key=digest,
+                               Body=json.dumps(manifest, default=str).encode())
+
+    def get(self, name, params, populate):
+        """
+        Return the name of a bucket holding dataset name as generated with
+        params, calling populate(client, bucket_name) to fill a new bucket
+        when no intact copy exists. params must describe the content
+        completely, since they are all that identifies it.
+        """
+        if not self.prefix:
+            # sharing is disabled, build in a bucket the cleanup removes
+            bucket = get_new_bucket(self.client)
+            populate(self.client, bucket)
+            return bucket
+
+        digest = dataset_digest(name, params)
+        bucket = self.verified.get(digest)
+        if bucket is not None:
+            return bucket
+
+        bucket = self.prefix + digest
+        if not self._is_intact(bucket, self._load_manifest(digest)):
+            self._build(name, params, digest, bucket, populate)
+        self.verified[digest] = bucket
+        return bucket
+
+    def objects(self, keys, put_object_args=None):
+        """
+        Shared counterpart of _create_objects(): a bucket holding keys,
+        each containing its own name.
+        """
+        keys = list(keys)
+        put_object_args = put_object_args or {}
+        def populate(client, bucket):
+            populate_bucket(bucket, keys, put_object_args=put_object_args)
+        return self.get('objects', {'keys': keys, 'put_object_args': put_object_args}, populate)
+
+    def object(self, name, params, chunks):
+        """
+        A bucket holding one object named name, with the content produced
+        by calling chunks(). Returns (bucket, key).
+        """
+        def populate(client, bucket):
+            upload_chunks(client, bucket, name, chunks())
+        return self.get(name, params, populate), name
+
+@pytest.fixture(scope="package")
+def dataset_cache(configfile):
+    return DatasetCache()
@@ -1,5 +1,8 @@
 from botocore.exceptions import ClientError
+import functools
 import pytest
+import random
+import time
 
 from . import (
     configfile,
@@ -10,14 +13,46 @@ from . import (
     get_iam_alt_root_user_id,
     get_iam_alt_root_email,
     get_iam_path_prefix,
+    nuke_each,
 )
 
+# number of principals cleaned up in parallel
+cleanup_workers = 8
+
+_throttling_codes = ('Throttling', 'ThrottlingException', 'TooManyRequests',
+                     'TooManyRequestsException', 'RequestLimitExceeded', 'SlowDown')
+
+def retry_throttled(func, *args, attempts=6, **kwargs):
+    """
+    Call func, backing off and retrying while the server throttles or is
+    unavailable. Other errors are raised right away.
+    """
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except ClientError as e:
+            throttled = (e.response['Error']['Code'] in _throttling_codes or
+                         e.response['ResponseMetadata'].get('HTTPStatusCode') == 503)
+            if not throttled or attempt == attempts - 1:
+                raise
+        time.sleep(0.1 * 2 ** attempt * (1 + random.random()))
+
+def _nuke_each(func, client, names):
+    # clean up each principal on the pool, retrying when throttled
+    nuke_each(functools.partial(retry_throttled, func), client, names,
+              workers=cleanup_workers, missing_codes=('NoSuchEntity',))
+
+def _names(client, operation, result_key, name_key, **kwargs):
+    p = client.get_paginator(operation)
+    return [item[name_key] for response in p.paginate(**kwargs)
+            for item in response[result_key]]
+
 def nuke_user_keys(client, name):
     p = client.get_paginator('list_access_keys')
     for response in p.paginate(UserName=name):
         for key in response['AccessKeyMetadata']:
             try:
-                client.delete_access_key(UserName=name, AccessKeyId=key['AccessKeyId'])
+                retry_throttled(client.delete_access_key, UserName=name, AccessKeyId=key['AccessKeyId'])
             except:
                 pass
 
@@ -26,7 +61,7 @@ def nuke_user_policies(client, name):
     for response in p.paginate(UserName=name):
         for policy in response['PolicyNames']:
             try:
-                client.delete_user_policy(UserName=name, PolicyName=policy)
+                retry_throttled(client.delete_user_policy, UserName=name, PolicyName=policy)
             except:
                 pass
 
@@ -35,16 +70,29 @@ def nuke_attached_user_policies(client, name):
     for response in p.paginate(UserName=name):
         for policy in response['AttachedPolicies']:
             try:
-                client.detach_user_policy(UserName=name, PolicyArn=policy['PolicyArn'])
+                retry_throttled(client.detach_user_policy, UserName=name, PolicyArn=policy['PolicyArn'])
+            except:
+                pass
+
+def nuke_user_groups(client, name):
+    p = client.get_paginator('list_groups_for_user')
+    for response in p.paginate(UserName=name):
+        for group in response['Groups']:
+            try:
+                retry_throttled(client.remove_user_from_group, GroupName=group['GroupName'], UserName=name)
             except:
                 pass
 
 def nuke_user(client, name):
-    # delete access keys, user policies, etc
+    # delete access keys, user policies, group memberships, etc
     try:
         nuke_user_keys(client, name)
     except:
         pass
+    try:
+        nuke_user_groups(client, name)
+    except:
+        pass
     try:
         nuke_user_policies(client, name)
     except:
@@ -56,20 +104,15 @@ def nuke_user(client, name):
     client.delete_user(UserName=name)
 
 def nuke_users(client, **kwargs):
-    p = client.get_paginator('list_users')
-    for response in p.paginate(**kwargs):
-        for user in response['Users']:
-            try:
-                nuke_user(client, user['UserName'])
-            except:
-                pass
+    names = retry_throttled(_names, client, 'list_users', 'Users', 'UserName', **kwargs)
+    _nuke_each(nuke_user, client, names)
 
 def nuke_group_policies(client, name):
     p = client.get_paginator('list_group_policies')
     for response in p.paginate(GroupName=name):
         for policy in response['PolicyNames']:
             try:
-                client.delete_group_policy(GroupName=name, PolicyName=policy)
+                retry_throttled(client.delete_group_policy, GroupName=name, PolicyName=policy)
             except:
                 pass
 
@@ -78,7 +121,7 @@ def nuke_attached_group_policies(client, name):
     for response in p.paginate(GroupName=name):
         for policy in response['AttachedPolicies']:
             try:
-                client.detach_group_policy(GroupName=name, PolicyArn=policy['PolicyArn'])
+                retry_throttled(client.detach_group_policy, GroupName=name, PolicyArn=policy['PolicyArn'])
             except:
                 pass
 
@@ -87,7 +130,7 @@ def nuke_group_users(client, name):
     for response in p.paginate(GroupName=name):
         for user in response['Users']:
             try:
-                client.remove_user_from_group(GroupName=name, UserName=user['UserName'])
+                retry_throttled(client.remove_user_from_group, GroupName=name, UserName=user['UserName'])
             except:
                 pass
 
@@ -108,20 +151,15 @@ def nuke_group(client, name):
     client.delete_group(GroupName=name)
 
 def nuke_groups(client, **kwargs):
-    p = client.get_paginator('list_groups')
-    for response in p.paginate(**kwargs):
-        for user in response['Groups']:
-            try:
-                nuke_group(client, user['GroupName'])
-            except:
-                pass
+    names = retry_throttled(_names, client, 'list_groups', 'Groups', 'GroupName', **kwargs)
+    _nuke_each(nuke_group, client, names)
 
 def nuke_role_policies(client, name):
     p = client.get_paginator('list_role_policies')
     for response in p.paginate(RoleName=name):
         for policy in response['PolicyNames']:
             try:
-                client.delete_role_policy(RoleName=name, PolicyName=policy)
+                retry_throttled(client.delete_role_policy, RoleName=name, PolicyName=policy)
             except:
                 pass
 
@@ -130,7 +168,7 @@ def nuke_attached_role_policies(client, name):
     for response in p.paginate(RoleName=name):
         for policy in response['AttachedPolicies']:
             try:
-                client.detach_role_policy(RoleName=name, PolicyArn=policy['PolicyArn'])
+                retry_throttled(client.detach_role_policy, RoleName=name, PolicyArn=policy['PolicyArn'])
             except:
                 pass
 
@@ -147,23 +185,62 @@ def nuke_role(client, name):
     client.delete_role(RoleName=name)
 
 def nuke_roles(client, **kwargs):
-    p = client.get_paginator('list_roles')
-    for response in p.paginate(**kwargs):
-        for role in response['Roles']:
-            try:
-                nuke_role(client, role['RoleName'])
-            except:
-                pass
+    names = retry_throttled(_names, client, 'list_roles', 'Roles', 'RoleName', **kwargs)
+    _nuke_each(nuke_role, client, names)
+
+def nuke_oidc_provider(client, arn):
+    client.delete_open_id_connect_provider(OpenIDConnectProviderArn=arn)
 
 def nuke_oidc_providers(client, prefix):
-    result = client.list_open_id_connect_providers()
-    for provider in result['OpenIDConnectProviderList']:
-        arn = provider['Arn']
-        if f':oidc-provider{prefix}' in arn:
-            try:
-                client.delete_open_id_connect_provider(OpenIDConnectProviderArn=arn)
-            except:
-                pass
+    result = retry_throttled(client.list_open_id_connect_providers)
+    arns = [provider['Arn'] for provider in result['OpenIDConnectProviderList']
+            if f':oidc-provider{prefix}' in provider['Arn']]
+    _nuke_each(nuke_oidc_provider, client, arns)
+
+def track_creates(client):
+    """
+    Return a set that records the name of every Create* operation called
+    on the iam client, so that cleanup can skip the kinds of resources a
+    test never created.
+    """
+    created = set()
+    def record(model, **kwargs):
+        if model.name.startswith('Create'):
+            created.add(model.name)
+    client.meta.events.register('before-call.iam', record)
+    return created
+
+# the operations that leave behind each kind of resource nuke_created() removes
+_create_operations = {
+    'users': {'CreateUser', 'CreateAccessKey', 'CreateLoginProfile'},
+    'groups': {'CreateGroup'},
+    'roles': {'CreateRole', 'CreateServiceLinkedRole'},
+    'oidc_providers': {'CreateOpenIDConnectProvider'},
+}
+
+def nuke_created(client, created, kinds=('users', 'groups', 'roles', 'oidc_providers')):
+    """
+    Remove the resources under the iam path prefix, for each of the kinds
+    that an operation in created could have left behind. Every kind is
+    cleaned up before the last error is raised.
+    """
+    prefix = get_iam_path_prefix()
+    kinds = [kind for kind in kinds if created & _create_operations[kind]]
+    nukes = {
+        'users': lambda: nuke_users(client, PathPrefix=prefix),
+        'groups': lambda: nuke_groups(client, PathPrefix=prefix),
+        'roles': lambda: nuke_roles(client, PathPrefix=prefix),
+        'oidc_providers': lambda: nuke_oidc_providers(client, prefix),
+    }
+    # attempt every kind, so that a failure in one doesn't leak the others
+    err = None
+    for kind in kinds:
+        try:
+            nukes[kind]()
+        except ClientError as e:
+            err = e
+    if err:
+        raise err
 
 
 # fixture for iam account root user
@@ -174,14 +251,12 @@ def iam_root(configfile):
         arn = client.get_user()['User']['Arn']
         if not arn.endswith(':root'):
             pytest.skip('[iam root] user does not have :root arn')
-    except ClientError as e:
+    except ClientError:
         pytest.skip('[iam root] user does not belong to an account')
 
+    created = track_creates(client)
     yield client
-    nuke_users(client, PathPrefix=get_iam_path_prefix())
-    nuke_groups(client, PathPrefix=get_iam_path_prefix())
-    nuke_roles(client, PathPrefix=get_iam_path_prefix())
-    nuke_oidc_providers(client, get_iam_path_prefix())
+    nuke_created(client, created)
 
 # fixture for iam alt account root user
 @pytest.fixture
@@ -191,9 +266,9 @@ def iam_alt_root(configfile):
         arn = client.get_user()['User']['Arn']
         if not arn.endswith(':root'):
             pytest.skip('[iam alt root] user does not have :root arn')
-    except ClientError as e:
+    except ClientError:
         pytest.skip('[iam alt root] user does not belong to an account')
 
+    created = track_creates(client)
     yield client
-    nuke_users(client, PathPrefix=get_iam_path_prefix())
-    nuke_roles(client, PathPrefix=get_iam_path_prefix())
+    nuke_created(client, created, kinds=('users', 'roles'))
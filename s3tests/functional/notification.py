@@ -0,0 +1,123 @@
+import collections
+import http.server
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from . import (
+    configfile,
+    get_notification_receiver_host,
+    get_notification_receiver_port,
+    )
+
+log = logging.getLogger(__name__)
+
+Event = collections.namedtuple('Event', 'received record')
+
+class NotificationReceiver(object):
+    """
+    A local http endpoint for the push-endpoint of bucket notification
+    topics. It keeps every record it is sent, with the time it arrived,
+    and lets tests wait for them.
+
+    The gateway connects to it, so host must be an address the gateway
+    can reach. Connections are kept alive, as the gateway's http client
+    reuses them.
+    """
+    def __init__(self, host='localhost', port=0):
+        self.host = host
+        self.events = []
+        self.posts = 0
+        self._cond = threading.Condition()
+        self._server = http.server.ThreadingHTTPServer(('', port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        return 'http://{}:{}'.format(self.host, self.port)
+
+    def _handler(self):
+        receiver = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                received = time.perf_counter()
+                try:
+                    records = json.loads(body)['Records']
+                except (ValueError, KeyError, TypeError):
+                    log.warning('notification receiver: bad body %r', body[:200])
+                    records = []
+                receiver._add(received, records)
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                log.debug('notification receiver: ' + format, *args)
+
+        return Handler
+
+    def _add(self, received, records):
+        with self._cond:
+            self.posts += 1
+            self.events.extend(Event(received, r) for r in records)
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self.events = []
+            self.posts = 0
+
+    def wait(self, count, timeout=30, idle=None):
+        """
+        Wait until at least count records arrived, for at most timeout
+        seconds, or idle seconds without a new one. Returns the records
+        received so far.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self.events) < count:
+                remaining = deadline - time.monotonic()
+                if idle is not None:
+                    remaining = min(remaining, idle)
+                if remaining <= 0:
+                    break
+                seen = len(self.events)
+                self._cond.wait(remaining)
+                if idle is not None and len(self.events) == seen:
+                    break
+            return list(self.events)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+@pytest.fixture
+def notification_receiver(configfile):
+    """
+    A local notification receiver for one test, listening on the
+    [notification receiver] host and port of the config file.
+    """
+    with NotificationReceiver(get_notification_receiver_host(),
+                              get_notification_receiver_port()) as receiver:
+        yield receiver
@@ -0,0 +1,223 @@
+import base64
+import datetime
+import hashlib
+import http.server
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from . import (
+    configfile,
+    get_iam_client,
+    get_oidc_issuer_host,
+    get_oidc_issuer_port,
+    )
+
+log = logging.getLogger(__name__)
+
+# keys, certificates and signatures come from the cryptography package,
+# an optional requirement (see the oidc extra in setup.py); the fixture
+# skips without it
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def _b64url_int(n):
+    return _b64url(n.to_bytes((n.bit_length() + 7) // 8, 'big'))
+
+def generate_key(bits=2048):
+    """ A new RSA private key. """
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    return rsa.generate_private_key(public_exponent=65537, key_size=bits)
+
+def public_key_der(key):
+    """ The DER SubjectPublicKeyInfo of a private key. """
+    from cryptography.hazmat.primitives import serialization
+    return key.public_key().public_bytes(serialization.Encoding.DER,
+                                         serialization.PublicFormat.SubjectPublicKeyInfo)
+
+def self_signed_certificate(key, common_name, days=3650):
+    """ A self-signed X.509 certificate for key, in DER. """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.x509.oid import NameOID
+
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=days))
+            .sign(key, hashes.SHA256()))
+    return cert.public_bytes(serialization.Encoding.DER)
+
+def encode_jwt(key, kid, claims):
+    """ A JSON web token of claims, signed with key as RS256. """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    header = {'alg': 'RS256', 'typ': 'JWT', 'kid': kid}
+    signing_input = '.'.join(_b64url(json.dumps(part, separators=(',', ':')).encode())
+                             for part in (header, claims))
+    signature = key.sign(signing_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+    return signing_input + '.' + _b64url(signature)
+
+def decode_jwt(token):
+    """ The header and claims of a token, without checking its signature. """
+    def decode(part):
+        return json.loads(base64.urlsafe_b64decode(part + '=' * (-len(part) % 4)))
+    header, claims, _ = token.split('.')
+    return decode(header), decode(claims)
+
+class OIDCIssuer(object):
+    """
+    A minimal OpenID Connect identity provider on a local http server. It
+    publishes a discovery document and a JWKS for one RS256 key, whose
+    self-signed certificate gives the thumbprint to register the provider
+    with, and mints tokens with any claims.
+
+    The gateway fetches the JWKS itself, so host must be an address the
+    gateway can reach. The number of discovery and JWKS requests served is
+    counted, which shows how the gateway caches them.
+    """
+    default_aud = 's3tests'
+
+    def __init__(self, host='localhost', port=0, path='/realms/s3tests', key=None):
+        self.host = host
+        self.path = path
+        self.key = key or generate_key()
+        self.kid = _b64url(hashlib.sha256(public_key_der(self.key)).digest()[:12])
+        self.cert = self_signed_certificate(self.key, host)
+        self.thumbprint = hashlib.sha1(self.cert).hexdigest().upper()
+        self.requests = {'discovery': 0, 'jwks': 0}
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(('', port), self._handler())
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}{}'.format(self.host, self.port, self.path)
+
+    @property
+    def condition_prefix(self):
+        """ The issuer as trust policy condition keys spell it, as in condition_prefix + ':sub'. """
+        return '{}:{}{}'.format(self.host, self.port, self.path)
+
+    def discovery(self):
+        return {
+            'issuer': self.url,
+            'jwks_uri': self.url + '/protocol/openid-connect/certs',
+            'response_types_supported': ['id_token'],
+            'subject_types_supported': ['public'],
+            'id_token_signing_alg_values_supported': ['RS256'],
+            }
+
+    def jwks(self):
+        numbers = self.key.public_key().public_numbers()
+        return {'keys': [{
+            'kty': 'RSA',
+            'use': 'sig',
+            'alg': 'RS256',
+            'kid': self.kid,
+            'n': _b64url_int(numbers.n),
+            'e': _b64url_int(numbers.e),
+            'x5c': [base64.b64encode(self.cert).decode()],
+            }]}
+
+    def _handler(self):
+        issuer = self
+        routes = {
+            issuer.path + '/.well-known/openid-configuration': ('discovery', issuer.discovery),
+            issuer.path + '/protocol/openid-connect/certs': ('jwks', issuer.jwks),
+            }
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                route = routes.get(self.path.split('?')[0])
+                if route is None:
+                    self.send_error(404)
+                    return
+                name, document = route
+                with issuer._lock:
+                    issuer.requests[name] += 1
+                body = json.dumps(document()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                log.debug('oidc issuer: ' + format, *args)
+
+        return Handler
+
+    def token(self, sub='s3tests-user', aud=None, azp=None, expires_in=3600,
+              principal_tags=None, transitive_tag_keys=None, **claims):
+        """
+        Mint a signed token for sub. principal_tags ({key: [values]}) and
+        transitive_tag_keys go in the https://aws.amazon.com/tags claim that
+        carries session tags.
+        """
+        aud = aud or self.default_aud
+        now = int(time.time())
+        payload = {
+            'iss': self.url,
+            'sub': sub,
+            'aud': aud,
+            'azp': azp or aud,
+            'iat': now,
+            'exp': now + expires_in,
+            }
+        if principal_tags is not None or transitive_tag_keys is not None:
+            tags = {'principal_tags': principal_tags or {}}
+            if transitive_tag_keys is not None:
+                tags['transitive_tag_keys'] = transitive_tag_keys
+            payload['https://aws.amazon.com/tags'] = [tags]
+        payload.update(claims)
+        return encode_jwt(self.key, self.kid, payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+@pytest.fixture(scope="package")
+def oidc_issuer(configfile):
+    """
+    A local OIDC issuer for the whole run, listening on the [oidc issuer]
+    host and port of the config file. Needs the cryptography package.
+    """
+    pytest.importorskip('cryptography')
+    with OIDCIssuer(get_oidc_issuer_host(), get_oidc_issuer_port()) as issuer:
+        yield issuer
+
+@pytest.fixture
+def oidc_provider(oidc_issuer):
+    """ Register the local issuer with the gateway for one test; yields its arn. """
+    iam_client = get_iam_client()
+    arn = iam_client.create_open_id_connect_provider(
+        Url=oidc_issuer.url,
+        ClientIDList=[oidc_issuer.default_aud],
+        ThumbprintList=[oidc_issuer.thumbprint],
+        )['OpenIDConnectProviderArn']
+    yield arn
+    iam_client.delete_open_id_connect_provider(OpenIDConnectProviderArn=arn)
@@ -1,4 +1,9 @@
+import datetime
+import functools
+import ipaddress
 import json
+import re
+from collections import namedtuple
 
 class Statement(object):
     def __init__(self, action, resource, principal = {"AWS" : "*"}, effect= "Allow", condition = None):
@@ -9,11 +14,14 @@ class Statement(object):
         self.effect = effect
 
     def to_dict(self):
-        d = { "Action" : self.action,
-              "Principal" : self.principal,
-              "Effect" : self.effect,
-              "Resource" : self.resource
-        }
+        d = { "Action" : self.action }
+
+        # identity policies, e.g. user policies, have no Principal
+        if self.principal is not None:
+            d["Principal"] = self.principal
+
+        d["Effect"] = self.effect
+        d["Resource"] = self.resource
 
         if self.condition is not None:
             d["Condition"] = self.condition
@@ -44,3 +52,226 @@ def make_json_policy(action, resource, principal={"AWS": "*"}, effect="Allow", c
     s = Statement(action, resource, principal, effect=effect, condition=conditions)
     p = Policy()
     return p.add_statement(s).to_json()
+
+# Offline policy evaluation
+#
+# PolicyEvaluator decides requests the way IAM documents the policy
+# language, so tests can compare the gateway's answers against it. It
+# covers Effect, Action/NotAction, Resource/NotResource,
+# Principal/NotPrincipal and the common condition operators, with the
+# IfExists suffix and the ForAnyValue/ForAllValues qualifiers. Policy
+# variables like ${aws:username} are matched literally.
+
+class Request(namedtuple('Request', 'action resource principal context')):
+    """
+    A request to authorize: an action like 's3:GetObject', a resource ARN,
+    the principal ARN (None when anonymous) and a dict of condition keys,
+    whose values are strings or lists of strings.
+    """
+    def __new__(cls, action, resource, principal=None, context=None):
+        return super().__new__(cls, action, resource, principal, context or {})
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+@functools.lru_cache(maxsize=None)
+def _glob(pattern):
+    return '.*'.join('.'.join(re.escape(p) for p in part.split('?'))
+                     for part in pattern.split('*'))
+
+def _glob_matcher(patterns, ignore_case=False):
+    """ fullmatch function for a list of patterns with * and ? wildcards. """
+    if '*' in patterns:
+        return lambda value: True
+    if not any('*' in p or '?' in p for p in patterns):
+        exact = set(p.lower() for p in patterns) if ignore_case else set(patterns)
+        if ignore_case:
+            return lambda value: value.lower() in exact
+        return exact.__contains__
+    regex = re.compile('|'.join(_glob(p) for p in patterns),
+                       re.IGNORECASE if ignore_case else 0)
+    return lambda value: regex.fullmatch(value) is not None
+
+def _parse_date(value):
+    try:
+        return datetime.datetime.fromtimestamp(float(value), datetime.timezone.utc)
+    except ValueError:
+        d = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return d if d.tzinfo else d.replace(tzinfo=datetime.timezone.utc)
+
+def _ip_in(actual, expected):
+    try:
+        return ipaddress.ip_address(actual) in ipaddress.ip_network(expected, strict=False)
+    except ValueError:
+        return False
+
+# the positive form of each operator: does one context value match one
+# policy value
+_matchers = {
+    'String': lambda a, e: a == e,
+    'StringIgnoreCase': lambda a, e: a.lower() == e.lower(),
+    'StringLike': lambda a, e: re.fullmatch(_glob(e), a, re.DOTALL) is not None,
+    'Numeric': lambda a, e: float(a) == float(e),
+    'Date': lambda a, e: _parse_date(a) == _parse_date(e),
+    'Bool': lambda a, e: str(a).lower() == str(e).lower(),
+    'IpAddress': _ip_in,
+    'Arn': lambda a, e: re.fullmatch(_glob(e), a) is not None,
+    }
+
+_comparisons = {
+    'LessThan': lambda a, e: a < e,
+    'LessThanEquals': lambda a, e: a <= e,
+    'GreaterThan': lambda a, e: a > e,
+    'GreaterThanEquals': lambda a, e: a >= e,
+    }
+
+def _operator(name):
+    """
+    Return (match, negated) for a condition operator name without its
+    qualifier and IfExists suffix.
+    """
+    table = {
+        'StringEquals': ('String', False),
+        'StringNotEquals': ('String', True),
+        'StringEqualsIgnoreCase': ('StringIgnoreCase', False),
+        'StringNotEqualsIgnoreCase': ('StringIgnoreCase', True),
+        'StringLike': ('StringLike', False),
+        'StringNotLike': ('StringLike', True),
+        'NumericEquals': ('Numeric', False),
+        'NumericNotEquals': ('Numeric', True),
+        'DateEquals': ('Date', False),
+        'DateNotEquals': ('Date', True),
+        'Bool': ('Bool', False),
+        'BinaryEquals': ('String', False),
+        'IpAddress': ('IpAddress', False),
+        'NotIpAddress': ('IpAddress', True),
+        'ArnEquals': ('Arn', False),
+        'ArnLike': ('Arn', False),
+        'ArnNotEquals': ('Arn', True),
+        'ArnNotLike': ('Arn', True),
+        }
+    if name in table:
+        kind, negated = table[name]
+        return _matchers[kind], negated
+    for prefix, convert in (('Numeric', float), ('Date', _parse_date)):
+        if name.startswith(prefix) and name[len(prefix):] in _comparisons:
+            compare = _comparisons[name[len(prefix):]]
+            return (lambda a, e: compare(convert(a), convert(e))), False
+    raise ValueError('unsupported condition operator {}'.format(name))
+
+def _compile_condition(operator, key, values):
+    """ A function of the request context for one key of one operator. """
+    qualifier = None
+    if ':' in operator:
+        qualifier, operator = operator.split(':', 1)
+    if_exists = operator.endswith('IfExists')
+    if if_exists:
+        operator = operator[:-len('IfExists')]
+    values = [str(v) if isinstance(v, bool) else v for v in _as_list(values)]
+
+    if operator == 'Null':
+        want_missing = str(values[0]).lower() == 'true'
+        return lambda context: (key not in context) == want_missing
+
+    match, negated = _operator(operator)
+    def test(actual):
+        try:
+            matched = any(match(actual, v) for v in values)
+        except (ValueError, TypeError):
+            matched = False
+        return not matched if negated else matched
+
+    def condition(context):
+        if key not in context:
+            # documented IAM behavior for missing keys
+            return if_exists or negated or qualifier == 'ForAllValues'
+        actual = context[key]
+        if not isinstance(actual, list):
+            return test(actual)
+        if qualifier == 'ForAllValues':
+            return all(test(a) for a in actual)
+        return any(test(a) for a in actual)
+    return condition
+
+def _compile_principal(statement):
+    if 'Principal' in statement:
+        field, negated = statement['Principal'], False
+    elif 'NotPrincipal' in statement:
+        field, negated = statement['NotPrincipal'], True
+    else:
+        # identity policies apply to whoever they are attached to
+        return lambda principal: True
+    if field == '*':
+        names = {'*'}
+    else:
+        names = set()
+        for value in field.values():
+            names.update(_as_list(value))
+    if '*' in names:
+        return lambda principal: not negated
+    return lambda principal: (principal in names) != negated
+
+_CompiledStatement = namedtuple('_CompiledStatement', 'allow action resource principal conditions')
+
+def _compile_statement(statement):
+    def field(name):
+        if name in statement:
+            return _glob_matcher(_as_list(statement[name]), name.endswith('Action')), False
+        not_name = 'Not' + name
+        if not_name in statement:
+            return _glob_matcher(_as_list(statement[not_name]), name.endswith('Action')), True
+        return (lambda value: True), False
+
+    action, not_action = field('Action')
+    resource, not_resource = field('Resource')
+    conditions = [_compile_condition(operator, key, values)
+                  for operator, keys in statement.get('Condition', {}).items()
+                  for key, values in keys.items()]
+    return _CompiledStatement(
+        allow=statement['Effect'] == 'Allow',
+        action=(lambda a: not action(a)) if not_action else action,
+        resource=(lambda r: not resource(r)) if not_resource else resource,
+        principal=_compile_principal(statement),
+        conditions=conditions)
+
+class PolicyEvaluator(object):
+    """
+    Decide requests against one or more policies (a Policy, json text or
+    a dict each). evaluate() returns 'Deny' when a statement explicitly
+    denies the request, otherwise 'Allow' when one allows it, otherwise
+    None for the implicit deny.
+
+    Statements are compiled once, and the statements whose Action matches
+    are indexed by action on first use, so an evaluation only looks at
+    the statements that can apply to its action.
+    """
+    def __init__(self, *policies):
+        self.statements = []
+        for policy in policies:
+            if isinstance(policy, Policy):
+                policy = policy.to_json()
+            if isinstance(policy, str):
+                policy = json.loads(policy)
+            self.statements += [_compile_statement(s) for s in _as_list(policy['Statement'])]
+        self._by_action = {}
+
+    def _candidates(self, action):
+        candidates = self._by_action.get(action)
+        if candidates is None:
+            # deny statements first, so the first match decides
+            matching = [s for s in self.statements if s.action(action)]
+            candidates = [s for s in matching if not s.allow] + [s for s in matching if s.allow]
+            self._by_action[action] = candidates
+        return candidates
+
+    def evaluate(self, request, *args, **kwargs):
+        if not isinstance(request, Request):
+            request = Request(request, *args, **kwargs)
+        for s in self._candidates(request.action):
+            if (s.resource(request.resource) and s.principal(request.principal) and
+                    all(c(request.context) for c in s.conditions)):
+                return 'Allow' if s.allow else 'Deny'
+        return None
+
+    def is_allowed(self, request, *args, **kwargs):
+        return self.evaluate(request, *args, **kwargs) == 'Allow'
@@ -0,0 +1,67 @@
+from botocore.client import Config
+
+from . import get_client
+from . import bench
+
+def iter_keys(count, prefix='', depth=0, fanout=10, delimiter='/', name='obj'):
+    """
+    Yield count key names spread evenly over a hierarchy of depth levels
+    with fanout directories each, e.g. with depth=2 'prefix' 'd3/d7/obj000123'.
+    With depth=0 all keys share one level. Keys come in creation order;
+    key i lands in the directory given by the low digits of i in base
+    fanout.
+    """
+    width = len(str(max(count - 1, 0)))
+    dir_width = len(str(max(fanout - 1, 0)))
+    for i in range(count):
+        parts = []
+        n = i
+        for _ in range(depth):
+            parts.append('d{:0{w}d}'.format(n % fanout, w=dir_width))
+            n //= fanout
+        parts.reverse()
+        parts.append('{}{:0{w}d}'.format(name, i, w=width))
+        yield prefix + delimiter.join(parts)
+
+def generate_keys(count, **kwargs):
+    """ The names of iter_keys() as a sorted list, in listing order. """
+    return sorted(iter_keys(count, **kwargs))
+
+def populate_bucket(bucket_name, keys, client=None, workers=None, put_object_args=None, body=None, latencies=None, manifest=True):
+    """
+    Put every key into the bucket concurrently, on at most workers
+    requests in flight. Like _create_objects(), each object holds its own
+    name unless body is given, either as bytes or as a function of the
+    key. Keys should be unique, since concurrent puts of the same key land
+    in any order.
+
+    Returns a manifest in the order of keys, one dict per object with its
+    Key, ETag, Size and VersionId (None when the bucket is unversioned).
+    With manifest=False only the number of objects is returned, which
+    keeps memory flat when populating millions of keys from a generator.
+    """
+    if workers is None:
+        workers = bench.get_workers()
+    if client is None:
+        client = get_client(Config(signature_version='s3v4',
+                                   max_pool_connections=workers))
+    if put_object_args is None:
+        put_object_args = {}
+
+    def put(key):
+        if body is None:
+            data = key.encode()
+        elif callable(body):
+            data = body(key)
+        else:
+            data = body
+        response = client.put_object(Bucket=bucket_name, Key=key, Body=data, **put_object_args)
+        if not manifest:
+            return None
+        return {'Key': key, 'ETag': response['ETag'], 'Size': len(data),
+                'VersionId': response.get('VersionId')}
+
+    results = bench.run_concurrent(put, keys, workers=workers, latencies=latencies)
+    if not manifest:
+        return len(results)
+    return results
@@ -0,0 +1,445 @@
+import base64
+import hashlib
+import hmac
+import random
+import socket
+import ssl
+import time
+import urllib.parse
+from collections import Counter, namedtuple
+from email.utils import formatdate
+
+from . import (
+    get_client,
+    get_config_host,
+    get_config_is_secure,
+    get_config_port,
+    get_config_ssl_verify,
+    get_main_aws_access_key,
+    get_main_aws_secret_key,
+    )
+
+# A minimal HTTP/1.1 client for requests that boto3 won't send: headers
+# missing, duplicated, oversized or malformed. Requests are lists of
+# (name, value) pairs, so the same header can appear twice, and they are
+# pipelined over keep-alive connections, so thousands of variations can
+# be sent per second.
+
+Request = namedtuple('Request', 'method path headers body')
+Response = namedtuple('Response', 'status reason headers body')
+
+def header(headers, name):
+    """ The value of the first header called name, or None. """
+    name = name.lower()
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+def without(headers, name):
+    name = name.lower()
+    return [(k, v) for k, v in headers if k.lower() != name]
+
+def replace(headers, name, value):
+    """ headers with the value of name replaced, or added if it is missing. """
+    if header(headers, name) is None:
+        return headers + [(name, value)]
+    return [(k, value if k.lower() == name.lower() else v) for k, v in headers]
+
+class SigV4Signer(object):
+    """
+    Sign requests in their Authorization header with AWS Signature
+    Version 4. The signing key only changes with the date, so it's derived
+    once per day instead of for every request.
+    """
+    algorithm = 'AWS4-HMAC-SHA256'
+
+    def __init__(self, access_key, secret_key, region='us-east-1', service='s3'):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+        self._keys = {}
+
+    def signing_key(self, date):
+        key = self._keys.get(date)
+        if key is None:
+            key = ('AWS4' + self.secret_key).encode()
+            for part in (date, self.region, self.service, 'aws4_request'):
+                key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+            self._keys = {date: key}
+        return key
+
+    def sign(self, request, host, now=None):
+        """
+        Return the headers of request with host, x-amz-date,
+        x-amz-content-sha256 and Authorization added where missing. Values
+        already set, even malformed ones, are signed as they are.
+        """
+        now = time.gmtime(now)
+        headers = list(request.headers)
+        if header(headers, 'host') is None:
+            headers.append(('Host', host))
+        if header(headers, 'x-amz-date') is None:
+            headers.append(('x-amz-date', time.strftime('%Y%m%dT%H%M%SZ', now)))
+        if header(headers, 'x-amz-content-sha256') is None:
+            headers.append(('x-amz-content-sha256', hashlib.sha256(request.body).hexdigest()))
+        if header(headers, 'authorization') is not None:
+            return headers
+
+        signed = sorted({'host', 'x-amz-date', 'x-amz-content-sha256'})
+        date = time.strftime('%Y%m%d', now)
+        scope = '{}/{}/{}/aws4_request'.format(date, self.region, self.service)
+        path, _, query = request.path.partition('?')
+        canonical_query = '&'.join(sorted(
+            '{}={}'.format(urllib.parse.quote(k, safe='-_.~'), urllib.parse.quote(v, safe='-_.~'))
+            for k, v in urllib.parse.parse_qsl(query, keep_blank_values=True)))
+        canonical_request = '\n'.join([
+            request.method,
+            urllib.parse.quote(path, safe='/-_.~'),
+            canonical_query,
+            ''.join('{}:{}\n'.format(name, ' '.join(header(headers, name).split()))
+                    for name in signed),
+            ';'.join(signed),
+            header(headers, 'x-amz-content-sha256'),
+            ])
+        string_to_sign = '\n'.join([
+            self.algorithm,
+            header(headers, 'x-amz-date'),
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ])
+        signature = hmac.new(self.signing_key(date), string_to_sign.encode(), hashlib.sha256).hexdigest()
+        headers.append(('Authorization', '{} Credential={}/{}, SignedHeaders={}, Signature={}'.format(
+            self.algorithm, self.access_key, scope, ';'.join(signed), signature)))
+        return headers
+
+class SigV2Signer(object):
+    """ Sign requests in their Authorization header with AWS Signature Version 2. """
+    def __init__(self, access_key, secret_key):
+        self.access_key = access_key
+        self._hmac = hmac.new(secret_key.encode(), digestmod=hashlib.sha1)
+
+    def sign(self, request, host, now=None):
+        """
+        Return the headers of request with Host, Date and Authorization
+        added where missing. Values already set are signed as they are.
+        """
+        headers = list(request.headers)
+        if header(headers, 'host') is None:
+            headers.append(('Host', host))
+        if header(headers, 'date') is None and header(headers, 'x-amz-date') is None:
+            headers.append(('Date', formatdate(now, usegmt=True)))
+        if header(headers, 'authorization') is not None:
+            return headers
+
+        amz = {}
+        for k, v in headers:
+            if k.lower().startswith('x-amz-'):
+                amz.setdefault(k.lower(), []).append(v.strip())
+        lines = [request.method]
+        lines += [(header(headers, name) or '').strip() for name in ('content-md5', 'content-type', 'date')]
+        lines += ['{}:{}'.format(k, ','.join(amz[k])) for k in sorted(amz)]
+        lines.append(request.path.partition('?')[0])
+        # copying the keyed hmac skips hashing the key for every request
+        h = self._hmac.copy()
+        h.update('\n'.join(lines).encode())
+        signature = base64.b64encode(h.digest()).decode()
+        headers.append(('Authorization', 'AWS {}:{}'.format(self.access_key, signature)))
+        return headers
+
+def encode_request(method, path, headers, body):
+    lines = ['{} {} HTTP/1.1'.format(method, path)]
+    lines += ['{}: {}'.format(k, v) for k, v in headers]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+class RawConnection(object):
+    """
+    A keep-alive HTTP/1.1 connection that pipelines requests: send() writes
+    all of them before reading the responses in order. When the server
+    closes the connection early, the requests left unanswered are sent
+    again on a new one; a request that gets no response at all on a fresh
+    connection has a None status.
+    """
+    def __init__(self, host, port, secure=False, verify=True, timeout=10):
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.verify = verify
+        self.timeout = timeout
+        self.connects = 0
+        self._sock = None
+        self._buf = b''
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.secure:
+            context = ssl.create_default_context()
+            if not self.verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=self.host)
+        self._sock = sock
+        self._buf = b''
+        self.connects += 1
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _fill(self):
+        data = self._sock.recv(65536)
+        if not data:
+            raise ConnectionError('connection closed')
+        self._buf += data
+
+    def _read_until(self, sep):
+        while sep not in self._buf:
+            self._fill()
+        data, _, self._buf = self._buf.partition(sep)
+        return data
+
+    def _read_exact(self, n):
+        while len(self._buf) < n:
+            self._fill()
+        data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
+    def _read_response(self, method):
+        head = self._read_until(b'\r\n\r\n').decode('latin-1').split('\r\n')
+        _, status, reason = (head[0].split(' ', 2) + [''])[:3]
+        headers = [tuple(part.strip() for part in line.split(':', 1)) for line in head[1:] if ':' in line]
+        length = header(headers, 'content-length')
+        if method == 'HEAD' or status in ('204', '304'):
+            body = b''
+        elif (header(headers, 'transfer-encoding') or '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int(self._read_until(b'\r\n').split(b';')[0], 16)
+                body += self._read_exact(size)
+                self._read_exact(2)
+                if size == 0:
+                    break
+        elif length is not None:
+            body = self._read_exact(int(length))
+        else:
+            # no framing: the body lasts until the server closes
+            try:
+                while True:
+                    self._fill()
+            except (ConnectionError, OSError):
+                pass
+            body, self._buf = self._buf, b''
+            headers.append(('Connection', 'close'))
+        return Response(int(status), reason, headers, body)
+
+    def send(self, requests):
+        """ Send encoded requests, given as (method, bytes), and return their responses. """
+        responses = []
+        pending = list(requests)
+        while pending:
+            fresh = self._sock is None
+            if fresh:
+                self._connect()
+            try:
+                self._sock.sendall(b''.join(data for _, data in pending))
+            except OSError:
+                pass
+            answered = 0
+            try:
+                for method, _ in pending:
+                    response = self._read_response(method)
+                    responses.append(response)
+                    answered += 1
+                    if (header(response.headers, 'connection') or '').lower() == 'close':
+                        self.close()
+                        break
+            except (ConnectionError, OSError, ValueError):
+                self.close()
+                if fresh and answered == 0:
+                    # even a new connection got nothing back for this one
+                    responses.append(Response(None, 'no response', [], b''))
+                    answered = 1
+            pending = pending[answered:]
+        return responses
+
+# How a fuzz case changes the base request: each mutation takes and returns
+# a list of headers, applied before signing, or after it when post_sign is
+# set. Cases that break the message framing (Content-Length) are sent on
+# their own connection, since they'd corrupt a pipeline. A server may
+# rightly wait for more of the body than some of them send, so those may
+# get no response before the timeout.
+Mutation = namedtuple('Mutation', 'name apply post_sign isolated expect may_hang')
+
+def _mutation(name, apply, post_sign=False, isolated=False, expect=None, may_hang=False):
+    return Mutation(name, apply, post_sign, isolated, frozenset(expect) if expect else None,
+                    may_hang)
+
+def header_mutations(body, signature_version):
+    """
+    The mutations of a PutObject request for body. The expected statuses
+    are only those that test_headers asserts for the same header with the
+    same signature version and that RGW passes; the rest are only checked
+    for being answered without a server error. Date headers are set as
+    those tests set them: x-amz-date, in the format of the signature
+    version.
+    """
+    v2 = signature_version == 2
+    def set_(name, value, **kwargs):
+        return _mutation('{}={}'.format(name, value[:40]), lambda h: replace(h, name, value), **kwargs)
+    def remove(name, **kwargs):
+        return _mutation('no {}'.format(name), lambda h: without(h, name), **kwargs)
+    def duplicate(name, **kwargs):
+        return _mutation('duplicate {}'.format(name),
+                         lambda h: h + [(name, header(h, name))] if header(h, name) is not None else h,
+                         **kwargs)
+    def only_v2(expect):
+        return expect if v2 else None
+
+    md5 = base64.b64encode(hashlib.md5(body).digest()).decode()
+    if v2:
+        dates = ['Bad Date', '', 'Tue, 07 Jul 2010 21:53:04 GMT',
+                 'Tue, 07 Jul 1950 21:53:04 GMT', 'Tue, 07 Jul 9999 21:53:04 GMT']
+    else:
+        dates = ['Bad Date', '', time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(time.time() - 3600)),
+                 '19500707T215304Z', '99990707T215304Z']
+    mutations = [
+        set_('Content-MD5', md5, expect=[200]),
+        set_('Content-MD5', 'YWJyYWNhZGFicmE=', expect=[400]),
+        set_('Content-MD5', 'rL0Y20xC+Fzt72VPzMSk2A==', expect=[400]),
+        set_('Content-MD5', '', expect=[400]),
+        set_('Content-MD5', 'AWS HAHAHA', expect=only_v2([400])),
+        set_('Content-Type', 'text/plain', expect=[200]),
+        set_('Content-Type', '', expect=[200]),
+        set_('User-Agent', '', expect=only_v2([200])),
+        remove('User-Agent', expect=only_v2([200])),
+        ]
+    mutations += [set_('x-amz-date', date, expect=only_v2([403])) for date in dates]
+    mutations += [
+        remove('x-amz-date', post_sign=True),
+        remove('Authorization', post_sign=True),
+        set_('Authorization', '', post_sign=True),
+        set_('Authorization', 'AWS HAHAHA', post_sign=True),
+        set_('x-amz-acl', 'public-ready'),
+        set_('x-amz-meta-big', 'x' * 8 * 1024),
+        set_('x-amz-meta-huge', 'x' * 64 * 1024, isolated=True),
+        set_('X-Fuzz', 'x' * 1024 * 1024, isolated=True),
+        set_('x-amz-meta-utf8', '\xe9t\xe9'),
+        set_('x-amz-meta-ctl', 'a\tb'),
+        duplicate('Content-Type'),
+        duplicate('x-amz-meta-big'),
+        duplicate('Host', post_sign=True),
+        duplicate('Authorization', post_sign=True),
+        duplicate('Content-Length', isolated=True),
+        set_('Content-Length', '', isolated=True),
+        set_('Content-Length', '-1', isolated=True, expect=[400]),
+        set_('Content-Length', 'abc', isolated=True),
+        set_('Content-Length', '99999999999999999999', isolated=True, may_hang=True),
+        set_('Content-Length', str(len(body) - 1), isolated=True),
+        remove('Content-Length', isolated=True),
+        set_('Expect', '200', expect=[200]),
+        set_('Expect', ''),
+        set_('Connection', 'close', isolated=True),
+        ]
+    return mutations
+
+FuzzResult = namedtuple('FuzzResult', 'case status expected may_hang', defaults=(False,))
+
+class HeaderFuzzer(object):
+    """
+    Send PutObject requests under combinations of header mutations and
+    collect the statuses. Cases are built and signed up front, so sending
+    them is just writing bytes.
+    """
+    def __init__(self, connection, signer, host, bucket_name, signature_version=4, body=b'bar'):
+        self.connection = connection
+        self.signer = signer
+        self.host = host
+        self.bucket_name = bucket_name
+        self.body = body
+        self.mutations = header_mutations(body, signature_version)
+
+    def build(self, key, mutations):
+        headers = [('Content-Length', str(len(self.body)))]
+        request = Request('PUT', '/{}/{}'.format(self.bucket_name, key), headers, self.body)
+        for m in mutations:
+            if not m.post_sign:
+                headers = m.apply(headers)
+        headers = self.signer.sign(request._replace(headers=headers), self.host)
+        for m in mutations:
+            if m.post_sign:
+                headers = m.apply(headers)
+        return encode_request(request.method, request.path, headers, self.body)
+
+    def cases(self, count, seed=0, max_mutations=3):
+        """
+        Every single mutation, then random combinations of those that can
+        be pipelined until there are count cases. Only single mutations
+        have expected statuses.
+        """
+        rng = random.Random(seed)
+        combos = [[m] for m in self.mutations]
+        pipelined = [m for m in self.mutations if not m.isolated]
+        while len(combos) < count:
+            combos.append(rng.sample(pipelined, rng.randint(2, max_mutations)))
+        for i, combo in enumerate(combos[:count]):
+            expected = combo[0].expect if len(combo) == 1 else None
+            yield ' + '.join(m.name for m in combo), combo, expected, 'fuzz{}'.format(i)
+
+    def run(self, count, seed=0, depth=16):
+        """
+        Send count cases, pipelining up to depth of them at a time, and
+        return a FuzzResult for each.
+        """
+        results = []
+        batch = []
+        def flush():
+            responses = self.connection.send([('PUT', data) for _, _, _, data in batch])
+            results.extend(FuzzResult(name, r.status, expected, may_hang)
+                           for (name, expected, may_hang, _), r in zip(batch, responses))
+            batch.clear()
+
+        for name, combo, expected, key in self.cases(count, seed):
+            data = self.build(key, combo)
+            may_hang = any(m.may_hang for m in combo)
+            if any(m.isolated for m in combo):
+                flush()
+                batch.append((name, expected, may_hang, data))
+                flush()
+                # whatever the server made of it, don't reuse the connection
+                self.connection.close()
+            else:
+                batch.append((name, expected, may_hang, data))
+                if len(batch) >= depth:
+                    flush()
+        flush()
+        return results
+
+def tabulate(results):
+    """
+    Count the results by status, and list the cases whose status wasn't
+    one of those expected. A case that got no response at all, a None
+    status, is unexpected unless its framing may leave the server waiting
+    for more: otherwise the server dropped the connection without
+    answering, or crashed.
+    """
+    statuses = Counter(r.status for r in results)
+    unexpected = [r for r in results if (r.status is None and not r.may_hang) or
+                  (r.expected is not None and r.status not in r.expected)]
+    return statuses, unexpected
+
+def header_fuzzer(bucket_name, signature_version, timeout=5):
+    """ A HeaderFuzzer for PutObject requests to bucket_name by the main user. """
+    if signature_version == 2:
+        signer = SigV2Signer(get_main_aws_access_key(), get_main_aws_secret_key())
+    else:
+        signer = SigV4Signer(get_main_aws_access_key(), get_main_aws_secret_key(),
+                             get_client().meta.region_name)
+    connection = RawConnection(get_config_host(), get_config_port(), get_config_is_secure(),
+                               get_config_ssl_verify(), timeout=timeout)
+    host = '{}:{}'.format(get_config_host(), get_config_port())
+    return HeaderFuzzer(connection, signer, host, bucket_name, signature_version)
@@ -0,0 +1,453 @@
+import bz2
+import collections
+import hashlib
+import math
+import random
+import re
+import tempfile
+import time
+import zlib
+
+from botocore.client import Config
+
+from . import get_client
+from . import bench
+
+def csv_input_serialization(column_delim=",", row_delim="\n", quot_char='"', esc_char='\\', csv_header_info="NONE", compression="NONE"):
+    return {"CSV": {"RecordDelimiter" : row_delim, "FieldDelimiter" : column_delim, "QuoteEscapeCharacter": esc_char, "QuoteCharacter": quot_char, "FileHeaderInfo": csv_header_info}, "CompressionType": compression}
+
+class SelectStream(object):
+    """
+    Consume the event stream of a select_object_content() response.
+
+    Iterating yields the raw bytes of each Records event as it arrives,
+    while the Progress, Stats and End events are kept on the instance
+    together with the time to the first record. If digest names a
+    hashlib algorithm, the records are hashed as they go by, so drain()
+    can verify large results without buffering them.
+    """
+    def __init__(self, response, start=None, digest=None, record_delim=b'\n'):
+        self.payload = response['Payload']
+        self.start = time.perf_counter() if start is None else start
+        self.first_record = None
+        self.finish = None
+        self.hash = hashlib.new(digest) if digest else None
+        self.record_delim = record_delim
+        self.events = 0
+        self.records = 0
+        self.bytes_returned = 0
+        self.progress = None
+        self.stats = None
+        self.end = None
+
+    def __iter__(self):
+        for event in self.payload:
+            if 'Records' in event:
+                data = event['Records']['Payload']
+                if self.first_record is None:
+                    self.first_record = time.perf_counter()
+                self.events += 1
+                self.records += data.count(self.record_delim)
+                self.bytes_returned += len(data)
+                if self.hash is not None:
+                    self.hash.update(data)
+                yield data
+            elif 'Progress' in event:
+                # keep the furthest progress report
+                scanned = event['Progress']['Details']['BytesScanned']
+                if self.progress is None or scanned > self.progress['Details']['BytesScanned']:
+                    self.progress = event['Progress']
+            elif 'Stats' in event:
+                self.stats = event['Stats']
+            elif 'End' in event:
+                self.end = event['End']
+        self.finish = time.perf_counter()
+
+    def read(self):
+        """ Return all records as one bytes object. """
+        return b''.join(self)
+
+    def drain(self):
+        """ Consume all records without keeping them. """
+        for _ in self:
+            pass
+        return self
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+    @property
+    def time_to_first_record(self):
+        if self.first_record is None:
+            return None
+        return self.first_record - self.start
+
+    @property
+    def elapsed(self):
+        if self.finish is None:
+            return None
+        return self.finish - self.start
+
+    @property
+    def records_per_sec(self):
+        if not self.elapsed:
+            return 0.0
+        return self.records / self.elapsed
+
+    @property
+    def bytes_scanned(self):
+        if self.stats is None:
+            return None
+        return self.stats['Details']['BytesScanned']
+
+    def summary(self):
+        return {
+            'time_to_first_record': self.time_to_first_record,
+            'elapsed': self.elapsed,
+            'events': self.events,
+            'records': self.records,
+            'records_per_sec': self.records_per_sec,
+            'bytes_returned': self.bytes_returned,
+            'bytes_scanned': self.bytes_scanned,
+            }
+
+def select_object_stream(bucket, key, query, input_serialization, output_serialization=None, progress=False, client=None, scan_range=None, **kwargs):
+    """
+    Send a SELECT request and return a SelectStream over its response.
+    The clock starts before the request is sent, so time_to_first_record
+    includes the request round trip. Extra kwargs go to SelectStream.
+    """
+    if client is None:
+        client = get_client()
+    if output_serialization is None:
+        output_serialization = {"CSV": {}}
+    if scan_range is not None:
+        kwargs_range = {'ScanRange': scan_range}
+    else:
+        kwargs_range = {}
+
+    start = time.perf_counter()
+    r = client.select_object_content(
+        Bucket=bucket,
+        Key=key,
+        ExpressionType='SQL',
+        InputSerialization=input_serialization,
+        OutputSerialization=output_serialization,
+        Expression=query,
+        RequestProgress={"Enabled": progress},
+        **kwargs_range)
+    return SelectStream(r, start=start, **kwargs)
+
+class Dataset(object):
+    """
+    Generated object content of about size bytes: one block of random
+    integer rows, repeated. The block is kept, so the expected answer of a
+    query is computed from it instead of rescanning the object.
+
+    CSV and JSON objects can be GZIP or BZIP2 compressed, in which case
+    size is the uncompressed size. Parquet objects need pyarrow, and are
+    written with row_group_rows rows per row group, rounded down to whole
+    blocks when it is larger than one.
+    """
+    formats = ('csv', 'json', 'parquet')
+    compressions = ('NONE', 'GZIP', 'BZIP2')
+
+    def __init__(self, fmt, size, columns=10, block_rows=4096, seed=0,
+                 compression='NONE', row_group_rows=65536):
+        if fmt not in self.formats:
+            raise ValueError('unsupported format {!r}'.format(fmt))
+        if compression not in self.compressions:
+            raise ValueError('unsupported compression {!r}'.format(compression))
+        if fmt == 'parquet' and compression != 'NONE':
+            raise ValueError('parquet objects are compressed internally')
+        rng = random.Random(seed)
+        self.fmt = fmt
+        self.compression = compression
+        self.columns = columns
+        self.block_rows = block_rows
+        self.seed = seed
+        self.row_group_rows = row_group_rows
+        self.block = [[rng.randint(0, 1000) for _ in range(columns)]
+                      for _ in range(block_rows)]
+        if fmt == 'parquet':
+            # size in terms of the raw int64 column data
+            block_size = block_rows * columns * 8
+        else:
+            self.block_bytes = self._encode(self.block)
+            block_size = len(self.block_bytes)
+        self.repeat = max(1, math.ceil(size / block_size))
+
+    def _encode(self, rows):
+        if self.fmt == 'csv':
+            return ''.join(','.join(map(str, row)) + '\n' for row in rows).encode()
+        return ''.join('{' + ','.join('"c{}": {}'.format(i + 1, v) for i, v in enumerate(row)) + '},\n'
+                       for row in rows).encode()
+
+    @property
+    def rows(self):
+        return len(self.block) * self.repeat
+
+    def params(self):
+        """ Everything the generated content depends on, for DatasetCache. """
+        params = {'fmt': self.fmt, 'compression': self.compression,
+                  'columns': self.columns, 'block_rows': self.block_rows,
+                  'seed': self.seed, 'repeat': self.repeat}
+        if self.fmt == 'parquet':
+            params['row_group_rows'] = self.row_group_rows
+        return params
+
+    def _text_chunks(self):
+        if self.fmt == 'csv':
+            for _ in range(self.repeat):
+                yield self.block_bytes
+            return
+        yield b'{"root" : [\n'
+        for _ in range(self.repeat - 1):
+            yield self.block_bytes
+        # no separator after the last record
+        yield self.block_bytes[:-2] + b'\n]}'
+
+    def _parquet_chunks(self, chunk_size=8*1024*1024):
+        # optional, see the parquet extra in setup.py; callers skip without it
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({'c{}'.format(i + 1): pa.array([row[i] for row in self.block], pa.int64())
+                          for i in range(self.columns)})
+        blocks_per_group = max(1, self.row_group_rows // len(self.block))
+        with tempfile.TemporaryFile() as f:
+            writer = pq.ParquetWriter(f, table.schema)
+            written = 0
+            while written < self.repeat:
+                n = min(blocks_per_group, self.repeat - written)
+                writer.write_table(pa.concat_tables([table] * n), row_group_size=self.row_group_rows)
+                written += n
+            writer.close()
+
+            f.seek(0)
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                yield data
+
+    def chunks(self):
+        """ Yield the object content as it should be uploaded. """
+        if self.fmt == 'parquet':
+            yield from self._parquet_chunks()
+            return
+        if self.compression == 'NONE':
+            yield from self._text_chunks()
+            return
+
+        if self.compression == 'GZIP':
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            compressor = bz2.BZ2Compressor()
+        for chunk in self._text_chunks():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def column(self, i):
+        """ Name of the 1-based column i in a query. """
+        if self.fmt == 'csv':
+            return 'int(_{})'.format(i)
+        if self.fmt == 'json':
+            return '_1.c{}'.format(i)
+        return '_{}'.format(i)
+
+    @property
+    def source(self):
+        if self.fmt == 'json':
+            return 's3object[*].root'
+        return 's3object'
+
+    def input_serialization(self):
+        if self.fmt == 'csv':
+            return csv_input_serialization(compression=self.compression)
+        if self.fmt == 'json':
+            return {"JSON": {"Type": "DOCUMENT"}, "CompressionType": self.compression}
+        return {"Parquet": {}, "CompressionType": "NONE"}
+
+    def output_serialization(self):
+        if self.fmt == 'json':
+            return {"JSON": {"RecordDelimiter": "\n"}}
+        return {"CSV": {}}
+
+    def count(self, predicate):
+        return sum(1 for row in self.block if predicate(row)) * self.repeat
+
+    def values(self, i):
+        return [row[i - 1] for row in self.block]
+
+def scan_queries(dataset, limit=1000, threshold=10):
+    """
+    The query shapes measured by the scan benchmarks, as a list of
+    (name, query, expected). expected is either {'records': n} or
+    {'values': [...]} for single-record aggregates.
+    """
+    col = dataset.column
+    src = dataset.source
+    return [
+        ('full_scan', 'select * from {};'.format(src),
+            {'records': dataset.rows}),
+        ('selective_filter', 'select {}, {} from {} where {} < {};'.format(col(1), col(2), src, col(1), threshold),
+            {'records': dataset.count(lambda row: row[0] < threshold)}),
+        ('aggregation', 'select count(*), sum({}), min({}), max({}) from {};'.format(col(1), col(2), col(3), src),
+            {'values': [dataset.rows, sum(dataset.values(1)) * dataset.repeat,
+                        min(dataset.values(2)), max(dataset.values(3))]}),
+        ('limit', 'select * from {} limit {};'.format(src, limit),
+            {'records': min(limit, dataset.rows)}),
+        ('projection', 'select {}, {} from {};'.format(col(3), col(7), src),
+            {'records': dataset.rows}),
+        ]
+
+_number_re = re.compile(rb'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+
+def result_values(data):
+    """ Numbers in a single-record result, in either CSV or JSON output. """
+    return [float(v) for v in _number_re.findall(data)]
+
+def check_result(stream, data, expected):
+    if 'records' in expected:
+        assert stream.records == expected['records']
+    else:
+        values = result_values(data)
+        assert len(values) == len(expected['values'])
+        for value, want in zip(values, expected['values']):
+            assert abs(value - want) <= 1e-6 * max(1.0, abs(want))
+
+def upload_chunks(client, bucket, key, chunks, part_size=16*1024*1024):
+    """
+    Upload the concatenation of chunks, with a multipart upload once it
+    grows past part_size, without holding more than a part in memory.
+    Returns the object size.
+    """
+    buf = []
+    buffered = 0
+    size = 0
+    upload_id = None
+    parts = []
+
+    def flush():
+        data = b''.join(buf)
+        del buf[:]
+        part = len(parts) + 1
+        r = client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id,
+                               PartNumber=part, Body=data)
+        parts.append({'ETag': r['ETag'], 'PartNumber': part})
+
+    for chunk in chunks:
+        buf.append(chunk)
+        buffered += len(chunk)
+        size += len(chunk)
+        if buffered >= part_size:
+            if upload_id is None:
+                upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+            flush()
+            buffered = 0
+
+    if upload_id is None:
+        client.put_object(Bucket=bucket, Key=key, Body=b''.join(buf))
+        return size
+    if buf:
+        flush()
+    client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                     MultipartUpload={'Parts': parts})
+    return size
+
+SelectJob = collections.namedtuple('SelectJob',
+        ['name', 'bucket', 'key', 'query', 'input_serialization', 'output_serialization', 'expected'])
+
+def dataset_jobs(dataset, bucket, key, **kwargs):
+    """ One SelectJob per query shape of scan_queries() on an uploaded dataset. """
+    return [SelectJob(name, bucket, key, query,
+                      dataset.input_serialization(),
+                      dataset.output_serialization(),
+                      expected)
+            for name, query, expected in scan_queries(dataset, **kwargs)]
+
+def select_mix(jobs, count, weights=None, seed=0):
+    """ Draw count jobs from jobs, in proportion to weights if given. """
+    rng = random.Random(seed)
+    return rng.choices(jobs, weights=weights, k=count)
+
+def run_select_load(jobs, workers, client=None):
+    """
+    Run the SELECT jobs on workers concurrent threads sharing one client,
+    checking every answer. Returns a Latencies for the whole run, which
+    also has the aggregate throughput, and one per job name.
+    """
+    if client is None:
+        client = get_client(Config(signature_version='s3v4',
+                                   max_pool_connections=workers))
+    total = bench.Latencies('select')
+    by_name = {job.name: bench.Latencies(job.name) for job in jobs}
+
+    def run(job):
+        with by_name[job.name].time():
+            stream = select_object_stream(job.bucket, job.key, job.query,
+                    job.input_serialization, job.output_serialization,
+                    client=client)
+            if job.expected is not None and 'values' in job.expected:
+                data = stream.read()
+            else:
+                data = None
+                stream.drain()
+        if job.expected is not None:
+            check_result(stream, data, job.expected)
+        return stream.summary()
+
+    bench.run_concurrent(run, jobs, workers=workers, latencies=total)
+    return total, by_name
+
+def split_scan_range(size, parts):
+    """
+    Split an object of size bytes into at most parts contiguous
+    ScanRanges. End is inclusive, as in the S3 api.
+    """
+    step = max(1, math.ceil(size / parts))
+    return [{'Start': start, 'End': min(start + step, size) - 1}
+            for start in range(0, size, step)]
+
+def select_scan_ranges(bucket, key, query, ranges, input_serialization=None, output_serialization=None, workers=None, client=None, latencies=None):
+    """
+    Run query over each of the ScanRanges in parallel and return the
+    records of every range, in range order. A record belongs to the range
+    it starts in, so concatenating the results of a projection should
+    give the result of a full scan.
+    """
+    if input_serialization is None:
+        input_serialization = csv_input_serialization()
+    if workers is None:
+        workers = len(ranges)
+    if client is None:
+        client = get_client(Config(signature_version='s3v4',
+                                   max_pool_connections=workers))
+
+    def run(scan_range):
+        return select_object_stream(bucket, key, query, input_serialization,
+                output_serialization, client=client, scan_range=scan_range).read()
+
+    return bench.run_concurrent(run, ranges, workers=workers, latencies=latencies)
+
+_merge_aggregate = {'count': sum, 'sum': sum, 'min': min, 'max': max}
+
+def merge_aggregates(results, functions):
+    """
+    Combine the single-record CSV results of an aggregate query run over
+    several ranges. functions names the aggregate of each output column,
+    one of count, sum, min or max; avg cannot be merged, select sum and
+    count instead. Empty columns, from ranges without records, are skipped.
+    """
+    merged = []
+    for i, function in enumerate(functions):
+        values = []
+        for data in results:
+            fields = data.strip().split(b',')
+            if i < len(fields) and fields[i].strip():
+                values.append(float(fields[i]))
+        merged.append(_merge_aggregate[function](values) if values else None)
+    return merged
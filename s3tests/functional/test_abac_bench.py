@@ -0,0 +1,129 @@
+import json
+
+import boto3
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_config_endpoint,
+    get_config_ssl_verify,
+    get_iam_client,
+    get_iam_s3client,
+    get_new_bucket_name,
+    get_sts_client,
+    nuke_bucket,
+    )
+from . import bench
+from .bench import bench_config
+from .oidc import oidc_issuer, oidc_provider
+from .test_sts import create_role, put_role_policy
+
+def _tags(count):
+    """ count tags: Department=Engineering, which grants access, and fillers. """
+    tags = {'Department': 'Engineering'}
+    tags.update(('tag{}'.format(i), 'value{}'.format(i)) for i in range(count - 1))
+    return tags
+
+def make_role_policy(count, num_tags):
+    """
+    A role policy of count statements where only the last one matches: it
+    allows access when the resource's Department tag equals the session's.
+    The others compare the filler session and resource tags against values
+    they never have, so every request evaluates all of them.
+    """
+    statements = []
+    for i in range(count - 1):
+        key = 'tag{}'.format(i % max(num_tags - 1, 1))
+        statements.append({
+            'Effect': 'Allow',
+            'Action': 's3:*',
+            'Resource': 'arn:aws:s3:::*',
+            'Condition': {'StringEquals': {'aws:PrincipalTag/' + key: 'other{}'.format(i),
+                                           's3:ResourceTag/' + key: 'other{}'.format(i)}},
+            })
+    statements.append({
+        'Effect': 'Allow',
+        'Action': 's3:*',
+        'Resource': 'arn:aws:s3:::*',
+        'Condition': {'StringEquals': {'s3:ResourceTag/Department': ['${aws:PrincipalTag/Department}']}},
+        })
+    return json.dumps({'Version': '2012-10-17', 'Statement': statements})
+
+@pytest.mark.test_of_sts
+@pytest.mark.abac_test
+@pytest.mark.token_principal_tag_role_policy_test
+@pytest.mark.token_resource_tags_test
+@pytest.mark.fails_on_dbstore
+@pytest.mark.benchmark
+def test_abac_authorization_benchmark(bench_config, oidc_issuer, oidc_provider):
+    session_tag_counts = bench.option('abac session tags', [1, 10, 50])
+    resource_tag_counts = bench.option('abac resource tags', [1, 10, 50])
+    statement_counts = bench.option('abac statements', [1, 10, 50])
+    num_requests = bench.option('abac requests', 500)
+    workers = bench.get_workers()
+
+    iam_client = get_iam_client()
+    sts_client = get_sts_client()
+    trust_policy = json.dumps({
+        'Version': '2012-10-17',
+        'Statement': [{'Effect': 'Allow',
+                       'Principal': {'Federated': [oidc_provider]},
+                       'Action': ['sts:AssumeRoleWithWebIdentity', 'sts:TagSession'],
+                       'Condition': {'StringEquals': {
+                           oidc_issuer.condition_prefix + ':app_id': oidc_issuer.default_aud}}}],
+        })
+    (role_err, role_response, role_name) = create_role(iam_client, '/', None, trust_policy, None, None, None)
+    assert role_response, role_err
+    role_arn = role_response['Role']['Arn']
+
+    # the resources belong to the account of the role
+    owner = get_iam_s3client()
+    bucket_name = get_new_bucket_name()
+    owner.create_bucket(Bucket=bucket_name)
+    body = b'x' * 1024
+    try:
+        for statements in statement_counts:
+            (role_err, response) = put_role_policy(iam_client, role_name, 'Policy',
+                                                   make_role_policy(statements, max(resource_tag_counts)))
+            assert response, role_err
+            for resource_tags in resource_tag_counts:
+                tags = _tags(resource_tags)
+                tag_set = [{'Key': k, 'Value': v} for k, v in tags.items()]
+                owner.put_bucket_tagging(Bucket=bucket_name, Tagging={'TagSet': tag_set})
+                # objects take at most 10 tags
+                owner.put_object(Bucket=bucket_name, Key='obj', Body=body,
+                                 Tagging='&'.join('{}={}'.format(k, v) for k, v in list(tags.items())[:10]))
+                for session_tags in session_tag_counts:
+                    principal_tags = {k: [v] for k, v in _tags(session_tags).items()}
+                    assume = bench.Latencies('assume_role_with_web_identity')
+                    with assume.time():
+                        credentials = sts_client.assume_role_with_web_identity(
+                            RoleArn=role_arn, RoleSessionName='bench',
+                            WebIdentityToken=oidc_issuer.token(principal_tags=principal_tags))['Credentials']
+                    client = boto3.client('s3',
+                                          aws_access_key_id=credentials['AccessKeyId'],
+                                          aws_secret_access_key=credentials['SecretAccessKey'],
+                                          aws_session_token=credentials['SessionToken'],
+                                          endpoint_url=get_config_endpoint(),
+                                          verify=get_config_ssl_verify(),
+                                          region_name='',
+                                          config=Config(signature_version='s3v4',
+                                                        max_pool_connections=workers))
+                    gets = bench.Latencies('get')
+                    bench.run_concurrent(lambda i: client.get_object(Bucket=bucket_name, Key='obj')['Body'].read(),
+                                         range(num_requests), workers=workers, latencies=gets)
+                    heads = bench.Latencies('head_bucket')
+                    bench.run_concurrent(lambda i: client.head_bucket(Bucket=bucket_name),
+                                         range(num_requests), workers=workers, latencies=heads)
+                    bench.report('abac_authorization', statements=statements,
+                                 resource_tags=resource_tags, session_tags=session_tags,
+                                 assume=assume.summary(), get=gets.summary(),
+                                 head_bucket=heads.summary())
+    finally:
+        nuke_bucket(owner, bucket_name)
+        try:
+            iam_client.delete_role_policy(RoleName=role_name, PolicyName='Policy')
+        finally:
+            iam_client.delete_role(RoleName=role_name)
@@ -0,0 +1,30 @@
+from . import bench
+
+def test_parse_size():
+    assert bench.parse_size('512') == 512
+    assert bench.parse_size('64KB') == 64 * 1024
+    assert bench.parse_size('2G') == 2 * 1024 * 1024 * 1024
+    assert bench.parse_size('1.5MiB') == 3 * 512 * 1024
+
+def test_latencies_summary():
+    latency = bench.Latencies('op')
+    for i in range(1, 101):
+        latency.add(i / 1000.0)
+    summary = latency.summary()
+    assert summary['count'] == 100
+    assert summary['min'] == 0.001
+    assert summary['max'] == 0.1
+    assert latency.percentile(50) in (0.05, 0.051)
+    assert 'ops_per_sec' not in summary
+
+def test_run_concurrent():
+    latency = bench.Latencies('square')
+    results = bench.run_concurrent(lambda x: x * x, range(50), workers=4, latencies=latency)
+    assert results == [x * x for x in range(50)]
+    assert len(latency) == 50
+    assert latency.summary()['ops_per_sec'] > 0
+
+def test_timed_iter():
+    latency = bench.Latencies('pages')
+    assert list(bench.timed_iter(iter('abc'), latency)) == ['a', 'b', 'c']
+    assert len(latency) == 3
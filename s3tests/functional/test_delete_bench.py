@@ -0,0 +1,128 @@
+import concurrent.futures
+import time
+
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    get_new_bucket_name,
+    list_versions,
+    )
+from . import bench
+from .bench import bench_config
+from .populate import iter_keys, populate_bucket
+from .test_s3 import check_configure_versioning_retry
+
+# the most entries a DeleteObjects request may carry
+max_delete_batch = 1000
+
+def _delete_versions(client, bucket, batch_size=1000, workers=4, bypass_governance=True, latencies=None):
+    """
+    Delete every object version and delete marker in the bucket, in
+    DeleteObjects requests of up to batch_size entries, at most
+    max_delete_batch.
+    Up to workers requests are in flight while the listing continues.
+    Unlike nuke_bucket(), which the per-test cleanup relies on, nothing
+    guarantees the listing isn't disturbed by the deletes, so the
+    benchmark checks that the bucket ends up empty. Each request is timed
+    into latencies if given.
+
+    Returns the number of entries deleted and the per-entry errors.
+    """
+    if batch_size > max_delete_batch:
+        raise ValueError('batch_size {} is more than DeleteObjects takes ({})'.format(
+            batch_size, max_delete_batch))
+    kwargs = {}
+    if bypass_governance:
+        kwargs['BypassGovernanceRetention'] = True
+
+    def delete(objects):
+        start = time.perf_counter()
+        response = client.delete_objects(Bucket=bucket,
+                Delete={'Objects': objects, 'Quiet': True}, **kwargs)
+        if latencies is not None:
+            latencies.add(time.perf_counter() - start)
+        return len(objects), response.get('Errors', [])
+
+    deleted = 0
+    errors = []
+    def collect(futures):
+        nonlocal deleted
+        for f in futures:
+            count, errs = f.result()
+            deleted += count - len(errs)
+            errors.extend(errs)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for objects in list_versions(client, bucket, batch_size):
+            if len(pending) >= workers:
+                done, pending = concurrent.futures.wait(pending,
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(delete, objects))
+        collect(pending)
+
+    return deleted, errors
+
+def _create_bucket(client, state):
+    """
+    A new bucket in one of the states 'unversioned', 'versioned' or
+    'governance', the latter with a default GOVERNANCE retention so that
+    every object needs the bypass to be deleted.
+    """
+    bucket_name = get_new_bucket_name()
+    if state == 'governance':
+        client.create_bucket(Bucket=bucket_name, ObjectLockEnabledForBucket=True)
+        client.put_object_lock_configuration(
+            Bucket=bucket_name,
+            ObjectLockConfiguration={'ObjectLockEnabled': 'Enabled',
+                                     'Rule': {'DefaultRetention': {'Mode': 'GOVERNANCE',
+                                                                   'Days': 1}}})
+    else:
+        client.create_bucket(Bucket=bucket_name)
+        if state == 'versioned':
+            check_configure_versioning_retry(bucket_name, "Enabled", "Enabled")
+    return bucket_name
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('state', ['unversioned', 'versioned', 'governance'])
+def test_delete_objects_benchmark(bench_config, state):
+    num_keys = bench.option('delete keys', 10000)
+    batch_sizes = bench.option('delete batch sizes', [100, 250, 500, 1000])
+    in_flight = bench.option('delete in flight', [1, 4, 16])
+    versions = 1 if state == 'unversioned' else bench.option('delete versions per key', 2)
+    workers = bench.get_workers()
+    # check before populating any bucket, rather than after
+    if max(batch_sizes) > max_delete_batch:
+        raise ValueError('delete batch sizes must be at most {}'.format(max_delete_batch))
+
+    client = get_client(Config(signature_version='s3v4',
+                               max_pool_connections=max(in_flight + [workers])))
+    for batch_size in batch_sizes:
+        for inflight in in_flight:
+            bucket_name = _create_bucket(client, state)
+            puts = bench.Latencies('put')
+            for _ in range(versions):
+                populate_bucket(bucket_name, iter_keys(num_keys), client=client,
+                                workers=workers, body=b'', manifest=False, latencies=puts)
+
+            requests = bench.Latencies('delete_objects')
+            start = time.perf_counter()
+            deleted, errors = _delete_versions(client, bucket_name, batch_size, inflight,
+                                               latencies=requests)
+            elapsed = time.perf_counter() - start
+            assert errors == []
+            assert deleted == num_keys * versions
+            response = client.list_object_versions(Bucket=bucket_name)
+            assert 'Versions' not in response and 'DeleteMarkers' not in response
+
+            bench.report('delete_objects', state=state, keys=num_keys,
+                         versions_per_key=versions, batch_size=batch_size,
+                         in_flight=inflight, deleted=deleted, elapsed=elapsed,
+                         keys_per_sec=deleted / elapsed, put=puts.summary(),
+                         delete_objects=requests.summary())
+            client.delete_bucket(Bucket=bucket_name)
@@ -16,6 +16,7 @@ from . import (
     get_new_bucket,
     get_new_bucket_name,
     )
+from .rawhttp import header_fuzzer, tabulate
 
 def _add_header_create_object(headers, client=None):
     """ Create a new bucket, add an object w/header customizations
@@ -576,3 +577,21 @@ def test_bucket_create_bad_date_before_epoch_aws2():
     status, error_code = _get_status_and_error_code(e.response)
     assert status == 403
     assert error_code == 'AccessDenied'
+
+@pytest.mark.fails_on_aws
+@pytest.mark.parametrize('signature_version', [2, 4])
+def test_object_create_header_fuzz(signature_version):
+    bucket_name = get_new_bucket()
+    fuzzer = header_fuzzer(bucket_name, signature_version)
+    try:
+        results = fuzzer.run(1000, seed=signature_version)
+    finally:
+        fuzzer.connection.close()
+    # unexpected includes the cases that got no response at all, except
+    # those whose framing may leave the server waiting for the body
+    statuses, unexpected = tabulate(results)
+    assert not unexpected, unexpected
+    assert not [r for r in results if r.status is not None and r.status >= 500], statuses
+    # and the gateway still serves requests
+    client = get_client()
+    client.head_bucket(Bucket=bucket_name)
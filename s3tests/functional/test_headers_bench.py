@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_new_bucket,
+    )
+from . import bench
+from .bench import bench_config
+from .rawhttp import header_fuzzer, tabulate
+
+@pytest.mark.fails_on_aws
+@pytest.mark.benchmark
+@pytest.mark.parametrize('signature_version', [2, 4])
+def test_header_fuzz_benchmark(bench_config, signature_version):
+    """
+    Send header permutations of PutObject over one pipelined connection,
+    reporting the rate and the statuses they got. Every case must get a
+    response without a server error, and the status expected where one is
+    known.
+    """
+    num_cases = bench.option('header fuzz cases', 10000)
+    depths = bench.option('header fuzz depth', [1, 16])
+
+    bucket_name = get_new_bucket()
+    for depth in depths:
+        fuzzer = header_fuzzer(bucket_name, signature_version)
+        start = time.perf_counter()
+        try:
+            results = fuzzer.run(num_cases, seed=depth, depth=depth)
+        finally:
+            fuzzer.connection.close()
+        elapsed = time.perf_counter() - start
+        statuses, unexpected = tabulate(results)
+        bench.report('header_fuzz', signature_version=signature_version, depth=depth,
+                     cases=len(results), elapsed=elapsed, cases_per_sec=len(results) / elapsed,
+                     connections=fuzzer.connection.connects,
+                     statuses={str(k): v for k, v in sorted(statuses.items(), key=str)},
+                     unexpected=[(r.case, r.status) for r in unexpected])
+        assert not unexpected, unexpected
+        assert not [r for r in results if r.status is not None and r.status >= 500], statuses
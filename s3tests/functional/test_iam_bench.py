@@ -0,0 +1,140 @@
+import json
+import random
+import time
+
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_iam_root_client,
+    get_iam_path_prefix,
+    make_iam_name,
+    )
+from . import bench
+from .bench import bench_config
+from .iam import iam_root, nuke_created, nuke_group, nuke_role, nuke_user, track_creates
+from .test_iam import (
+    assume_role_policy,
+    group_list_names,
+    role_list_names,
+    user_list_key_ids,
+    user_list_names,
+    )
+
+managed_policy = 'arn:aws:iam::aws:policy/AmazonS3ReadOnlyAccess'
+
+inline_policy = json.dumps({
+    'Version': '2012-10-17',
+    'Statement': [{
+        'Effect': 'Allow',
+        'Action': 's3:GetObject',
+        'Resource': '*'
+        }]
+    })
+
+def _create_user(client, name):
+    client.create_user(UserName=name, Path=get_iam_path_prefix())
+    client.put_user_policy(UserName=name, PolicyName='Policy', PolicyDocument=inline_policy)
+    client.attach_user_policy(UserName=name, PolicyArn=managed_policy)
+    client.create_access_key(UserName=name)
+
+def _create_group(client, name, user_name):
+    client.create_group(GroupName=name, Path=get_iam_path_prefix())
+    client.put_group_policy(GroupName=name, PolicyName='Policy', PolicyDocument=inline_policy)
+    client.attach_group_policy(GroupName=name, PolicyArn=managed_policy)
+    client.add_user_to_group(GroupName=name, UserName=user_name)
+
+def _create_role(client, name):
+    client.create_role(RoleName=name, Path=get_iam_path_prefix(),
+                       AssumeRolePolicyDocument=assume_role_policy)
+    client.put_role_policy(RoleName=name, PolicyName='Policy', PolicyDocument=inline_policy)
+    client.attach_role_policy(RoleName=name, PolicyArn=managed_policy)
+
+def _time_listing(client, operation, page_size, **kwargs):
+    pages = bench.Latencies(operation)
+    paginator = client.get_paginator(operation)
+    for _ in bench.timed_iter(paginator.paginate(PaginationConfig={'PageSize': page_size},
+                                                 **kwargs), pages):
+        pass
+    return pages.summary()
+
+@pytest.mark.iam_account
+@pytest.mark.benchmark
+def test_iam_scale_benchmark(iam_root, bench_config):
+    levels = sorted(bench.option('iam principals', [100, 1000, 5000]))
+    page_size = bench.option('iam page size', 100)
+    samples = bench.option('iam samples', 100)
+    workers = bench.get_workers()
+
+    # a client of our own, sized for the workers; track what it creates so
+    # everything is removed even when the benchmark fails half way
+    client = get_iam_root_client(config=Config(max_pool_connections=workers))
+    created = track_creates(client)
+    path = get_iam_path_prefix()
+    rng = random.Random(0)
+    users, groups, roles = [], [], []
+    try:
+        for level in levels:
+            new = range(len(users), level)
+            new_users = [make_iam_name('BenchU{}'.format(i)) for i in new]
+            new_groups = [make_iam_name('BenchG{}'.format(i)) for i in new]
+            new_roles = [make_iam_name('BenchR{}'.format(i)) for i in new]
+
+            create_user = bench.Latencies('create_user')
+            bench.run_concurrent(lambda name: _create_user(client, name), new_users,
+                                 workers=workers, latencies=create_user)
+            users += new_users
+            create_group = bench.Latencies('create_group')
+            bench.run_concurrent(lambda names: _create_group(client, *names),
+                                 list(zip(new_groups, new_users)),
+                                 workers=workers, latencies=create_group)
+            groups += new_groups
+            create_role = bench.Latencies('create_role')
+            bench.run_concurrent(lambda name: _create_role(client, name), new_roles,
+                                 workers=workers, latencies=create_role)
+            roles += new_roles
+
+            start = time.perf_counter()
+            assert len(user_list_names(client, PathPrefix=path)) == level
+            assert len(group_list_names(client, PathPrefix=path)) == level
+            assert len(role_list_names(client, PathPrefix=path)) == level
+            list_all = time.perf_counter() - start
+
+            sample = [rng.choice(users) for _ in range(samples)]
+            get_user = bench.Latencies('get_user')
+            bench.run_concurrent(lambda name: client.get_user(UserName=name), sample,
+                                 workers=workers, latencies=get_user)
+            list_keys = bench.Latencies('list_access_keys')
+            key_counts = bench.run_concurrent(lambda name: len(user_list_key_ids(client, UserName=name)),
+                                              sample, workers=workers, latencies=list_keys)
+            assert set(key_counts) == {1}
+            list_policies = bench.Latencies('list_attached_user_policies')
+            bench.run_concurrent(lambda name: client.list_attached_user_policies(UserName=name),
+                                 sample, workers=workers, latencies=list_policies)
+
+            bench.report('iam_scale', principals=level, page_size=page_size, workers=workers,
+                         list_all=list_all,
+                         create_user=create_user.summary(), create_group=create_group.summary(),
+                         create_role=create_role.summary(),
+                         list_users=_time_listing(client, 'list_users', page_size, PathPrefix=path),
+                         list_groups=_time_listing(client, 'list_groups', page_size, PathPrefix=path),
+                         list_roles=_time_listing(client, 'list_roles', page_size, PathPrefix=path),
+                         get_user=get_user.summary(), list_access_keys=list_keys.summary(),
+                         list_attached_user_policies=list_policies.summary())
+
+        # groups first, so that delete_user isn't timing the group removals
+        deletes = {}
+        for name, func, names in [('delete_group', nuke_group, groups),
+                                  ('delete_user', nuke_user, users),
+                                  ('delete_role', nuke_role, roles)]:
+            deletes[name] = bench.Latencies(name)
+            bench.run_concurrent(lambda n: func(client, n), names,
+                                 workers=workers, latencies=deletes[name])
+        assert user_list_names(client, PathPrefix=path) == []
+        bench.report('iam_scale_delete', principals=len(users), workers=workers,
+                     **{name: d.summary() for name, d in deletes.items()})
+    finally:
+        # groups first here too, in case the body failed before its deletes
+        nuke_created(client, created, kinds=('groups', 'users', 'roles'))
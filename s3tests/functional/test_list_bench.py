@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    get_new_bucket,
+    )
+from . import bench
+from .bench import bench_config
+from .populate import iter_keys, populate_bucket
+
+def _traverse(client, method, latencies, page_size, **kwargs):
+    """
+    Page through a whole listing, timing each page. Returns the number of
+    entries, common prefixes and pages.
+    """
+    contents = 'Versions' if method == 'list_object_versions' else 'Contents'
+    paginator = client.get_paginator(method)
+    pages = paginator.paginate(PaginationConfig={'PageSize': page_size}, **kwargs)
+
+    entries = prefixes = count = 0
+    for page in bench.timed_iter(pages, latencies):
+        count += 1
+        entries += len(page.get(contents, []))
+        prefixes += len(page.get('CommonPrefixes', []))
+    return entries, prefixes, count
+
+def _variations(count, depth, fanout):
+    """
+    The listing parameters to measure, with the (entries, prefixes) each
+    should return for the keys of iter_keys(count, depth=depth, fanout=fanout).
+    """
+    variations = [('flat', {}, (count, 0))]
+    if depth == 0:
+        variations.append(('delimiter', {'Delimiter': '/'}, (count, 0)))
+        return variations
+
+    # key i sits under top directory (i // top) % fanout
+    top = fanout ** (depth - 1)
+    in_d0 = [i for i in range(count) if (i // top) % fanout == 0]
+    if depth > 1:
+        second = top // fanout
+        under_d0 = (0, len(set((i // second) % fanout for i in in_d0)))
+    else:
+        under_d0 = (len(in_d0), 0)
+    dir_width = len(str(fanout - 1))
+    d0 = 'd{:0{w}d}/'.format(0, w=dir_width)
+
+    variations += [
+        ('delimiter', {'Delimiter': '/'}, (0, len(set((i // top) % fanout for i in range(count))))),
+        ('prefix', {'Prefix': d0}, (len(in_d0), 0)),
+        ('prefix_delimiter', {'Prefix': d0, 'Delimiter': '/'}, under_d0),
+        ]
+    return variations
+
+def _write_until(stop, bucket_name, prefix, latencies, errors):
+    """
+    Put keys under prefix until stop is set. An exception stops the
+    writer and is appended to errors, for the caller to re-raise.
+    """
+    try:
+        client = get_client()
+        i = 0
+        while not stop.is_set():
+            with latencies.time():
+                client.put_object(Bucket=bucket_name, Key='{}{:08d}'.format(prefix, i), Body=b'')
+            i += 1
+    except Exception as e:
+        errors.append(e)
+
+@pytest.mark.benchmark
+def test_bucket_list_benchmark(bench_config):
+    counts = bench.option('list keys', [10000])
+    depth = bench.option('list depth', 2)
+    fanout = bench.option('list fanout', 10)
+    page_sizes = bench.option('list max keys', [100, 1000])
+    writers = bench.option('list writers', 4)
+    methods = ['list_objects', 'list_objects_v2', 'list_object_versions']
+
+    client = get_client()
+    for count in counts:
+        bucket_name = get_new_bucket(client)
+        puts = bench.Latencies('put')
+        populate_bucket(bucket_name, iter_keys(count, depth=depth, fanout=fanout),
+                        body=b'', manifest=False, latencies=puts)
+        bench.report('bucket_list_populate', keys=count, depth=depth, fanout=fanout,
+                     put=puts.summary())
+
+        variations = _variations(count, depth, fanout)
+        for method in methods:
+            for page_size in page_sizes:
+                for name, params, expected in variations:
+                    pages = bench.Latencies('page')
+                    start = time.perf_counter()
+                    entries, prefixes, num_pages = _traverse(client, method, pages, page_size,
+                                                             Bucket=bucket_name, **params)
+                    elapsed = time.perf_counter() - start
+                    assert (entries, prefixes) == expected
+
+                    bench.report('bucket_list', method=method, keys=count, depth=depth,
+                                 fanout=fanout, max_keys=page_size, variation=name,
+                                 pages=num_pages, entries=entries, prefixes=prefixes,
+                                 elapsed=elapsed, entries_per_sec=(entries + prefixes) / elapsed,
+                                 page=pages.summary())
+
+        if not writers:
+            continue
+
+        # list again while other clients keep adding keys under their own prefix
+        stop = threading.Event()
+        writes = bench.Latencies('put')
+        errors = []
+        threads = [threading.Thread(target=_write_until,
+                                    args=(stop, bucket_name, 'writes/{}/'.format(n), writes, errors))
+                   for n in range(writers)]
+        for t in threads:
+            t.start()
+        try:
+            for method in methods:
+                pages = bench.Latencies('page')
+                start = time.perf_counter()
+                entries, prefixes, num_pages = _traverse(client, method, pages, max(page_sizes),
+                                                         Bucket=bucket_name)
+                elapsed = time.perf_counter() - start
+                assert entries >= count
+                # don't report listings that ran without their writers
+                if errors:
+                    break
+
+                bench.report('bucket_list_concurrent_writes', method=method, keys=count,
+                             writers=writers, max_keys=max(page_sizes), pages=num_pages,
+                             entries=entries, elapsed=elapsed,
+                             entries_per_sec=entries / elapsed, page=pages.summary(),
+                             put=writes.summary())
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
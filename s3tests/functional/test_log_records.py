@@ -0,0 +1,91 @@
+import shlex
+
+import pytest
+
+from .test_s3 import (
+    _LogRecords,
+    _split_log_record,
+    _verify_record_field,
+    _verify_records,
+    )
+
+def _standard(bucket, op, key, uri=None, auth='AuthHeader'):
+    if uri is None:
+        uri = 'PUT /{}/{} HTTP/1.1'.format(bucket, key)
+    return ('owner {} [19/Oct/2026:09:00:00 +0000] 127.0.0.1 user req-1 {} {} "{}" 200 - 0 3 10 10 '
+            '- "Boto3/1.0 Python/3.11" - host-1 SigV4 - {} localhost TLSv1.2 - -').format(
+                bucket, op, key, uri, auth)
+
+def _journal(bucket, op, key):
+    return 'owner {} [19/Oct/2026:09:00:00 +0000] {} {} 3 - "etag"'.format(bucket, op, key)
+
+def _shlex(record):
+    # how records were split before the regex
+    return shlex.split(record.replace('[', '"').replace(']', '"'))
+
+@pytest.mark.parametrize('record', [
+    _standard('bucket', 'REST.PUT.OBJECT', 'key'),
+    _standard('bucket', 'REST.PUT.OBJECT', 'dir/some-key.txt'),
+    _standard('bucket', 'REST.GET.BUCKET', '-', uri=''),
+    _standard('bucket', 'REST.PUT.OBJECT', 'a[1]', uri='PUT /bucket/a[1] HTTP/1.1'),
+    _standard('bucket', 'REST.PUT.OBJECT', '[a]'),
+    _standard('bucket', 'REST.PUT.OBJECT', 'a"b"c'),
+    _standard('bucket', 'REST.PUT.OBJECT', 'a\\ b'),
+    _journal('bucket', 'REST.PUT.OBJECT', 'key'),
+    _journal('bucket', 'REST.PUT.OBJECT', 'x[y]'),
+    ])
+def test_split_log_record_matches_shlex(record):
+    expected = _shlex(record)
+    assert _split_log_record(record, len(expected)) == expected
+
+@pytest.mark.parametrize('key', ["it's", 'x]y', 'a"b'])
+def test_split_log_record_unbalanced(key):
+    # shlex can't split these either
+    record = _journal('bucket', 'REST.PUT.OBJECT', key)
+    with pytest.raises(ValueError):
+        _shlex(record)
+    with pytest.raises(ValueError):
+        _split_log_record(record, 8)
+
+def test_split_log_record_fields():
+    chunks = _split_log_record(_standard('bucket', 'REST.PUT.OBJECT', 'key'), 26)
+    assert chunks[2] == '19/Oct/2026:09:00:00 +0000'
+    assert chunks[8] == 'PUT /bucket/key HTTP/1.1'
+    assert chunks[16] == 'Boto3/1.0 Python/3.11'
+    # quoted and bracketed keys keep the shlex parsing
+    chunks = _split_log_record(_standard('bucket', 'REST.PUT.OBJECT', '"a b"'), 26)
+    assert chunks[7] == 'a b'
+    chunks = _split_log_record(_standard('bucket', 'REST.PUT.OBJECT', '[a b]'), 26)
+    assert chunks[7] == 'a b'
+
+def test_log_records_index():
+    records = _LogRecords('Standard', [
+        _standard('src1', 'REST.PUT.OBJECT', 'key1'),
+        _standard('src1', 'REST.PUT.OBJECT', 'key2'),
+        _standard('src1', 'REST.PUT.OBJECT', 'key1'),
+        _standard('src2', 'REST.PUT.OBJECT', 'key3'),
+        _standard('src1', 'REST.DELETE.OBJECT', 'key1'),
+        _standard('src1', 'REST.GET.OBJECT', 'key1', auth='QueryString'),
+        ])
+    assert len(records.get('src1', 'REST.PUT.OBJECT', 'key1')) == 2
+    assert records.get('src1', 'REST.PUT.OBJECT', 'key3') == []
+    assert sorted(k for k, _ in records.keys(None, 'REST.PUT.OBJECT')) == ['key1', 'key2', 'key3']
+    # operations and bucket names match on substrings, as they did on records
+    assert sorted(k for k, _ in records.keys('src', 'REST.PUT')) == ['key1', 'key2', 'key3']
+    assert sorted(k for k, _ in records.keys('src1', 'OBJECT')) == ['key1', 'key1', 'key1', 'key2']
+
+    keys = ['key1', 'key2']
+    assert _verify_records(records, 'src1', 'REST.PUT.OBJECT', keys, 'Standard', 3)
+    assert _verify_records(records, 'src1', 'REST.PUT.OBJECT', keys, 'Standard', 3, exact_match=True)
+    assert not _verify_records(records, None, 'REST.PUT.OBJECT', keys, 'Standard', 3, exact_match=True)
+    assert _verify_records(records, None, 'REST.PUT.OBJECT', keys + ['key3'], 'Standard', 4, exact_match=True)
+    assert _verify_record_field(records, 'src1', 'REST.GET.OBJECT', 'key1', 'Standard', 'AuthType', 'QueryString')
+    assert not _verify_record_field(records, 'src1', 'REST.PUT.OBJECT', 'key1', 'Standard', 'AuthType', 'QueryString')
+
+def test_verify_records_body():
+    body = '\n'.join([_journal('src', 'REST.PUT.OBJECT', 'key1'), _journal('src', 'REST.PUT.OBJECT', 'key2'), ''])
+    assert _verify_records(body, 'src', 'REST.PUT.OBJECT', ['key1', 'key2'], 'Journal', 2)
+    # a source key found elsewhere than the key field still counts
+    body = _journal('src', 'REST.PUT.OBJECT', 'prefix-key1')
+    assert _verify_records(body, 'src', 'REST.PUT.OBJECT', ['key1'], 'Journal', 1)
+    assert _verify_record_field(body, 'src', 'REST.PUT.OBJECT', 'key1', 'Journal', 'Key', 'prefix-key1')
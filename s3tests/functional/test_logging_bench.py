@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    get_new_bucket,
+    )
+from . import bench
+from .bench import bench_config
+from .test_s3 import (
+    _LogRecords,
+    _get_keys,
+    _has_bucket_logging_extension,
+    _multipart_upload,
+    _set_log_bucket_policy,
+    expected_object_roll_time,
+    )
+
+def _enable_logging(client, src_bucket_name, log_bucket_name, logging_type, has_extensions):
+    prefix = 'log/'
+    _set_log_bucket_policy(client, log_bucket_name, [src_bucket_name], [prefix])
+    logging_enabled = {'TargetBucket': log_bucket_name, 'TargetPrefix': prefix}
+    if has_extensions:
+        logging_enabled['ObjectRollTime'] = expected_object_roll_time
+        logging_enabled['LoggingType'] = logging_type
+    client.put_bucket_logging(Bucket=src_bucket_name, BucketLoggingStatus={
+        'LoggingEnabled': logging_enabled,
+    })
+
+def _run_workload(client, bucket_name, keys, body, uploads, upload_size, workers):
+    """
+    PUT, GET and DELETE every key concurrently, then complete a number of
+    multipart uploads. Returns the Latencies of each operation.
+    """
+    puts = bench.Latencies('put')
+    bench.run_concurrent(lambda key: client.put_object(Bucket=bucket_name, Key=key, Body=body),
+                         keys, workers=workers, latencies=puts)
+    gets = bench.Latencies('get')
+    bench.run_concurrent(lambda key: client.get_object(Bucket=bucket_name, Key=key)['Body'].read(),
+                         keys, workers=workers, latencies=gets)
+    deletes = bench.Latencies('delete')
+    bench.run_concurrent(lambda key: client.delete_object(Bucket=bucket_name, Key=key),
+                         keys, workers=workers, latencies=deletes)
+
+    def upload(key):
+        upload_id, _, parts = _multipart_upload(bucket_name, key, upload_size, client=client)
+        client.complete_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id,
+                                         MultipartUpload={'Parts': parts})
+    mpus = bench.Latencies('multipart_upload')
+    bench.run_concurrent(upload, ['upload{}'.format(i) for i in range(uploads)],
+                         workers=workers, latencies=mpus)
+    return [puts, gets, deletes, mpus]
+
+@pytest.mark.bucket_logging
+@pytest.mark.benchmark
+def test_bucket_logging_overhead_benchmark(bench_config):
+    num_keys = bench.option('logging keys', 1000)
+    size = bench.option('logging object size', 4096)
+    uploads = bench.option('logging uploads', 8)
+    upload_size = bench.option('logging upload size', 10 * 1024 * 1024)
+    workers = bench.get_workers()
+
+    has_extensions = _has_bucket_logging_extension()
+    modes = ['disabled', 'Standard']
+    if has_extensions:
+        modes.append('Journal')
+
+    client = get_client(Config(signature_version='s3v4', max_pool_connections=workers))
+    keys = ['myobject{}'.format(i) for i in range(num_keys)]
+    body = os.urandom(size)
+
+    baseline = None
+    for mode in modes:
+        src_bucket_name = get_new_bucket(client)
+        if mode != 'disabled':
+            log_bucket_name = get_new_bucket(client)
+            _enable_logging(client, src_bucket_name, log_bucket_name, mode, has_extensions)
+
+        ops = _run_workload(client, src_bucket_name, keys, body, uploads, upload_size, workers)
+        summaries = {op.name: op.summary() for op in ops}
+        if baseline is None:
+            baseline = summaries
+        overhead = {name: {'mean': s['mean'] / baseline[name]['mean'],
+                           'p99': s['p99'] / baseline[name]['p99']}
+                    for name, s in summaries.items() if s['count']}
+
+        fields = {}
+        if mode != 'disabled' and has_extensions:
+            # time the roll of the pending log object, then count what it holds
+            start = time.perf_counter()
+            result = client.post_bucket_logging(Bucket=src_bucket_name)
+            fields['flush'] = time.perf_counter() - start
+            assert result['ResponseMetadata']['HTTPStatusCode'] == 200
+
+            records = _LogRecords(mode)
+            for log_key in _get_keys(client.list_objects_v2(Bucket=log_bucket_name)):
+                records.fetch(client, log_bucket_name, log_key)
+            fields['records'] = {op: sum(len(r) for r in buckets.values())
+                                 for op, buckets in records.index.items()}
+
+        bench.report('bucket_logging_overhead', mode=mode, keys=num_keys, object_size=size,
+                     uploads=uploads, upload_size=upload_size, workers=workers,
+                     overhead=overhead, **summaries, **fields)
@@ -0,0 +1,34 @@
+import http.client
+import json
+import time
+
+from .notification import NotificationReceiver
+
+def _records(*keys):
+    return json.dumps({'Records': [{'eventName': 'ObjectCreated:Put',
+                                    's3': {'object': {'key': key}}} for key in keys]})
+
+def test_receiver_keeps_records():
+    with NotificationReceiver() as receiver:
+        # two posts on one kept-alive connection
+        conn = http.client.HTTPConnection('localhost', receiver.port)
+        for body in [_records('a', 'b'), _records('c')]:
+            conn.request('POST', '/', body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200
+        conn.close()
+
+        events = receiver.wait(3, timeout=5)
+        assert [e.record['s3']['object']['key'] for e in events] == ['a', 'b', 'c']
+        assert receiver.posts == 2
+        assert events[0].received <= events[2].received <= time.perf_counter()
+
+        receiver.clear()
+        assert receiver.events == []
+
+def test_receiver_wait_times_out():
+    with NotificationReceiver() as receiver:
+        start = time.monotonic()
+        assert receiver.wait(1, timeout=5, idle=0.2) == []
+        assert time.monotonic() - start < 2
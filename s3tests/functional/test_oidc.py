@@ -0,0 +1,65 @@
+import base64
+import hashlib
+import json
+import urllib.request
+
+import pytest
+
+from .oidc import OIDCIssuer, decode_jwt, encode_jwt, generate_key, self_signed_certificate
+
+pytest.importorskip('cryptography')
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+
+@pytest.fixture(scope="module")
+def key():
+    return generate_key()
+
+def _b64url_decode(part):
+    return base64.urlsafe_b64decode(part + '=' * (-len(part) % 4))
+
+def test_jwt_roundtrip(key):
+    token = encode_jwt(key, 'kid1', {'sub': 'user', 'aud': 'app'})
+    header, claims = decode_jwt(token)
+    assert header == {'alg': 'RS256', 'typ': 'JWT', 'kid': 'kid1'}
+    assert claims == {'sub': 'user', 'aud': 'app'}
+    signing_input, signature = token.rsplit('.', 1)
+    # raises if the signature doesn't match
+    key.public_key().verify(_b64url_decode(signature), signing_input.encode(),
+                            padding.PKCS1v15(), hashes.SHA256())
+
+def test_certificate_signature(key):
+    cert = x509.load_der_x509_certificate(self_signed_certificate(key, 'localhost'))
+    assert cert.subject == cert.issuer
+    assert cert.public_key().public_numbers() == key.public_key().public_numbers()
+    key.public_key().verify(cert.signature, cert.tbs_certificate_bytes,
+                            padding.PKCS1v15(), cert.signature_hash_algorithm)
+
+def test_issuer_documents(key):
+    with OIDCIssuer('localhost', key=key) as issuer:
+        def get(url):
+            with urllib.request.urlopen(url) as response:
+                return json.loads(response.read())
+        discovery = get(issuer.url + '/.well-known/openid-configuration')
+        assert discovery['issuer'] == issuer.url
+        jwks = get(discovery['jwks_uri'])
+        assert issuer.requests == {'discovery': 1, 'jwks': 1}
+
+    jwk = jwks['keys'][0]
+    assert jwk['kid'] == issuer.kid
+    assert int.from_bytes(_b64url_decode(jwk['n']), 'big') == key.public_key().public_numbers().n
+    cert = base64.b64decode(jwk['x5c'][0])
+    assert hashlib.sha1(cert).hexdigest().upper() == issuer.thumbprint
+
+    token = issuer.token(sub='alice', principal_tags={'Department': ['Engineering']},
+                         transitive_tag_keys=['Department'], custom='value')
+    header, claims = decode_jwt(token)
+    assert header['kid'] == issuer.kid
+    assert claims['iss'] == issuer.url
+    assert claims['sub'] == 'alice'
+    assert claims['aud'] == claims['azp'] == issuer.default_aud
+    assert claims['exp'] > claims['iat']
+    assert claims['custom'] == 'value'
+    assert claims['https://aws.amazon.com/tags'] == [{'principal_tags': {'Department': ['Engineering']},
+                                                      'transitive_tag_keys': ['Department']}]
@@ -0,0 +1,140 @@
+import json
+import time
+
+from .policy import Policy, PolicyEvaluator, Request, Statement, make_json_policy
+
+bucket_arn = 'arn:aws:s3:::bucket'
+alice = 'arn:aws:iam:::user/alice'
+bob = 'arn:aws:iam:::user/bob'
+
+def test_evaluate_allow_and_implicit_deny():
+    evaluator = PolicyEvaluator(make_json_policy('s3:GetObject', bucket_arn + '/*'))
+    assert evaluator.evaluate(Request('s3:GetObject', bucket_arn + '/key')) == 'Allow'
+    assert evaluator.evaluate(Request('s3:PutObject', bucket_arn + '/key')) is None
+    assert evaluator.evaluate(Request('s3:GetObject', 'arn:aws:s3:::other/key')) is None
+
+def test_evaluate_explicit_deny_wins():
+    policy = Policy()
+    policy.add_statement(Statement('s3:*', bucket_arn + '/*'))
+    policy.add_statement(Statement('s3:Delete*', bucket_arn + '/private/*', effect='Deny'))
+    evaluator = PolicyEvaluator(policy)
+    assert evaluator.evaluate('s3:DeleteObject', bucket_arn + '/public/key') == 'Allow'
+    assert evaluator.evaluate('s3:DeleteObject', bucket_arn + '/private/key') == 'Deny'
+    # the deny applies whichever policy it comes from
+    allow = make_json_policy('s3:*', '*')
+    deny = make_json_policy('s3:GetObject', '*', effect='Deny')
+    assert PolicyEvaluator(allow, deny).evaluate('s3:GetObject', bucket_arn + '/key') == 'Deny'
+
+def test_evaluate_wildcards():
+    evaluator = PolicyEvaluator(make_json_policy(['s3:get*', 's3:ListBucket'],
+                                                 [bucket_arn + '/a?c/*', bucket_arn]))
+    # actions ignore case, resources don't
+    assert evaluator.is_allowed('s3:GetObjectTagging', bucket_arn + '/abc/key')
+    assert evaluator.is_allowed('S3:LISTBUCKET', bucket_arn)
+    assert not evaluator.is_allowed('s3:GetObject', bucket_arn + '/ABC/key')
+    assert not evaluator.is_allowed('s3:GetObject', bucket_arn + '/abbc/key')
+    # regular expression characters are literal
+    evaluator = PolicyEvaluator(make_json_policy('s3:GetObject', bucket_arn + '/a.c+'))
+    assert evaluator.is_allowed('s3:GetObject', bucket_arn + '/a.c+')
+    assert not evaluator.is_allowed('s3:GetObject', bucket_arn + '/abcc')
+
+def test_evaluate_not_action_and_not_resource():
+    document = {'Version': '2012-10-17', 'Statement': [
+        {'Effect': 'Allow', 'NotAction': 's3:Delete*', 'NotResource': bucket_arn + '/secret'},
+        ]}
+    evaluator = PolicyEvaluator(document)
+    assert evaluator.is_allowed('s3:GetObject', bucket_arn + '/key')
+    assert not evaluator.is_allowed('s3:DeleteObject', bucket_arn + '/key')
+    assert not evaluator.is_allowed('s3:GetObject', bucket_arn + '/secret')
+
+def test_evaluate_principals():
+    evaluator = PolicyEvaluator(make_json_policy('s3:GetObject', '*', principal={'AWS': [alice]}))
+    assert evaluator.is_allowed('s3:GetObject', 'key', alice)
+    assert not evaluator.is_allowed('s3:GetObject', 'key', bob)
+    assert not evaluator.is_allowed('s3:GetObject', 'key')
+    assert PolicyEvaluator(make_json_policy('s3:GetObject', '*', principal='*')).is_allowed(
+        's3:GetObject', 'key')
+    # identity policies apply to anyone
+    assert PolicyEvaluator(make_json_policy('s3:GetObject', '*', principal=None)).is_allowed(
+        's3:GetObject', 'key', bob)
+    document = json.dumps({'Version': '2012-10-17', 'Statement': [
+        {'Effect': 'Deny', 'NotPrincipal': {'AWS': alice}, 'Action': 's3:*', 'Resource': '*'},
+        ]})
+    evaluator = PolicyEvaluator(document)
+    assert evaluator.evaluate('s3:GetObject', 'key', alice) is None
+    assert evaluator.evaluate('s3:GetObject', 'key', bob) == 'Deny'
+
+def _condition(condition, context):
+    evaluator = PolicyEvaluator(make_json_policy('s3:GetObject', '*', conditions=condition))
+    return evaluator.is_allowed('s3:GetObject', 'key', context=context)
+
+def test_condition_strings():
+    assert _condition({'StringEquals': {'s3:prefix': ['a', 'b']}}, {'s3:prefix': 'b'})
+    assert not _condition({'StringEquals': {'s3:prefix': 'a'}}, {'s3:prefix': 'A'})
+    assert _condition({'StringEqualsIgnoreCase': {'s3:prefix': 'a'}}, {'s3:prefix': 'A'})
+    assert _condition({'StringLike': {'s3:prefix': 'home/*'}}, {'s3:prefix': 'home/x/y'})
+    assert not _condition({'StringNotLike': {'s3:prefix': 'home/*'}}, {'s3:prefix': 'home/x'})
+    assert _condition({'StringNotEquals': {'s3:prefix': 'a'}}, {'s3:prefix': 'b'})
+
+def test_condition_numbers_dates_and_bools():
+    assert _condition({'NumericLessThan': {'s3:max-keys': '10'}}, {'s3:max-keys': '9'})
+    assert not _condition({'NumericLessThan': {'s3:max-keys': '10'}}, {'s3:max-keys': '10'})
+    assert _condition({'NumericGreaterThanEquals': {'s3:max-keys': 10}}, {'s3:max-keys': '10'})
+    assert not _condition({'NumericEquals': {'s3:max-keys': '10'}}, {'s3:max-keys': 'ten'})
+    assert _condition({'DateLessThan': {'aws:CurrentTime': '2030-01-01T00:00:00Z'}},
+                      {'aws:CurrentTime': '2025-06-01T12:00:00Z'})
+    assert _condition({'DateGreaterThan': {'aws:CurrentTime': '2020-01-01T00:00:00Z'}},
+                      {'aws:CurrentTime': '1700000000'})
+    assert _condition({'Bool': {'aws:SecureTransport': 'true'}}, {'aws:SecureTransport': 'True'})
+    assert _condition({'Bool': {'aws:SecureTransport': False}}, {'aws:SecureTransport': 'false'})
+
+def test_condition_ip_and_arn():
+    condition = {'IpAddress': {'aws:SourceIp': ['10.0.0.0/8', '2001:db8::/32']}}
+    assert _condition(condition, {'aws:SourceIp': '10.1.2.3'})
+    assert _condition(condition, {'aws:SourceIp': '2001:db8::1'})
+    assert not _condition(condition, {'aws:SourceIp': '192.0.2.1'})
+    assert _condition({'NotIpAddress': {'aws:SourceIp': '192.0.2.0/24'}}, {'aws:SourceIp': '10.1.2.3'})
+    assert _condition({'ArnLike': {'aws:SourceArn': 'arn:aws:sns:*:*:topic'}},
+                      {'aws:SourceArn': 'arn:aws:sns:zg:tenant:topic'})
+
+def test_condition_missing_keys():
+    # positive operators need the key, negated ones are satisfied without it
+    assert not _condition({'StringEquals': {'s3:prefix': 'a'}}, {})
+    assert _condition({'StringNotEquals': {'s3:prefix': 'a'}}, {})
+    assert _condition({'NotIpAddress': {'aws:SourceIp': '192.0.2.0/24'}}, {})
+    assert _condition({'StringEqualsIfExists': {'s3:prefix': 'a'}}, {})
+    assert not _condition({'StringEqualsIfExists': {'s3:prefix': 'a'}}, {'s3:prefix': 'b'})
+    assert _condition({'Null': {'s3:prefix': 'true'}}, {})
+    assert not _condition({'Null': {'s3:prefix': 'false'}}, {})
+    assert _condition({'Null': {'s3:prefix': 'false'}}, {'s3:prefix': ''})
+
+def test_condition_set_qualifiers():
+    keys = {'aws:TagKeys': ['team', 'env']}
+    assert _condition({'ForAnyValue:StringEquals': {'aws:TagKeys': 'env'}}, keys)
+    assert not _condition({'ForAllValues:StringEquals': {'aws:TagKeys': 'env'}}, keys)
+    assert _condition({'ForAllValues:StringEquals': {'aws:TagKeys': ['env', 'team', 'x']}}, keys)
+    assert _condition({'ForAllValues:StringEquals': {'aws:TagKeys': 'env'}}, {})
+    assert not _condition({'ForAnyValue:StringEquals': {'aws:TagKeys': 'env'}}, {})
+
+def test_condition_all_keys_must_match():
+    condition = {'StringEquals': {'s3:prefix': 'a', 's3:delimiter': '/'}}
+    assert _condition(condition, {'s3:prefix': 'a', 's3:delimiter': '/'})
+    assert not _condition(condition, {'s3:prefix': 'a'})
+
+def test_evaluate_many_requests():
+    policy = Policy()
+    for i in range(100):
+        policy.add_statement(Statement(['s3:GetObject', 's3:PutObject'],
+                                       '{}/dir{}/*'.format(bucket_arn, i),
+                                       condition={'StringLike': {'aws:UserAgent': 'agent{}*'.format(i)}}))
+    policy.add_statement(Statement('s3:ListBucket', bucket_arn))
+    evaluator = PolicyEvaluator(policy)
+    requests = [Request('s3:GetObject', '{}/dir{}/key'.format(bucket_arn, i % 100),
+                        context={'aws:UserAgent': 'agent{}'.format(i % 7)})
+                for i in range(1000)]
+    start = time.perf_counter()
+    allowed = sum(evaluator.is_allowed(r) for r in requests for _ in range(10))
+    assert time.perf_counter() - start < 10
+    assert allowed == 10 * sum(1 for i in range(1000) if i % 100 == i % 7)
+    # the statements for ListBucket were never looked at for GetObject
+    assert len(evaluator._candidates('s3:ListBucket')) == 1
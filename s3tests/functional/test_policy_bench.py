@@ -0,0 +1,137 @@
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_alt_client,
+    get_alt_user_id,
+    get_client,
+    get_iam_client,
+    get_main_user_id,
+    get_new_bucket,
+    )
+from . import bench
+from .bench import bench_config
+from .policy import Policy, Statement
+
+# the operations of the benchmark requests
+actions = ['s3:GetObject', 's3:PutObject']
+
+def _filler_condition(i):
+    """ A condition that fails for the benchmark requests, cycling through operator kinds. """
+    kind = i % 4
+    if kind == 0:
+        return {'IpAddress': {'aws:SourceIp': '192.0.2.{}/32'.format(i % 256)}}
+    if kind == 1:
+        return {'StringLike': {'s3:prefix': 'filler{}/*'.format(i)}}
+    if kind == 2:
+        return {'StringEquals': {'s3:ExistingObjectTag/filler': 'v{}'.format(i)}}
+    return {'StringLike': {'aws:UserAgent': 'filler{}*'.format(i)}}
+
+def make_policy(bucket_name, count, complexity, principal):
+    """
+    A policy of count statements where only the last one allows the
+    benchmark requests, so evaluation has to go through all of them.
+
+    With complexity 'plain' the filler statements name other objects,
+    with 'wildcard' they use wildcard resources that have to be matched
+    against the key, and with 'conditions' they match the objects but
+    carry conditions (IP, prefix, object tag and string operators) that
+    fail.
+    """
+    policy = Policy()
+    arn = 'arn:aws:s3:::{}'.format(bucket_name)
+    for i in range(count - 1):
+        condition = None
+        if complexity == 'plain':
+            resource = '{}/filler{}/obj'.format(arn, i)
+        elif complexity == 'wildcard':
+            resource = '{}/*filler{}*/*?'.format(arn, i)
+        else:
+            resource = arn + '/*'
+            condition = _filler_condition(i)
+        policy.add_statement(Statement(actions, resource, principal, condition=condition))
+    condition = None
+    if complexity == 'conditions':
+        # TEST-NET-1 is never a client address
+        condition = {'NotIpAddress': {'aws:SourceIp': '192.0.2.0/24'}}
+    policy.add_statement(Statement(actions, arn + '/*', principal, condition=condition))
+    return policy.to_json()
+
+def _statement_counts(counts, build, max_size):
+    """ The counts whose policies fit in max_size, plus the largest count that does. """
+    fits = lambda n: len(build(n)) <= max_size
+    lo, hi = 1, 2
+    while fits(hi):
+        lo, hi = hi, hi * 2
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid
+    return sorted({n for n in counts if n <= lo} | {lo})
+
+def _measure(client, bucket_name, num_requests, workers):
+    body = b'x' * 1024
+    client.put_object(Bucket=bucket_name, Key='obj', Body=body)
+    puts = bench.Latencies('put')
+    bench.run_concurrent(lambda i: client.put_object(Bucket=bucket_name, Key='obj', Body=body),
+                         range(num_requests), workers=workers, latencies=puts)
+    gets = bench.Latencies('get')
+    bench.run_concurrent(lambda i: client.get_object(Bucket=bucket_name, Key='obj')['Body'].read(),
+                         range(num_requests), workers=workers, latencies=gets)
+    return puts.summary(), gets.summary()
+
+@pytest.mark.bucket_policy
+@pytest.mark.benchmark
+@pytest.mark.parametrize('kind', ['bucket', 'user'])
+def test_policy_evaluation_benchmark(bench_config, kind):
+    counts = bench.option('policy statements', [1, 10, 100, 1000])
+    complexities = bench.option('policy complexity', ['plain', 'wildcard', 'conditions'])
+    max_size = bench.option('policy max size', 20 * 1024)
+    num_requests = bench.option('policy requests', 500)
+    workers = bench.get_workers()
+
+    config = Config(signature_version='s3v4', max_pool_connections=workers)
+    if kind == 'bucket':
+        # the bucket owner's requests, under a bucket policy naming them
+        client = get_client(config)
+        principal = {'AWS': ['arn:aws:iam:::user/' + get_main_user_id()]}
+    else:
+        # the alt user's requests to its own bucket, under its user policy
+        client = get_alt_client(config)
+        iam_client = get_iam_client()
+        principal = None
+    bucket_name = get_new_bucket(client)
+
+    def put_policy(document):
+        if kind == 'bucket':
+            client.put_bucket_policy(Bucket=bucket_name, Policy=document)
+        else:
+            iam_client.put_user_policy(UserName=get_alt_user_id(), PolicyName='BenchPolicy',
+                                       PolicyDocument=document)
+
+    put, get = _measure(client, bucket_name, num_requests, workers)
+    baseline = {'put': put, 'get': get}
+    bench.report('policy_evaluation', kind=kind, complexity='none', statements=0, size=0,
+                 put=put, get=get)
+    has_policy = False
+    try:
+        for complexity in complexities:
+            build = lambda n: make_policy(bucket_name, n, complexity, principal)
+            for count in _statement_counts(counts, build, max_size):
+                document = build(count)
+                put_policy(document)
+                has_policy = True
+                put, get = _measure(client, bucket_name, num_requests, workers)
+                bench.report('policy_evaluation', kind=kind, complexity=complexity,
+                             statements=count, size=len(document), put=put, get=get,
+                             put_over_none=put['p50'] / baseline['put']['p50'],
+                             get_over_none=get['p50'] / baseline['get']['p50'])
+    finally:
+        if has_policy and kind == 'user':
+            iam_client.delete_user_policy(UserName=get_alt_user_id(), PolicyName='BenchPolicy')
+        elif has_policy:
+            client.delete_bucket_policy(Bucket=bucket_name)
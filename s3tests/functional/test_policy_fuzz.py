@@ -0,0 +1,149 @@
+import random
+
+import pytest
+from botocore.exceptions import ClientError
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_alt_client,
+    get_alt_user_id,
+    get_client,
+    get_main_user_id,
+    get_new_bucket,
+    )
+from . import bench
+from .bench import bench_config
+from .policy import Policy, PolicyEvaluator, Request, Statement
+
+# objects under 'a/' are tagged team=red, those under 'b/' team=blue;
+# 'put/' only takes new objects, so a successful put never changes what
+# the get requests see
+tags = {'a': 'red', 'b': 'blue'}
+
+# the client address is unknown, so ip conditions either match every
+# address or only TEST-NET-1, which is never a client's
+any_ip = ['0.0.0.0/0', '::/0']
+test_net = '192.0.2.0/24'
+client_ip = '203.0.113.1'
+
+def _ip_condition(rng):
+    operator = rng.choice(['IpAddress', 'NotIpAddress'])
+    return {operator: {'aws:SourceIp': rng.choice([any_ip, test_net])}}
+
+def _random_statement(rng, arn, principals):
+    """
+    A random statement of one kind (list, get, put or any object
+    operation), with conditions that make sense for that kind. Deny
+    statements never cover the bucket policy operations, so the owner can
+    always replace and delete the policy.
+    """
+    kind = rng.choice(['list', 'get', 'put', 'object'])
+    condition = None
+    if kind == 'list':
+        action = rng.choice(['s3:ListBucket', 's3:List*', ['s3:ListBucket', 's3:GetObject']])
+        resource = rng.choice([arn, '*', 'arn:aws:s3:::*'])
+        if rng.random() < 0.5:
+            operator = rng.choice(['StringEquals', 'StringNotEquals', 'StringLike', 'StringNotLike'])
+            prefix = rng.choice(['a/', 'b/', 'put/']) if 'Like' not in operator else rng.choice(['a*', '?/', 'p*'])
+            condition = {operator: {'s3:prefix': prefix}}
+    else:
+        action = {'get': rng.choice(['s3:GetObject', 's3:GetObject*', 's3:Get*']),
+                  'put': 's3:PutObject',
+                  'object': rng.choice(['s3:*Object', ['s3:GetObject', 's3:PutObject']])}[kind]
+        resource = rng.sample([arn + '/*', arn + '/a/*', arn + '/b/*', arn + '/put/*',
+                               arn + '/?/*', arn + '/*/1', '*'], rng.randint(1, 2))
+        if kind == 'get' and action == 's3:GetObject' and rng.random() < 0.5:
+            operator = rng.choice(['StringEquals', 'StringNotEquals'])
+            condition = {operator: {'s3:ExistingObjectTag/team': rng.choice(list(tags.values()))}}
+    if condition is None and rng.random() < 0.3:
+        condition = _ip_condition(rng)
+    effect = 'Deny' if rng.random() < 0.3 else 'Allow'
+    return Statement(action, resource, rng.choice(principals), effect=effect, condition=condition)
+
+def make_random_policy(rng, bucket_name, principals, max_statements=4):
+    arn = 'arn:aws:s3:::' + bucket_name
+    policy = Policy()
+    for _ in range(rng.randint(1, max_statements)):
+        policy.add_statement(_random_statement(rng, arn, principals))
+    return policy
+
+def _requests(bucket_name):
+    """ The requests to check, as (Request, boto3 method name, kwargs). """
+    arn = 'arn:aws:s3:::' + bucket_name
+    requests = []
+    for prefix, team in tags.items():
+        key = prefix + '/1'
+        requests.append((Request('s3:GetObject', '{}/{}'.format(arn, key),
+                                 context={'s3:ExistingObjectTag/team': team}),
+                         'get_object', {'Bucket': bucket_name, 'Key': key}))
+    requests.append((Request('s3:PutObject', arn + '/put/1'),
+                     'put_object', {'Bucket': bucket_name, 'Key': 'put/1', 'Body': b'x'}))
+    for prefix in ['a/', 'b/', 'put/']:
+        requests.append((Request('s3:ListBucket', arn, context={'s3:prefix': prefix}),
+                         'list_objects', {'Bucket': bucket_name, 'Prefix': prefix}))
+    return requests
+
+def _succeeds(client, method, kwargs):
+    try:
+        getattr(client, method)(**kwargs)
+    except ClientError as e:
+        assert e.response['ResponseMetadata']['HTTPStatusCode'] == 403, e.response
+        return False
+    return True
+
+@pytest.mark.bucket_policy
+@pytest.mark.tagging
+@pytest.mark.fails_on_aws
+@pytest.mark.fails_on_dbstore
+@pytest.mark.benchmark
+@pytest.mark.parametrize('seed', range(4))
+def test_bucket_policy_fuzz(bench_config, seed):
+    """
+    Put random bucket policies and check that the gateway decides a
+    sampled subset of requests the way PolicyEvaluator does. The owner is
+    allowed unless a statement denies it, the alt user only when a
+    statement allows it. Like the other generators, it only runs when the
+    config has a [benchmark] section; test_policy covers the evaluator
+    offline.
+    """
+    num_policies = bench.option('policy fuzz policies', 25)
+    samples = bench.option('policy fuzz samples', 6)
+    rng = random.Random(seed)
+
+    client = get_client()
+    bucket_name = get_new_bucket(client)
+    for prefix, team in tags.items():
+        client.put_object(Bucket=bucket_name, Key=prefix + '/1', Body=b'x',
+                          Tagging='team=' + team)
+
+    main_arn = 'arn:aws:iam:::user/' + get_main_user_id()
+    alt_arn = 'arn:aws:iam:::user/' + get_alt_user_id()
+    principals = ['*', {'AWS': '*'}, {'AWS': [alt_arn]}, {'AWS': [main_arn]},
+                  {'AWS': [main_arn, alt_arn]}]
+    users = [(client, main_arn, True), (get_alt_client(), alt_arn, False)]
+    checks = [(user, request) for user in users for request in _requests(bucket_name)]
+
+    checked = 0
+    for _ in range(num_policies):
+        policy = make_random_policy(rng, bucket_name, principals)
+        document = policy.to_json()
+        try:
+            client.put_bucket_policy(Bucket=bucket_name, Policy=document)
+        except ClientError as e:
+            # a combination the gateway doesn't accept isn't a decision to check
+            assert e.response['ResponseMetadata']['HTTPStatusCode'] == 400, e.response
+            continue
+        evaluator = PolicyEvaluator(policy)
+        try:
+            for (user_client, principal, owner), (request, method, kwargs) in rng.sample(checks, samples):
+                request = request._replace(principal=principal,
+                                           context=dict(request.context, **{'aws:SourceIp': client_ip}))
+                decision = evaluator.evaluate(request)
+                expected = decision != 'Deny' if owner else decision == 'Allow'
+                assert _succeeds(user_client, method, kwargs) == expected, \
+                    (document, request, decision)
+                checked += 1
+        finally:
+            client.delete_bucket_policy(Bucket=bucket_name)
+    assert checked > 0
@@ -0,0 +1,101 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import random
+from collections import OrderedDict
+
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    get_config_endpoint,
+    http_session,
+    get_main_aws_access_key,
+    get_main_aws_secret_key,
+    get_new_bucket,
+    )
+from . import bench
+from .bench import bench_config
+
+def sign_post_policy(bucket_name, prefix, max_size, expires_in=3600):
+    """
+    A signed browser upload policy for any key under prefix of up to
+    max_size bytes, as the form fields that carry it.
+    """
+    expires = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=expires_in)
+    policy_document = {
+        'expiration': expires.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'conditions': [
+            {'bucket': bucket_name},
+            ['starts-with', '$key', prefix],
+            {'acl': 'private'},
+            ['starts-with', '$Content-Type', ''],
+            ['content-length-range', 0, max_size],
+            ],
+        }
+    policy = base64.b64encode(json.dumps(policy_document).encode())
+    signature = base64.b64encode(hmac.new(get_main_aws_secret_key().encode(), policy, hashlib.sha1).digest())
+    return OrderedDict([('AWSAccessKeyId', get_main_aws_access_key()),
+                        ('acl', 'private'),
+                        ('signature', signature),
+                        ('policy', policy),
+                        ('Content-Type', 'application/octet-stream')])
+
+def _size_runs(sizes, num_uploads, rng):
+    """ A run of uploads for each size, and one drawing sizes from all of them. """
+    runs = [(str(size), [size] * num_uploads) for size in sizes]
+    if len(sizes) > 1:
+        runs.append(('mixed', [rng.choice(sizes) for _ in range(num_uploads)]))
+    return runs
+
+@pytest.mark.benchmark
+def test_post_object_benchmark(bench_config, http_session):
+    """
+    Upload objects with browser-style POST forms through the shared http
+    session, and with PutObject for comparison. One policy signed up front
+    covers all the uploads, so the client side only encodes the forms.
+    """
+    sizes = bench.option('post object sizes', [1024, 64 * 1024, 1024 * 1024])
+    num_uploads = bench.option('post object uploads', 500)
+    workers = bench.get_workers()
+
+    client = get_client(Config(max_pool_connections=workers))
+    bucket_name = get_new_bucket(client)
+    url = '{}/{}'.format(get_config_endpoint(), bucket_name)
+    bodies = {size: b'x' * size for size in sizes}
+
+    sign = bench.Latencies('sign_policy')
+    with sign.time():
+        fields = sign_post_policy(bucket_name, 'post/', max(sizes))
+
+    def post(item):
+        i, size = item
+        payload = OrderedDict(fields)
+        payload['key'] = 'post/{}'.format(i)
+        payload['file'] = bodies[size]
+        payload.move_to_end('key', last=False)
+        r = http_session.post(url, files=payload)
+        assert r.status_code == 204, r.text
+
+    def put(item):
+        i, size = item
+        client.put_object(Bucket=bucket_name, Key='put/{}'.format(i), Body=bodies[size])
+
+    for name, run_sizes in _size_runs(sizes, num_uploads, random.Random(0)):
+        items = list(enumerate(run_sizes))
+        posts = bench.Latencies('post_object')
+        bench.run_concurrent(post, items, workers=workers, latencies=posts)
+        puts = bench.Latencies('put_object')
+        bench.run_concurrent(put, items, workers=workers, latencies=puts)
+        total = sum(run_sizes)
+        bench.report('post_object', size=name, uploads=num_uploads, workers=workers,
+                     sign_policy=sign.summary(),
+                     post=posts.summary(), put=puts.summary(),
+                     post_mb_per_sec=total / posts.wall / (1024 * 1024),
+                     put_mb_per_sec=total / puts.wall / (1024 * 1024),
+                     post_over_put=posts.percentile(50) / puts.percentile(50))
@@ -0,0 +1,86 @@
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    http_session,
+    get_new_bucket,
+    get_v2_client,
+    )
+from . import bench
+from .bench import bench_config
+
+def _sign_batch(client, method, bucket_name, keys, http_method):
+    """ Presign a url for each key, timing each signature. """
+    signing = bench.Latencies('sign_' + method)
+    urls = []
+    for key in keys:
+        with signing.time():
+            urls.append(client.generate_presigned_url(
+                ClientMethod=method, Params={'Bucket': bucket_name, 'Key': key},
+                HttpMethod=http_method))
+    return urls, signing
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('signature_version', ['s3', 's3v4'])
+def test_presigned_url_benchmark(bench_config, http_session, signature_version):
+    """
+    Presign batches of PUT and GET urls with SigV2 or SigV4, and send them
+    concurrently through the shared http session. The same requests signed
+    in their headers by boto3 give the baseline for the cost of presigned
+    authentication on the server.
+    """
+    num_urls = bench.option('presigned urls', 10000)
+    num_requests = bench.option('presigned requests', 1000)
+    size = bench.option('presigned object size', 4096)
+    workers = bench.get_workers()
+
+    config = Config(signature_version=signature_version, max_pool_connections=workers)
+    if signature_version == 's3':
+        client = get_v2_client(config)
+    else:
+        client = get_client(config)
+    bucket_name = get_new_bucket(client)
+    body = b'x' * size
+
+    # client side signing alone, over the whole batch
+    keys = ['obj{}'.format(i) for i in range(num_urls)]
+    _, sign_get = _sign_batch(client, 'get_object', bucket_name, keys, 'GET')
+    bench.report('presigned_sign', signature_version=signature_version, urls=num_urls,
+                 sign_get=sign_get.summary(),
+                 urls_per_sec=num_urls / sign_get.summary()['total'])
+
+    keys = keys[:num_requests]
+    put_urls, sign_put = _sign_batch(client, 'put_object', bucket_name, keys, 'PUT')
+    get_urls, sign_get = _sign_batch(client, 'get_object', bucket_name, keys, 'GET')
+
+    def presigned_put(url):
+        r = http_session.put(url, data=body)
+        assert r.status_code == 200, r.text
+
+    def presigned_get(url):
+        r = http_session.get(url)
+        assert r.status_code == 200, r.text
+        assert len(r.content) == size
+
+    presigned_puts = bench.Latencies('presigned_put')
+    bench.run_concurrent(presigned_put, put_urls, workers=workers, latencies=presigned_puts)
+    presigned_gets = bench.Latencies('presigned_get')
+    bench.run_concurrent(presigned_get, get_urls, workers=workers, latencies=presigned_gets)
+
+    puts = bench.Latencies('put_object')
+    bench.run_concurrent(lambda key: client.put_object(Bucket=bucket_name, Key=key, Body=body),
+                         keys, workers=workers, latencies=puts)
+    gets = bench.Latencies('get_object')
+    bench.run_concurrent(lambda key: client.get_object(Bucket=bucket_name, Key=key)['Body'].read(),
+                         keys, workers=workers, latencies=gets)
+
+    bench.report('presigned_requests', signature_version=signature_version,
+                 requests=num_requests, object_size=size, workers=workers,
+                 sign_put=sign_put.summary(), sign_get=sign_get.summary(),
+                 presigned_put=presigned_puts.summary(), presigned_get=presigned_gets.summary(),
+                 put=puts.summary(), get=gets.summary(),
+                 presigned_get_over_get=presigned_gets.percentile(50) / gets.percentile(50),
+                 presigned_put_over_put=presigned_puts.percentile(50) / puts.percentile(50))
@@ -11,7 +11,6 @@ import threading
 import re
 import pytz
 from collections import OrderedDict
-import requests
 import json
 import base64
 import hmac
@@ -37,6 +36,8 @@ from .utils import _get_status_and_error_code
 from .utils import _get_status
 
 from .policy import Policy, Statement, make_json_policy
+from .populate import generate_keys, populate_bucket
+from .datasets import dataset_cache
 
 from .iam import iam_root
 
@@ -55,7 +56,7 @@ from . import (
     get_config_host,
     get_config_port,
     get_config_endpoint,
-    get_config_ssl_verify,
+    http_session,
     get_main_aws_access_key,
     get_main_aws_secret_key,
     get_main_display_name,
@@ -130,8 +131,7 @@ def _create_objects(bucket=None, bucket_name=None, keys=[], put_object_args={}):
     if bucket is None:
         bucket = get_new_bucket_resource(name=bucket_name)
 
-    for key in keys:
-        obj = bucket.put_object(Body=key, Key=key, **put_object_args)
+    populate_bucket(bucket.name, keys, put_object_args=put_object_args)
 
     return bucket_name
 
@@ -883,6 +883,27 @@ def test_bucket_listv2_prefix_delimiter_basic():
     assert keys == ['foo/bar']
     assert prefixes == ['foo/baz/']
 
+def test_bucket_list_populated_hierarchy():
+    key_names = generate_keys(1100, depth=2, fanout=4)
+    bucket_name = get_new_bucket()
+    manifest = populate_bucket(bucket_name, key_names)
+    assert [o['Key'] for o in manifest] == key_names
+    client = get_client()
+
+    listed = []
+    paginator = client.get_paginator('list_objects')
+    for page in paginator.paginate(Bucket=bucket_name):
+        listed += page['Contents']
+    assert [o['Key'] for o in listed] == key_names
+    assert [o['ETag'] for o in listed] == [o['ETag'] for o in manifest]
+
+    response = client.list_objects(Bucket=bucket_name, Delimiter='/')
+    assert _get_keys(response) == []
+    assert _get_prefixes(response) == ['d0/', 'd1/', 'd2/', 'd3/']
+
+    response = client.list_objects(Bucket=bucket_name, Delimiter='/', Prefix='d2/d1/')
+    assert _get_keys(response) == [k for k in key_names if k.startswith('d2/d1/')]
+
 def test_bucket_list_prefix_delimiter_alt():
     key_names = ['bar', 'bazar', 'cab', 'foo']
     bucket_name = _create_objects(keys=key_names)
@@ -988,9 +1009,9 @@ def test_bucket_listv2_prefix_delimiter_prefix_delimiter_not_exist():
     assert prefixes == []
 
 @pytest.mark.fails_on_dbstore
-def test_bucket_list_maxkeys_one():
+def test_bucket_list_maxkeys_one(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name, MaxKeys=1)
@@ -1007,9 +1028,9 @@ def test_bucket_list_maxkeys_one():
 
 @pytest.mark.list_objects_v2
 @pytest.mark.fails_on_dbstore
-def test_bucket_listv2_maxkeys_one():
+def test_bucket_listv2_maxkeys_one(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name, MaxKeys=1)
@@ -1024,9 +1045,9 @@ def test_bucket_listv2_maxkeys_one():
     keys = _get_keys(response)
     assert keys == key_names[1:]
 
-def test_bucket_list_maxkeys_zero():
+def test_bucket_list_maxkeys_zero(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name, MaxKeys=0)
@@ -1036,9 +1057,9 @@ def test_bucket_list_maxkeys_zero():
     assert keys == []
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_maxkeys_zero():
+def test_bucket_listv2_maxkeys_zero(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name, MaxKeys=0)
@@ -1047,9 +1068,9 @@ def test_bucket_listv2_maxkeys_zero():
     keys = _get_keys(response)
     assert keys == []
 
-def test_bucket_list_maxkeys_none():
+def test_bucket_list_maxkeys_none(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name)
@@ -1059,9 +1080,9 @@ def test_bucket_list_maxkeys_none():
     assert response['MaxKeys'] == 1000
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_maxkeys_none():
+def test_bucket_listv2_maxkeys_none(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name)
@@ -1233,9 +1254,9 @@ def test_bucket_listv2_unordered():
     assert error_code == 'InvalidArgument'
 
 
-def test_bucket_list_maxkeys_invalid():
+def test_bucket_list_maxkeys_invalid(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     # adds invalid max keys to url
@@ -1251,18 +1272,18 @@ def test_bucket_list_maxkeys_invalid():
 
 
 
-def test_bucket_list_marker_none():
+def test_bucket_list_marker_none(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name)
     assert response['Marker'] == ''
 
 
-def test_bucket_list_marker_empty():
+def test_bucket_list_marker_empty(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name, Marker='')
@@ -1272,9 +1293,9 @@ def test_bucket_list_marker_empty():
     assert keys == key_names
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_continuationtoken_empty():
+def test_bucket_listv2_continuationtoken_empty(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name, ContinuationToken='')
@@ -1284,9 +1305,9 @@ def test_bucket_listv2_continuationtoken_empty():
     assert keys == key_names
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_continuationtoken():
+def test_bucket_listv2_continuationtoken(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response1 = client.list_objects_v2(Bucket=bucket_name, MaxKeys=1)
@@ -1301,9 +1322,9 @@ def test_bucket_listv2_continuationtoken():
 
 @pytest.mark.list_objects_v2
 @pytest.mark.fails_on_dbstore
-def test_bucket_listv2_both_continuationtoken_startafter():
+def test_bucket_listv2_both_continuationtoken_startafter(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response1 = client.list_objects_v2(Bucket=bucket_name, StartAfter='bar', MaxKeys=1)
@@ -1317,9 +1338,9 @@ def test_bucket_listv2_both_continuationtoken_startafter():
     keys = _get_keys(response2)
     assert keys == key_names2
 
-def test_bucket_list_marker_unreadable():
+def test_bucket_list_marker_unreadable(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name, Marker='\x0a')
@@ -1329,9 +1350,9 @@ def test_bucket_list_marker_unreadable():
     assert keys == key_names
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_startafter_unreadable():
+def test_bucket_listv2_startafter_unreadable(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name, StartAfter='\x0a')
@@ -1340,9 +1361,9 @@ def test_bucket_listv2_startafter_unreadable():
     keys = _get_keys(response)
     assert keys == key_names
 
-def test_bucket_list_marker_not_in_list():
+def test_bucket_list_marker_not_in_list(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name, Marker='blah')
@@ -1351,9 +1372,9 @@ def test_bucket_list_marker_not_in_list():
     assert keys == [ 'foo','quxx']
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_startafter_not_in_list():
+def test_bucket_listv2_startafter_not_in_list(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name, StartAfter='blah')
@@ -1361,9 +1382,9 @@ def test_bucket_listv2_startafter_not_in_list():
     keys = _get_keys(response)
     assert keys == ['foo', 'quxx']
 
-def test_bucket_list_marker_after_list():
+def test_bucket_list_marker_after_list(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects(Bucket=bucket_name, Marker='zzz')
@@ -1373,9 +1394,9 @@ def test_bucket_list_marker_after_list():
     assert keys == []
 
 @pytest.mark.list_objects_v2
-def test_bucket_listv2_startafter_after_list():
+def test_bucket_listv2_startafter_after_list(dataset_cache):
     key_names = ['bar', 'baz', 'foo', 'quxx']
-    bucket_name = _create_objects(keys=key_names)
+    bucket_name = dataset_cache.objects(key_names)
     client = get_client()
 
     response = client.list_objects_v2(Bucket=bucket_name, StartAfter='zzz')
@@ -1942,7 +1963,7 @@ def _get_post_url(bucket_name):
     endpoint = get_config_endpoint()
     return '{endpoint}/{bucket_name}'.format(endpoint=endpoint, bucket_name=bucket_name)
 
-def test_post_object_anonymous_request():
+def test_post_object_anonymous_request(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     url = _get_post_url(bucket_name)
@@ -1950,13 +1971,13 @@ def test_post_object_anonymous_request():
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
     client.create_bucket(ACL='public-read-write', Bucket=bucket_name)
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     body = _get_body(response)
     assert body == 'bar'
 
-def test_post_object_authenticated_request():
+def test_post_object_authenticated_request(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -1988,13 +2009,13 @@ def test_post_object_authenticated_request():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     body = _get_body(response)
     assert body == 'bar'
 
-def test_post_object_authenticated_no_content_type():
+def test_post_object_authenticated_no_content_type(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     client.create_bucket(ACL='public-read-write', Bucket=bucket_name)
@@ -2025,13 +2046,13 @@ def test_post_object_authenticated_no_content_type():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key="foo.txt")
     body = _get_body(response)
     assert body == 'bar'
 
-def test_post_object_authenticated_request_bad_access_key():
+def test_post_object_authenticated_request_bad_access_key(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     client.create_bucket(ACL='public-read-write', Bucket=bucket_name)
@@ -2063,10 +2084,10 @@ def test_post_object_authenticated_request_bad_access_key():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_set_success_code():
+def test_post_object_set_success_code(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     client.create_bucket(ACL='public-read-write', Bucket=bucket_name)
@@ -2076,12 +2097,12 @@ def test_post_object_set_success_code():
     ("success_action_status" , "201"),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 201
     message = ET.fromstring(r.content).find('Key')
     assert message.text == 'foo.txt'
 
-def test_post_object_set_invalid_success_code():
+def test_post_object_set_invalid_success_code(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     client.create_bucket(ACL='public-read-write', Bucket=bucket_name)
@@ -2091,12 +2112,12 @@ def test_post_object_set_invalid_success_code():
     ("success_action_status" , "404"),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     content = r.content.decode()
     assert content == ''
 
-def test_post_object_upload_larger_than_chunk():
+def test_post_object_upload_larger_than_chunk(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2129,13 +2150,13 @@ def test_post_object_upload_larger_than_chunk():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', foo_string)])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     body = _get_body(response)
     assert body == foo_string
 
-def test_post_object_set_key_from_filename():
+def test_post_object_set_key_from_filename(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2165,13 +2186,13 @@ def test_post_object_set_key_from_filename():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('foo.txt', 'bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     body = _get_body(response)
     assert body == 'bar'
 
-def test_post_object_ignored_header():
+def test_post_object_ignored_header(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2202,10 +2223,10 @@ def test_post_object_ignored_header():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),("x-ignore-foo" , "bar"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
 
-def test_post_object_case_insensitive_condition_fields():
+def test_post_object_case_insensitive_condition_fields(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2237,10 +2258,10 @@ def test_post_object_case_insensitive_condition_fields():
     ("aCl" , "private"),("signature" , signature),("pOLICy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
 
-def test_post_object_escaped_field_values():
+def test_post_object_escaped_field_values(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2270,13 +2291,13 @@ def test_post_object_escaped_field_values():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key=r'\$foo.txt')
     body = _get_body(response)
     assert body == 'bar'
 
-def test_post_object_success_redirect_action():
+def test_post_object_success_redirect_action(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     client.create_bucket(ACL='public-read-write', Bucket=bucket_name)
@@ -2311,14 +2332,14 @@ def test_post_object_success_redirect_action():
     ("Content-Type" , "text/plain"),("success_action_redirect" , redirect_url),\
     ('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 200
     url = r.url
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     assert url == '{rurl}?bucket={bucket}&key={key}&etag=%22{etag}%22'.format(\
     rurl = redirect_url, bucket = bucket_name, key = 'foo.txt', etag = response['ETag'].strip('"'))
 
-def test_post_object_invalid_signature():
+def test_post_object_invalid_signature(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2348,10 +2369,10 @@ def test_post_object_invalid_signature():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_invalid_access_key():
+def test_post_object_invalid_access_key(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2381,10 +2402,10 @@ def test_post_object_invalid_access_key():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_invalid_date_format():
+def test_post_object_invalid_date_format(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2414,10 +2435,10 @@ def test_post_object_invalid_date_format():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_no_key_specified():
+def test_post_object_no_key_specified(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2446,10 +2467,10 @@ def test_post_object_no_key_specified():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_missing_signature():
+def test_post_object_missing_signature(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2479,10 +2500,10 @@ def test_post_object_missing_signature():
     ("acl" , "private"),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_missing_policy_condition():
+def test_post_object_missing_policy_condition(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2511,10 +2532,10 @@ def test_post_object_missing_policy_condition():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_user_specified_header():
+def test_post_object_user_specified_header(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2545,12 +2566,12 @@ def test_post_object_user_specified_header():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('x-amz-meta-foo' , 'barclamp'),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     assert response['Metadata']['foo'] == 'barclamp'
 
-def test_post_object_request_missing_policy_specified_field():
+def test_post_object_request_missing_policy_specified_field(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2581,10 +2602,10 @@ def test_post_object_request_missing_policy_specified_field():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_condition_is_case_sensitive():
+def test_post_object_condition_is_case_sensitive(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2614,10 +2635,10 @@ def test_post_object_condition_is_case_sensitive():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_expires_is_case_sensitive():
+def test_post_object_expires_is_case_sensitive(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2647,10 +2668,10 @@ def test_post_object_expires_is_case_sensitive():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_expired_policy():
+def test_post_object_expired_policy(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2680,10 +2701,10 @@ def test_post_object_expired_policy():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_wrong_bucket():
+def test_post_object_wrong_bucket(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2716,10 +2737,10 @@ def test_post_object_wrong_bucket():
     bad_bucket_name = get_new_bucket()
     url = _get_post_url(bad_bucket_name)
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_invalid_request_field_value():
+def test_post_object_invalid_request_field_value(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2749,10 +2770,10 @@ def test_post_object_invalid_request_field_value():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('x-amz-meta-foo' , 'barclamp'),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 403
 
-def test_post_object_missing_expires_condition():
+def test_post_object_missing_expires_condition(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2782,10 +2803,10 @@ def test_post_object_missing_expires_condition():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_missing_conditions_list():
+def test_post_object_missing_conditions_list(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2807,10 +2828,10 @@ def test_post_object_missing_conditions_list():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_upload_size_limit_exceeded():
+def test_post_object_upload_size_limit_exceeded(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2840,10 +2861,10 @@ def test_post_object_upload_size_limit_exceeded():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_missing_content_length_argument():
+def test_post_object_missing_content_length_argument(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2873,10 +2894,10 @@ def test_post_object_missing_content_length_argument():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_invalid_content_length_argument():
+def test_post_object_invalid_content_length_argument(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2906,10 +2927,10 @@ def test_post_object_invalid_content_length_argument():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_upload_size_below_minimum():
+def test_post_object_upload_size_below_minimum(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -2939,10 +2960,10 @@ def test_post_object_upload_size_below_minimum():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
-def test_post_object_upload_size_rgw_chunk_size_bug():
+def test_post_object_upload_size_rgw_chunk_size_bug(http_session):
     # Test for https://tracker.ceph.com/issues/58627
     # TODO: if this value is different in Teuthology runs, this would need tuning
     # https://github.com/ceph/ceph/blob/main/qa/suites/rgw/verify/striping%24/stripe-greater-than-chunk.yaml
@@ -2986,10 +3007,10 @@ def test_post_object_upload_size_rgw_chunk_size_bug():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', (test_payload))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
 
-def test_post_object_empty_conditions():
+def test_post_object_empty_conditions(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -3015,7 +3036,7 @@ def test_post_object_empty_conditions():
     ("acl" , "private"),("signature" , signature),("policy" , policy),\
     ("Content-Type" , "text/plain"),('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
 def test_get_object_ifmatch_good():
@@ -3489,52 +3510,52 @@ def test_object_raw_authenticated_object_gone():
     assert status == 404
     assert error_code == 'NoSuchKey'
 
-def _test_object_raw_get_x_amz_expires_not_expired(client):
+def _test_object_raw_get_x_amz_expires_not_expired(http_session, client):
     bucket_name = _setup_bucket_object_acl('public-read', 'public-read', client=client)
     params = {'Bucket': bucket_name, 'Key': 'foo'}
 
     url = client.generate_presigned_url(ClientMethod='get_object', Params=params, ExpiresIn=100000, HttpMethod='GET')
 
-    res = requests.options(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.options(url).__dict__
     assert res['status_code'] == 400
 
-    res = requests.get(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.get(url).__dict__
     assert res['status_code'] == 200
 
-def test_object_raw_get_x_amz_expires_not_expired():
-    _test_object_raw_get_x_amz_expires_not_expired(client=get_client())
+def test_object_raw_get_x_amz_expires_not_expired(http_session):
+    _test_object_raw_get_x_amz_expires_not_expired(http_session, client=get_client())
 
-def test_object_raw_get_x_amz_expires_not_expired_tenant():
-    _test_object_raw_get_x_amz_expires_not_expired(client=get_tenant_client())
+def test_object_raw_get_x_amz_expires_not_expired_tenant(http_session):
+    _test_object_raw_get_x_amz_expires_not_expired(http_session, client=get_tenant_client())
 
-def test_object_raw_get_x_amz_expires_out_range_zero():
+def test_object_raw_get_x_amz_expires_out_range_zero(http_session):
     bucket_name = _setup_bucket_object_acl('public-read', 'public-read')
     client = get_client()
     params = {'Bucket': bucket_name, 'Key': 'foo'}
 
     url = client.generate_presigned_url(ClientMethod='get_object', Params=params, ExpiresIn=0, HttpMethod='GET')
 
-    res = requests.get(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.get(url).__dict__
     assert res['status_code'] == 403
 
-def test_object_raw_get_x_amz_expires_out_max_range():
+def test_object_raw_get_x_amz_expires_out_max_range(http_session):
     bucket_name = _setup_bucket_object_acl('public-read', 'public-read')
     client = get_client()
     params = {'Bucket': bucket_name, 'Key': 'foo'}
 
     url = client.generate_presigned_url(ClientMethod='get_object', Params=params, ExpiresIn=609901, HttpMethod='GET')
 
-    res = requests.get(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.get(url).__dict__
     assert res['status_code'] == 403
 
-def test_object_raw_get_x_amz_expires_out_positive_range():
+def test_object_raw_get_x_amz_expires_out_positive_range(http_session):
     bucket_name = _setup_bucket_object_acl('public-read', 'public-read')
     client = get_client()
     params = {'Bucket': bucket_name, 'Key': 'foo'}
 
     url = client.generate_presigned_url(ClientMethod='get_object', Params=params, ExpiresIn=-7, HttpMethod='GET')
 
-    res = requests.get(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.get(url).__dict__
     assert res['status_code'] == 403
 
 def test_object_content_encoding_aws_chunked():
@@ -3596,7 +3617,7 @@ def test_object_put_authenticated():
     response = client.put_object(Bucket=bucket_name, Key='foo', Body='foo')
     assert response['ResponseMetadata']['HTTPStatusCode'] == 200
 
-def _test_object_presigned_put_object_with_acl(client=None):
+def _test_object_presigned_put_object_with_acl(http_session, client=None):
     if client is None:
         client = get_client()
 
@@ -3608,25 +3629,27 @@ def _test_object_presigned_put_object_with_acl(client=None):
 
     data = b'hello world'
     headers = {'x-amz-acl': 'private'}
-    res = requests.put(url, data=data, headers=headers, verify=get_config_ssl_verify())
+    res = http_session.put(url, data=data, headers=headers)
     assert res.status_code == 200
 
     params = {'Bucket': bucket_name, 'Key': key}
     url = client.generate_presigned_url(ClientMethod='get_object', Params=params, HttpMethod='GET')
 
-    res = requests.get(url, verify=get_config_ssl_verify())
+    res = http_session.get(url)
     assert res.status_code == 200
     assert res.text == 'hello world'
 
-def test_object_presigned_put_object_with_acl():
+def test_object_presigned_put_object_with_acl(http_session):
     _test_object_presigned_put_object_with_acl(
+        http_session,
         client=get_client())
 
-def test_object_presigned_put_object_with_acl_tenant():
+def test_object_presigned_put_object_with_acl_tenant(http_session):
     _test_object_presigned_put_object_with_acl(
+        http_session,
         client=get_tenant_client())
 
-def test_object_raw_put_authenticated_expired():
+def test_object_raw_put_authenticated_expired(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
     client.put_object(Bucket=bucket_name, Key='foo')
@@ -3635,7 +3658,7 @@ def test_object_raw_put_authenticated_expired():
     url = client.generate_presigned_url(ClientMethod='put_object', Params=params, ExpiresIn=-1000, HttpMethod='PUT')
 
     # params wouldn't take a 'Body' parameter so we're passing it in here
-    res = requests.put(url, data="foo", verify=get_config_ssl_verify()).__dict__
+    res = http_session.put(url, data="foo").__dict__
     assert res['status_code'] == 403
 
 def check_bad_bucket_name(bucket_name):
@@ -6904,13 +6927,13 @@ def test_set_cors():
     assert status == 404
 
 def _cors_request_and_check(func, url, headers, expect_status, expect_allow_origin, expect_allow_methods):
-    r = func(url, headers=headers, verify=get_config_ssl_verify())
+    r = func(url, headers=headers)
     assert r.status_code == expect_status
 
     assert r.headers.get('access-control-allow-origin', None) == expect_allow_origin
     assert r.headers.get('access-control-allow-methods', None) == expect_allow_methods
 
-def test_cors_origin_response():
+def test_cors_origin_response(http_session):
     bucket_name = _setup_bucket_acl(bucket_acl='public-read')
     client = get_client()
 
@@ -6941,51 +6964,51 @@ def test_cors_origin_response():
 
     url = _get_post_url(bucket_name)
 
-    _cors_request_and_check(requests.get, url, None, 200, None, None)
-    _cors_request_and_check(requests.get, url, {'Origin': 'foo.suffix'}, 200, 'foo.suffix', 'GET')
-    _cors_request_and_check(requests.get, url, {'Origin': 'foo.bar'}, 200, None, None)
-    _cors_request_and_check(requests.get, url, {'Origin': 'foo.suffix.get'}, 200, None, None)
-    _cors_request_and_check(requests.get, url, {'Origin': 'startend'}, 200, 'startend', 'GET')
-    _cors_request_and_check(requests.get, url, {'Origin': 'start1end'}, 200, 'start1end', 'GET')
-    _cors_request_and_check(requests.get, url, {'Origin': 'start12end'}, 200, 'start12end', 'GET')
-    _cors_request_and_check(requests.get, url, {'Origin': '0start12end'}, 200, None, None)
-    _cors_request_and_check(requests.get, url, {'Origin': 'prefix'}, 200, 'prefix', 'GET')
-    _cors_request_and_check(requests.get, url, {'Origin': 'prefix.suffix'}, 200, 'prefix.suffix', 'GET')
-    _cors_request_and_check(requests.get, url, {'Origin': 'bla.prefix'}, 200, None, None)
+    _cors_request_and_check(http_session.get, url, None, 200, None, None)
+    _cors_request_and_check(http_session.get, url, {'Origin': 'foo.suffix'}, 200, 'foo.suffix', 'GET')
+    _cors_request_and_check(http_session.get, url, {'Origin': 'foo.bar'}, 200, None, None)
+    _cors_request_and_check(http_session.get, url, {'Origin': 'foo.suffix.get'}, 200, None, None)
+    _cors_request_and_check(http_session.get, url, {'Origin': 'startend'}, 200, 'startend', 'GET')
+    _cors_request_and_check(http_session.get, url, {'Origin': 'start1end'}, 200, 'start1end', 'GET')
+    _cors_request_and_check(http_session.get, url, {'Origin': 'start12end'}, 200, 'start12end', 'GET')
+    _cors_request_and_check(http_session.get, url, {'Origin': '0start12end'}, 200, None, None)
+    _cors_request_and_check(http_session.get, url, {'Origin': 'prefix'}, 200, 'prefix', 'GET')
+    _cors_request_and_check(http_session.get, url, {'Origin': 'prefix.suffix'}, 200, 'prefix.suffix', 'GET')
+    _cors_request_and_check(http_session.get, url, {'Origin': 'bla.prefix'}, 200, None, None)
 
     obj_url = '{u}/{o}'.format(u=url, o='bar')
-    _cors_request_and_check(requests.get, obj_url, {'Origin': 'foo.suffix'}, 404, 'foo.suffix', 'GET')
-    _cors_request_and_check(requests.put, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'GET',
+    _cors_request_and_check(http_session.get, obj_url, {'Origin': 'foo.suffix'}, 404, 'foo.suffix', 'GET')
+    _cors_request_and_check(http_session.put, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'GET',
                                                     'content-length': '0'}, 403, 'foo.suffix', 'GET')
-    _cors_request_and_check(requests.put, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'PUT',
+    _cors_request_and_check(http_session.put, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'PUT',
                                                     'content-length': '0'}, 403, None, None)
 
-    _cors_request_and_check(requests.put, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'DELETE',
+    _cors_request_and_check(http_session.put, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'DELETE',
                                                     'content-length': '0'}, 403, None, None)
-    _cors_request_and_check(requests.put, obj_url, {'Origin': 'foo.suffix', 'content-length': '0'}, 403, None, None)
+    _cors_request_and_check(http_session.put, obj_url, {'Origin': 'foo.suffix', 'content-length': '0'}, 403, None, None)
 
-    _cors_request_and_check(requests.put, obj_url, {'Origin': 'foo.put', 'content-length': '0'}, 403, 'foo.put', 'PUT')
+    _cors_request_and_check(http_session.put, obj_url, {'Origin': 'foo.put', 'content-length': '0'}, 403, 'foo.put', 'PUT')
 
-    _cors_request_and_check(requests.get, obj_url, {'Origin': 'foo.suffix'}, 404, 'foo.suffix', 'GET')
+    _cors_request_and_check(http_session.get, obj_url, {'Origin': 'foo.suffix'}, 404, 'foo.suffix', 'GET')
 
-    _cors_request_and_check(requests.options, url, None, 400, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'foo.suffix'}, 400, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'bla'}, 400, None, None)
-    _cors_request_and_check(requests.options, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'GET',
+    _cors_request_and_check(http_session.options, url, None, 400, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'foo.suffix'}, 400, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'bla'}, 400, None, None)
+    _cors_request_and_check(http_session.options, obj_url, {'Origin': 'foo.suffix', 'Access-Control-Request-Method': 'GET',
                                                     'content-length': '0'}, 200, 'foo.suffix', 'GET')
-    _cors_request_and_check(requests.options, url, {'Origin': 'foo.bar', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'foo.suffix.get', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'startend', 'Access-Control-Request-Method': 'GET'}, 200, 'startend', 'GET')
-    _cors_request_and_check(requests.options, url, {'Origin': 'start1end', 'Access-Control-Request-Method': 'GET'}, 200, 'start1end', 'GET')
-    _cors_request_and_check(requests.options, url, {'Origin': 'start12end', 'Access-Control-Request-Method': 'GET'}, 200, 'start12end', 'GET')
-    _cors_request_and_check(requests.options, url, {'Origin': '0start12end', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'prefix', 'Access-Control-Request-Method': 'GET'}, 200, 'prefix', 'GET')
-    _cors_request_and_check(requests.options, url, {'Origin': 'prefix.suffix', 'Access-Control-Request-Method': 'GET'}, 200, 'prefix.suffix', 'GET')
-    _cors_request_and_check(requests.options, url, {'Origin': 'bla.prefix', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'foo.put', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
-    _cors_request_and_check(requests.options, url, {'Origin': 'foo.put', 'Access-Control-Request-Method': 'PUT'}, 200, 'foo.put', 'PUT')
-
-def test_cors_origin_wildcard():
+    _cors_request_and_check(http_session.options, url, {'Origin': 'foo.bar', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'foo.suffix.get', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'startend', 'Access-Control-Request-Method': 'GET'}, 200, 'startend', 'GET')
+    _cors_request_and_check(http_session.options, url, {'Origin': 'start1end', 'Access-Control-Request-Method': 'GET'}, 200, 'start1end', 'GET')
+    _cors_request_and_check(http_session.options, url, {'Origin': 'start12end', 'Access-Control-Request-Method': 'GET'}, 200, 'start12end', 'GET')
+    _cors_request_and_check(http_session.options, url, {'Origin': '0start12end', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'prefix', 'Access-Control-Request-Method': 'GET'}, 200, 'prefix', 'GET')
+    _cors_request_and_check(http_session.options, url, {'Origin': 'prefix.suffix', 'Access-Control-Request-Method': 'GET'}, 200, 'prefix.suffix', 'GET')
+    _cors_request_and_check(http_session.options, url, {'Origin': 'bla.prefix', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'foo.put', 'Access-Control-Request-Method': 'GET'}, 403, None, None)
+    _cors_request_and_check(http_session.options, url, {'Origin': 'foo.put', 'Access-Control-Request-Method': 'PUT'}, 200, 'foo.put', 'PUT')
+
+def test_cors_origin_wildcard(http_session):
     bucket_name = _setup_bucket_acl(bucket_acl='public-read')
     client = get_client()
 
@@ -7007,10 +7030,10 @@ def test_cors_origin_wildcard():
 
     url = _get_post_url(bucket_name)
 
-    _cors_request_and_check(requests.get, url, None, 200, None, None)
-    _cors_request_and_check(requests.get, url, {'Origin': 'example.origin'}, 200, '*', 'GET')
+    _cors_request_and_check(http_session.get, url, None, 200, None, None)
+    _cors_request_and_check(http_session.get, url, {'Origin': 'example.origin'}, 200, '*', 'GET')
 
-def test_cors_header_option():
+def test_cors_header_option(http_session):
     bucket_name = _setup_bucket_acl(bucket_acl='public-read')
     client = get_client()
 
@@ -7034,9 +7057,9 @@ def test_cors_header_option():
     url = _get_post_url(bucket_name)
     obj_url = '{u}/{o}'.format(u=url, o='bar')
 
-    _cors_request_and_check(requests.options, obj_url, {'Origin': 'example.origin','Access-Control-Request-Headers':'x-amz-meta-header2','Access-Control-Request-Method':'GET'}, 403, None, None)
+    _cors_request_and_check(http_session.options, obj_url, {'Origin': 'example.origin','Access-Control-Request-Headers':'x-amz-meta-header2','Access-Control-Request-Method':'GET'}, 403, None, None)
 
-def _test_cors_options_presigned_method(client, method, cannedACL=None):
+def _test_cors_options_presigned_method(http_session, client, method, cannedACL=None):
     bucket_name = _setup_bucket_object_acl('public-read', 'public-read', client=client)
     params = {'Bucket': bucket_name, 'Key': 'foo'}
 
@@ -7052,7 +7075,7 @@ def _test_cors_options_presigned_method(client, method, cannedACL=None):
 
     url = client.generate_presigned_url(ClientMethod=method, Params=params, ExpiresIn=100000, HttpMethod=httpMethod)
 
-    res = requests.options(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.options(url).__dict__
     assert res['status_code'] == 400
 
     allowed_methods = [httpMethod]
@@ -7072,70 +7095,80 @@ def _test_cors_options_presigned_method(client, method, cannedACL=None):
         'Origin': 'example',
         'Access-Control-Request-Method': httpMethod,
     }
-    _cors_request_and_check(requests.options, url, headers,
+    _cors_request_and_check(http_session.options, url, headers,
                             200, 'example', httpMethod)
 
-def test_cors_presigned_get_object():
+def test_cors_presigned_get_object(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_client(),
         method='get_object',
     )
 
-def test_cors_presigned_get_object_tenant():
+def test_cors_presigned_get_object_tenant(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_tenant_client(),
         method='get_object',
     )
 
 @pytest.mark.fails_on_rgw
-def test_cors_presigned_get_object_v2():
+def test_cors_presigned_get_object_v2(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_v2_client(),
         method='get_object',
     )
 
 @pytest.mark.fails_on_rgw
-def test_cors_presigned_get_object_tenant_v2():
+def test_cors_presigned_get_object_tenant_v2(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_v2_tenant_client(),
         method='get_object',
     )
 
-def test_cors_presigned_put_object():
+def test_cors_presigned_put_object(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_client(),
         method='put_object',
     )
 
-def test_cors_presigned_put_object_with_acl():
+def test_cors_presigned_put_object_with_acl(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_client(),
         method='put_object',
         cannedACL='private',
     )
 
 @pytest.mark.fails_on_rgw
-def test_cors_presigned_put_object_v2():
+def test_cors_presigned_put_object_v2(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_v2_client(),
         method='put_object',
     )
 
 @pytest.mark.fails_on_rgw
-def test_cors_presigned_put_object_tenant_v2():
+def test_cors_presigned_put_object_tenant_v2(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_v2_tenant_client(),
         method='put_object',
     )
 
-def test_cors_presigned_put_object_tenant():
+def test_cors_presigned_put_object_tenant(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_tenant_client(),
         method='put_object',
     )
 
-def test_cors_presigned_put_object_tenant_with_acl():
+def test_cors_presigned_put_object_tenant_with_acl(http_session):
     _test_cors_options_presigned_method(
+        http_session,
         client=get_tenant_client(),
         method='put_object',
         cannedACL='private',
@@ -10926,7 +10959,7 @@ def test_encryption_sse_c_multipart_bad_download():
 
 @pytest.mark.encryption
 @pytest.mark.fails_on_dbstore
-def test_encryption_sse_c_post_object_authenticated_request():
+def test_encryption_sse_c_post_object_authenticated_request(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -10964,7 +10997,7 @@ def test_encryption_sse_c_post_object_authenticated_request():
     ('x-amz-server-side-encryption-customer-key-md5', 'DWygnHRtgiJ77HCm+1rvHw=='), \
     ('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
 
     get_headers = {
@@ -11245,7 +11278,7 @@ def test_sse_kms_multipart_invalid_chunks_2():
 
 @pytest.mark.encryption
 @pytest.mark.fails_on_dbstore
-def test_sse_kms_post_object_authenticated_request():
+def test_sse_kms_post_object_authenticated_request(http_session):
     kms_keyid = get_main_kms_keyid()
     bucket_name = get_new_bucket()
     client = get_client()
@@ -11282,7 +11315,7 @@ def test_sse_kms_post_object_authenticated_request():
     ('x-amz-server-side-encryption-aws-kms-key-id', kms_keyid), \
     ('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
 
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
@@ -12038,7 +12071,7 @@ def test_put_delete_tags():
 
 @pytest.mark.tagging
 @pytest.mark.fails_on_dbstore
-def test_post_object_tags_anonymous_request():
+def test_post_object_tags_anonymous_request(http_session):
     bucket_name = get_new_bucket_name()
     client = get_client()
     url = _get_post_url(bucket_name)
@@ -12059,7 +12092,7 @@ def test_post_object_tags_anonymous_request():
         ('file', ('bar')),
     ])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key=key_name)
     body = _get_body(response)
@@ -12069,7 +12102,7 @@ def test_post_object_tags_anonymous_request():
     assert response['TagSet'] == input_tagset['TagSet']
 
 @pytest.mark.tagging
-def test_post_object_tags_authenticated_request():
+def test_post_object_tags_authenticated_request(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
 
@@ -12107,7 +12140,7 @@ def test_post_object_tags_authenticated_request():
         ("Content-Type" , "text/plain"),
         ('file', ('bar'))])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
     body = _get_body(response)
@@ -14642,7 +14675,7 @@ def test_sse_s3_default_multipart_upload():
 @pytest.mark.bucket_encryption
 @pytest.mark.sse_s3
 @pytest.mark.fails_on_dbstore
-def test_sse_s3_default_post_object_authenticated_request():
+def test_sse_s3_default_post_object_authenticated_request(http_session):
     bucket_name = get_new_bucket()
     client = get_client()
     _put_bucket_encryption_s3(client, bucket_name)
@@ -14676,7 +14709,7 @@ def test_sse_s3_default_post_object_authenticated_request():
     ("Content-Type" , "text/plain"),
     ('file', ('bar'))])
 
-    r = requests.post(url, files = payload)
+    r = http_session.post(url, files = payload)
     assert r.status_code == 204
 
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
@@ -14687,7 +14720,7 @@ def test_sse_s3_default_post_object_authenticated_request():
 @pytest.mark.encryption
 @pytest.mark.bucket_encryption
 @pytest.mark.fails_on_dbstore
-def test_sse_kms_default_post_object_authenticated_request():
+def test_sse_kms_default_post_object_authenticated_request(http_session):
     kms_keyid = get_main_kms_keyid()
     if kms_keyid is None:
         pytest.skip('[s3 main] section missing kms_keyid')
@@ -14724,7 +14757,7 @@ def test_sse_kms_default_post_object_authenticated_request():
     ("Content-Type" , "text/plain"),
     ('file', ('bar'))])
 
-    r = requests.post(url, files = payload)
+    r = http_session.post(url, files = payload)
     assert r.status_code == 204
 
     response = client.get_object(Bucket=bucket_name, Key='foo.txt')
@@ -15134,7 +15167,7 @@ def test_multipart_use_cksum_helper_sha1():
     #eof    
 
 @pytest.mark.checksum
-def test_post_object_upload_checksum():
+def test_post_object_upload_checksum(http_session):
     megabytes = 1024 * 1024
     min_size = 0
     max_size = 5 * megabytes
@@ -15174,7 +15207,7 @@ def test_post_object_upload_checksum():
     ('x-amz-checksum-sha256', 'aTL9MeXa9HObn6eP93eygxsJlcwdCwCTysgGAZAgE7w='),\
     ('file', (test_payload)),])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 204
 
     # bad checksum payload
@@ -15184,7 +15217,7 @@ def test_post_object_upload_checksum():
     ('x-amz-checksum-sha256', 'sailorjerry'),\
     ('file', (test_payload)),])
 
-    r = requests.post(url, files=payload, verify=get_config_ssl_verify())
+    r = http_session.post(url, files=payload)
     assert r.status_code == 400
 
 
@@ -15260,9 +15293,33 @@ def _has_target_object_key_format():
 
 import shlex
 
+# a field and the blanks after it, for records without quotes, escapes or
+# brackets inside their fields, which split the same with shlex
+_log_field_re = re.compile(r'''(?:"([^"'\[\]\\]*)"|\[([^"'\[\]\\]*)\]|([^ \t\r\n"'\[\]\\]+))(?:[ \t\r\n]+|$)''')
+
+def _split_log_record(record, num_fields):
+    """
+    Split a log record into its fields, as shlex does once brackets are
+    replaced by quotes. The common records, where no quote, bracket or
+    backslash appears inside a field, are split with a regex; anything
+    else, a key like a"b or [x] for example, is left to shlex.
+    """
+    chunks = []
+    pos = len(record) - len(record.lstrip(' \t\r\n'))
+    while pos < len(record):
+        m = _log_field_re.match(record, pos)
+        if m is None:
+            break
+        quoted, bracketed, plain = m.groups()
+        chunks.append(plain if plain is not None else quoted if quoted is not None else bracketed)
+        pos = m.end()
+    else:
+        if len(chunks) == num_fields:
+            return chunks
+    return shlex.split(record.replace('[', '"').replace(']', '"'))
+
 def _parse_standard_log_record(record):
-    record = record.replace('[', '"').replace(']', '"')
-    chunks = shlex.split(record)
+    chunks = _split_log_record(record, 26)
     assert len(chunks) == 26
     return {
             'BucketOwner':      chunks[0],
@@ -15295,8 +15352,7 @@ def _parse_standard_log_record(record):
 
 
 def _parse_journal_log_record(record):
-    record = record.replace('[', '"').replace(']', '"')
-    chunks = shlex.split(record)
+    chunks = _split_log_record(record, 8)
     assert len(chunks) == 8
     return {
             'BucketOwner':      chunks[0],
@@ -15324,17 +15380,80 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class _LogRecords(object):
+    """
+    Bucket log records of one type, parsed once and indexed by operation,
+    bucket name and object key, so that checking for many keys takes a
+    lookup per key instead of a scan of the whole log per key.
+    """
+    def __init__(self, record_type, lines=()):
+        self.record_type = record_type
+        self.index = {}
+        self.add(lines)
+
+    def add(self, lines):
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for record in lines:
+            if isinstance(record, bytes):
+                record = record.decode()
+            if not record:
+                continue
+            parsed_record = _parse_log_record(record, self.record_type)
+            if debug:
+                logger.debug('bucket log record: %s', json.dumps(parsed_record, indent=4))
+            buckets = self.index.setdefault(parsed_record['Operation'], {})
+            keys = buckets.setdefault(parsed_record['BucketName'], {})
+            keys.setdefault(parsed_record['Key'], []).append((parsed_record, record))
+
+    def fetch(self, client, log_bucket_name, log_key):
+        """ Stream the records of a log object into the index. """
+        response = client.get_object(Bucket=log_bucket_name, Key=log_key)
+        self.add(response['Body'].iter_lines())
+        return self
+
+    def keys(self, bucket_name, operation):
+        """
+        Yield (key, [(parsed record, record), ...]) for every operation
+        whose name contains operation, on every bucket whose name contains
+        bucket_name, or on any bucket when it is None.
+        """
+        for op, buckets in self.index.items():
+            if operation not in op:
+                continue
+            for name, keys in buckets.items():
+                if bucket_name is None or bucket_name in name:
+                    yield from keys.items()
+
+    def get(self, bucket_name, operation, key):
+        """ The (parsed record, record) pairs of key, as keys() selects them. """
+        found = []
+        for op, buckets in self.index.items():
+            if operation not in op:
+                continue
+            for name, keys in buckets.items():
+                if bucket_name is None or bucket_name in name:
+                    found += keys.get(key, [])
+        return found
+
+
 def _verify_records(records, bucket_name, event_type, src_keys, record_type, expected_count, exact_match=False):
+    if isinstance(records, _LogRecords):
+        assert records.record_type == record_type
+    else:
+        records = _LogRecords(record_type, records.splitlines())
     keys_found = []
     all_keys = []
-    for record in iter(records.splitlines()):
-        parsed_record = _parse_log_record(record, record_type)
-        logger.debug('bucket log record: %s', json.dumps(parsed_record, indent=4))
-        if bucket_name in record and event_type in record:
-            all_keys.append(parsed_record['Key'])
-            for key in src_keys:
-                if key in record:
-                    keys_found.append(key)
+    src_key_set = set(src_keys)
+    for key, key_records in records.keys(bucket_name, event_type):
+        all_keys += [key] * len(key_records)
+        if key in src_key_set:
+            keys_found += [key] * len(key_records)
+            continue
+        # a source key may still appear elsewhere in the record
+        for _, record in key_records:
+            for src_key in src_keys:
+                if src_key in record:
+                    keys_found.append(src_key)
                     break
     logger.info('%d keys found in bucket log: %s', len(all_keys), str(all_keys))
     logger.info('%d keys from the source bucket: %s', len(src_keys), str(src_keys))
@@ -15344,15 +15463,23 @@ def _verify_records(records, bucket_name, event_type, src_keys, record_type, exp
 
 
 def _verify_record_field(records, bucket_name, event_type, object_key, record_type, field_name, expected_value):
-    for record in iter(records.splitlines()):
-        if bucket_name in record and event_type in record and object_key in record:
-            parsed_record = _parse_log_record(record, record_type)
-            logger.info('bucket log record: %s', json.dumps(parsed_record, indent=4))
-            try:
-                value = parsed_record[field_name]
-                return expected_value == value
-            except KeyError:
-                return False
+    if isinstance(records, _LogRecords):
+        assert records.record_type == record_type
+    else:
+        records = _LogRecords(record_type, records.splitlines())
+    found = records.get(bucket_name, event_type, object_key)
+    if not found:
+        # a record that mentions object_key outside of its key field
+        found = [(parsed_record, record)
+                 for _, key_records in records.keys(bucket_name, event_type)
+                 for parsed_record, record in key_records if object_key in record]
+    for parsed_record, record in found:
+        logger.info('bucket log record: %s', json.dumps(parsed_record, indent=4))
+        try:
+            value = parsed_record[field_name]
+            return expected_value == value
+        except KeyError:
+            return False
     return False
 
 
@@ -15678,7 +15805,7 @@ def test_bucket_logging_partitioned_key():
 
 @pytest.mark.bucket_logging
 @pytest.mark.fails_on_aws
-def test_bucket_logging_bucket_auth_type():
+def test_bucket_logging_bucket_auth_type(http_session):
     src_bucket_name = get_new_bucket_name()
     src_bucket = get_new_bucket_resource(name=src_bucket_name)
     log_bucket_name = get_new_bucket_name()
@@ -15735,10 +15862,10 @@ def test_bucket_logging_bucket_auth_type():
     params = {'Bucket': src_bucket_name, 'Key': key}
     url = client.generate_presigned_url(ClientMethod='get_object', Params=params, ExpiresIn=100000, HttpMethod='GET')
 
-    res = requests.options(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.options(url).__dict__
     assert res['status_code'] == 400
 
-    res = requests.get(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.get(url).__dict__
     assert res['status_code'] == 200
 
     _flush_logs(client, src_bucket_name)
@@ -15757,10 +15884,10 @@ def test_bucket_logging_bucket_auth_type():
     params = {'Bucket': src_bucket_name, 'Key': key}
     url = client_v2.generate_presigned_url(ClientMethod='get_object', Params=params, ExpiresIn=100000, HttpMethod='GET')
 
-    res = requests.options(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.options(url).__dict__
     assert res['status_code'] == 400
 
-    res = requests.get(url, verify=get_config_ssl_verify()).__dict__
+    res = http_session.get(url).__dict__
     assert res['status_code'] == 200
 
     _flush_logs(client, src_bucket_name)
@@ -16130,8 +16257,7 @@ def _bucket_logging_flush(logging_type, single_prefix, concurrency, num_keys):
         assert len(flushed_objs) >= num_buckets
 
     for key in keys:
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body = _get_body(response)
+        records = _LogRecords(logging_type).fetch(client, log_bucket_name, key)
         found = False
         for j in range(num_buckets):
             prefix = log_prefixes[j]
@@ -16140,8 +16266,8 @@ def _bucket_logging_flush(logging_type, single_prefix, concurrency, num_keys):
                 if flushed_obj is not None:
                     assert key == flushed_obj
                 found = True
-                assert _verify_records(body, buckets[j], 'REST.PUT.OBJECT', src_names, logging_type, num_keys)
-                assert _verify_records(body, buckets[j], 'REST.DELETE.OBJECT', src_names, logging_type, num_keys)
+                assert _verify_records(records, buckets[j], 'REST.PUT.OBJECT', src_names, logging_type, num_keys)
+                assert _verify_records(records, buckets[j], 'REST.DELETE.OBJECT', src_names, logging_type, num_keys)
         assert found
 
 
@@ -16269,15 +16395,14 @@ def test_bucket_logging_put_and_flush():
     response = client.list_objects_v2(Bucket=log_bucket_name)
     keys = _get_keys(response)
 
-    body = ''
+    records = _LogRecords('Journal')
     prev_key = ''
     for key in keys:
         logger.info('bucket log record: %s', key)
         assert key > prev_key
         prev_key = key
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
-    assert _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_names, 'Journal', num_keys)
+        records.fetch(client, log_bucket_name, key)
+    assert _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_names, 'Journal', num_keys)
 
 
 @pytest.mark.bucket_logging
@@ -16619,7 +16744,7 @@ def _put_bucket_logging_policy_wildcard(add_objects):
         assert key.startswith('log/')
         response = client.get_object(Bucket=log_bucket_name, Key=key)
         body = _get_body(response)
-        assert _verify_records(body, " ", 'REST.PUT.OBJECT', src_keys, "Standard", num_keys*2)
+        assert _verify_records(body, None, 'REST.PUT.OBJECT', src_keys, "Standard", num_keys*2)
 
     # non wildcard source account policy
     policy['Statement'][0]['Condition']['StringLike']['aws:SourceAccount'] = "{}${}".format(src_tenant, src_user) if src_tenant else src_user
@@ -17163,12 +17288,11 @@ def test_bucket_logging_put_concurrency():
 
     record_type = 'Standard' if not has_extensions else 'Journal'
 
-    body = ""
+    records = _LogRecords(record_type)
     for key in keys:
         assert key.startswith('log/')
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
-    assert _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_keys, record_type, num_keys)
+        records.fetch(client, log_bucket_name, key)
+    assert _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_keys, record_type, num_keys)
 
 
 def _bucket_logging_delete_objects(versioned):
@@ -17812,12 +17936,11 @@ def test_bucket_logging_roll_time():
     keys = _get_keys(response)
     assert len(keys) > 1
 
-    body = ''
+    records = _LogRecords('Standard')
     for key in keys:
         assert key.startswith('log/')
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
-    assert _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_keys, 'Standard', num_keys+1)
+        records.fetch(client, log_bucket_name, key)
+    assert _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_keys, 'Standard', num_keys+1)
 
 
 @pytest.mark.bucket_logging
@@ -18143,10 +18266,9 @@ def _bucket_logging_cleanup(cleanup_type, logging_type, single_prefix, concurren
             prefix = src_bucket_name+'/'
         prefixes.append(prefix)
 
-    body = ""
+    records = _LogRecords(logging_type)
     for key in keys:
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
+        records.fetch(client, log_bucket_name, key)
         found = False
         for prefix in prefixes:
             if key.startswith(prefix):
@@ -18155,8 +18277,8 @@ def _bucket_logging_cleanup(cleanup_type, logging_type, single_prefix, concurren
 
     exact_match = True
     for src_bucket_name in buckets:
-        assert _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, num_keys, exact_match)
-        assert _verify_records(body, src_bucket_name, 'REST.DELETE.OBJECT', src_names, logging_type, num_keys, exact_match)
+        assert _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, num_keys, exact_match)
+        assert _verify_records(records, src_bucket_name, 'REST.DELETE.OBJECT', src_names, logging_type, num_keys, exact_match)
 
 
 @pytest.mark.bucket_logging
@@ -18499,10 +18621,9 @@ def _bucket_logging_partial_cleanup(cleanup_type, logging_type, concurrency):
         prefix = 'log/'
         prefixes.append(prefix)
 
-    body = ""
+    records = _LogRecords(logging_type)
     for key in keys:
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
+        records.fetch(client, log_bucket_name, key)
         found = False
         for prefix in prefixes:
             if key.startswith(prefix):
@@ -18511,8 +18632,8 @@ def _bucket_logging_partial_cleanup(cleanup_type, logging_type, concurrency):
 
     exact_match = True
     for src_bucket_name in buckets:
-        _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, num_keys, exact_match)
-        _verify_records(body, src_bucket_name, 'REST.DELETE.OBJECT', src_names, logging_type, num_keys, exact_match)
+        _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, num_keys, exact_match)
+        _verify_records(records, src_bucket_name, 'REST.DELETE.OBJECT', src_names, logging_type, num_keys, exact_match)
 
 
 @pytest.mark.bucket_logging
@@ -18703,15 +18824,14 @@ def _bucket_logging_conf_update(logging_type, update_value, concurrency):
     assert flushed_obj in keys
 
     exact_match = True
-    body = ""
+    records = _LogRecords(logging_type)
     for key in keys:
         logger.info('processing log object: %s', key)
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
+        records.fetch(client, log_bucket_name, key)
         # delete the key that we already processed
         client.delete_object(Bucket=log_bucket_name, Key=key)
 
-    ok = _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, expected_count, exact_match)
+    ok = _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, expected_count, exact_match)
     if not (concurrency and update_value == 'prefix' and logging_type == 'Standard'):
         # we can have silent failures when changing the prefix in concurrency mode with standard logging
         assert ok
@@ -18729,12 +18849,11 @@ def _bucket_logging_conf_update(logging_type, update_value, concurrency):
     assert len(keys) == 1
     assert flushed_obj in keys
 
-    body = ""
+    records = _LogRecords(logging_type)
     for key in keys:
-        response = client.get_object(Bucket=log_bucket_name, Key=key)
-        body += _get_body(response)
+        records.fetch(client, log_bucket_name, key)
 
-    assert _verify_records(body, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, num_keys, exact_match)
+    assert _verify_records(records, src_bucket_name, 'REST.PUT.OBJECT', src_names, logging_type, num_keys, exact_match)
 
 
 @pytest.mark.bucket_logging
@@ -3,6 +3,7 @@ import random
 import string
 import re
 import json
+import hashlib
 from botocore.exceptions import ClientError
 from botocore.exceptions import EventStreamError
 
@@ -16,6 +17,18 @@ from . import (
     get_client,
     get_new_bucket_name
     )
+from .datasets import dataset_cache
+from .s3select import (
+    Dataset,
+    check_result,
+    csv_input_serialization,
+    merge_aggregates,
+    scan_queries,
+    select_object_stream,
+    select_scan_ranges,
+    split_scan_range,
+    upload_chunks,
+    )
 
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -297,14 +310,9 @@ def run_s3select(bucket,key,query,column_delim=",",row_delim="\n",quot_char='"',
     result_status = {}
 
     try:
-        r = s3.select_object_content(
-        Bucket=bucket,
-        Key=key,
-        ExpressionType='SQL',
-        InputSerialization = {"CSV": {"RecordDelimiter" : row_delim, "FieldDelimiter" : column_delim,"QuoteEscapeCharacter": esc_char, "QuoteCharacter": quot_char, "FileHeaderInfo": csv_header_info}, "CompressionType": "NONE"},
-        OutputSerialization = {"CSV": {}},
-        Expression=query,
-        RequestProgress = {"Enabled": progress})
+        stream = select_object_stream(bucket, key, query,
+                csv_input_serialization(column_delim, row_delim, quot_char, esc_char, csv_header_info),
+                progress=progress, client=s3)
 
     except ClientError as c:
         result += str(c)
@@ -313,31 +321,20 @@ def run_s3select(bucket,key,query,column_delim=",",row_delim="\n",quot_char='"',
     if progress == False:
 
         try:
-            for event in r['Payload']:
-                if 'Records' in event:
-                    records = event['Records']['Payload'].decode('utf-8')
-                    result += records
+            result = stream.read().decode('utf-8')
 
         except EventStreamError as c:
             result = str(c)
             return result
         
     else:
-            result = []
-            max_progress_scanned = 0
-            for event in r['Payload']:
-                if 'Records' in event:
-                    records = event['Records']
-                    result.append(records.copy())
-                if 'Progress' in event:
-                    if(event['Progress']['Details']['BytesScanned'] > max_progress_scanned):
-                        max_progress_scanned = event['Progress']['Details']['BytesScanned']
-                        result_status['Progress'] = event['Progress']
-
-                if 'Stats' in event:
-                    result_status['Stats'] = event['Stats']
-                if 'End' in event:
-                    result_status['End'] = event['End']
+            result = [{'Payload': records} for records in stream]
+            if stream.progress is not None:
+                result_status['Progress'] = stream.progress
+            if stream.stats is not None:
+                result_status['Stats'] = stream.stats
+            if stream.end is not None:
+                result_status['End'] = stream.end
 
 
     if progress == False:
@@ -1703,3 +1700,80 @@ def test_output_serial_expressions():
     res_s3select_final = (''.join('"' + item + '"' + '#' for item in res_s3select_list))
 
     s3select_assert_result( '""#'+res_s3select_quot+'""#', res_s3select_final )
+
+@pytest.mark.s3select
+def test_select_stream():
+
+    csv_obj = create_random_csv_object(100000,10)
+
+    csv_obj_name = get_random_string()
+    bucket_name = get_new_bucket_name()
+
+    upload_object(bucket_name,csv_obj_name,csv_obj)
+
+    obj_size = len(csv_obj.encode('utf-8'))
+
+    stream = select_object_stream(bucket_name, csv_obj_name, "select * from s3object;", csv_input_serialization(), progress=True)
+    res_s3select = stream.read()
+
+    assert stream.records == 100000
+    assert stream.bytes_returned == len(res_s3select)
+    assert stream.time_to_first_record is not None
+    assert stream.time_to_first_record <= stream.elapsed
+    s3select_assert_result(obj_size, stream.bytes_scanned)
+    s3select_assert_result({}, stream.end)
+
+    # hashing the output gives the same answer without buffering it
+    hashed = select_object_stream(bucket_name, csv_obj_name, "select * from s3object;", csv_input_serialization(), digest='sha256').drain()
+
+    assert hashed.hexdigest() == hashlib.sha256(res_s3select).hexdigest()
+    assert hashed.records == stream.records
+
+def _check_dataset_queries(dataset_cache, dataset):
+    client = get_client()
+    bucket_name, obj_name = dataset_cache.object('s3select', dataset.params(), dataset.chunks)
+
+    for name, query, expected in scan_queries(dataset):
+        stream = select_object_stream(bucket_name, obj_name, query,
+                dataset.input_serialization(), dataset.output_serialization(),
+                client=client)
+        check_result(stream, stream.read(), expected)
+
+@pytest.mark.s3select
+@pytest.mark.parametrize('fmt', ['csv', 'json'])
+@pytest.mark.parametrize('compression', ['GZIP', 'BZIP2'])
+def test_compressed_input(dataset_cache, fmt, compression):
+    _check_dataset_queries(dataset_cache, Dataset(fmt, 1024*1024, compression=compression))
+
+@pytest.mark.s3select
+def test_parquet_input(dataset_cache):
+    pytest.importorskip('pyarrow')
+    # several row groups, so filters can skip some of them
+    _check_dataset_queries(dataset_cache, Dataset('parquet', 4*1024*1024, row_group_rows=16384))
+
+@pytest.mark.s3select
+def test_scan_range_split_merge():
+    dataset = Dataset('csv', 4*1024*1024)
+
+    client = get_client()
+    bucket_name = get_new_bucket_name()
+    client.create_bucket(Bucket=bucket_name)
+    csv_obj_name = get_random_string()
+    obj_size = upload_chunks(client, bucket_name, csv_obj_name, dataset.chunks())
+
+    # range edges fall in the middle of records
+    ranges = split_scan_range(obj_size, 7)
+
+    query = "select * from s3object;"
+    full = select_object_stream(bucket_name, csv_obj_name, query, dataset.input_serialization(), client=client).read()
+    merged = b''.join(select_scan_ranges(bucket_name, csv_obj_name, query, ranges, client=client))
+    assert merged.count(b'\n') == dataset.rows
+    assert merged == full
+
+    query = "select count(*), sum(int(_1)), min(int(_2)), max(int(_3)) from s3object;"
+    functions = ['count', 'sum', 'min', 'max']
+    full = select_object_stream(bucket_name, csv_obj_name, query, dataset.input_serialization(), client=client).read()
+    merged = merge_aggregates(select_scan_ranges(bucket_name, csv_obj_name, query, ranges, client=client), functions)
+    assert merged == merge_aggregates([full], functions)
+    assert merged == [dataset.rows, sum(dataset.values(1)) * dataset.repeat,
+                      min(dataset.values(2)), max(dataset.values(3))]
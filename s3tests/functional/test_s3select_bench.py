@@ -0,0 +1,142 @@
+import pytest
+import time
+
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    )
+from . import bench
+from .bench import bench_config
+from .datasets import dataset_cache
+from .s3select import (
+    Dataset,
+    check_result,
+    dataset_jobs,
+    merge_aggregates,
+    run_select_load,
+    scan_queries,
+    select_mix,
+    select_object_stream,
+    select_scan_ranges,
+    split_scan_range,
+    )
+
+@pytest.mark.s3select
+@pytest.mark.benchmark
+@pytest.mark.parametrize('fmt,compression', [
+    ('csv', 'NONE'), ('csv', 'GZIP'), ('csv', 'BZIP2'),
+    ('json', 'NONE'), ('json', 'GZIP'), ('json', 'BZIP2'),
+    ('parquet', 'NONE'),
+    ])
+def test_s3select_scan_benchmark(bench_config, dataset_cache, fmt, compression):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    sizes = bench.option('s3select sizes', [bench.parse_size('1MB'), bench.parse_size('16MB')])
+    iterations = bench.option('s3select iterations', 3)
+    row_group_rows = bench.option('s3select row group rows', 65536)
+
+    client = get_client()
+
+    for size in sizes:
+        dataset = Dataset(fmt, size, compression=compression, row_group_rows=row_group_rows)
+        # the generated objects are reused across runs
+        bucket_name, key = dataset_cache.object('s3select', dataset.params(), dataset.chunks)
+        obj_size = client.head_object(Bucket=bucket_name, Key=key)['ContentLength']
+
+        for name, query, expected in scan_queries(dataset):
+            latency = bench.Latencies(name)
+            first_record = bench.Latencies(name)
+            scanned = 0
+            for _ in range(iterations):
+                stream = select_object_stream(bucket_name, key, query,
+                        dataset.input_serialization(),
+                        dataset.output_serialization(),
+                        client=client)
+                # aggregates are one record, keep those for checking
+                if 'values' in expected:
+                    data = stream.read()
+                else:
+                    data = None
+                    stream.drain()
+                check_result(stream, data, expected)
+
+                latency.add(stream.elapsed)
+                if stream.time_to_first_record is not None:
+                    first_record.add(stream.time_to_first_record)
+                if stream.bytes_scanned is not None:
+                    scanned += stream.bytes_scanned
+                else:
+                    scanned += obj_size
+
+            bench.report('s3select_scan', format=fmt, compression=compression, size=obj_size, rows=dataset.rows,
+                         query=name, latency=latency.summary(),
+                         time_to_first_record=first_record.summary(),
+                         bytes_scanned_per_sec=scanned / sum(latency.samples))
+
+@pytest.mark.s3select
+@pytest.mark.benchmark
+def test_s3select_concurrency_benchmark(bench_config, dataset_cache):
+    levels = bench.option('s3select concurrency', [1, 2, 4, 8, 16, 32])
+    queries = bench.option('s3select concurrent queries', 128)
+    objects = bench.option('s3select concurrent objects', 4)
+    size = bench.option('s3select concurrent object size', bench.parse_size('16MB'))
+    formats = bench.option('s3select concurrent formats', ['csv', 'json'])
+
+    jobs = []
+    for i in range(objects):
+        fmt = formats[i % len(formats)]
+        dataset = Dataset(fmt, size, seed=i)
+        bucket_name, key = dataset_cache.object('s3select', dataset.params(), dataset.chunks)
+        jobs += dataset_jobs(dataset, bucket_name, key)
+
+    mix = select_mix(jobs, queries)
+    for workers in levels:
+        total, by_name = run_select_load(mix, workers)
+        bench.report('s3select_concurrency', workers=workers, objects=objects,
+                     size=size, latency=total.summary(),
+                     queries={name: l.summary() for name, l in by_name.items()})
+
+@pytest.mark.s3select
+@pytest.mark.benchmark
+def test_s3select_scan_range_benchmark(bench_config, dataset_cache):
+    size = bench.option('s3select scan range object size', bench.parse_size('256MB'))
+    splits = bench.option('s3select scan range parts', [2, 4, 8, 16])
+    iterations = bench.option('s3select iterations', 3)
+
+    # one client with a connection per range for both the full scans and
+    # the split ones, so the split timings don't pay for connection setup
+    client = get_client(Config(max_pool_connections=max(splits)))
+    dataset = Dataset('csv', size)
+    bucket_name, key = dataset_cache.object('s3select', dataset.params(), dataset.chunks)
+    obj_size = client.head_object(Bucket=bucket_name, Key=key)['ContentLength']
+
+    queries = [
+        ('projection', 'select _1, _5 from s3object;', None),
+        ('aggregation', 'select count(*), sum(int(_1)), min(int(_2)), max(int(_3)) from s3object;',
+            ['count', 'sum', 'min', 'max']),
+        ]
+    for name, query, functions in queries:
+        full = bench.Latencies('full')
+        for _ in range(iterations):
+            with full.time():
+                expected = select_object_stream(bucket_name, key, query,
+                        dataset.input_serialization(), client=client).read()
+
+        for parts in splits:
+            ranges = split_scan_range(obj_size, parts)
+            split = bench.Latencies('split')
+            for _ in range(iterations):
+                start = time.perf_counter()
+                results = select_scan_ranges(bucket_name, key, query, ranges, client=client)
+                split.add(time.perf_counter() - start)
+                if functions:
+                    assert merge_aggregates(results, functions) == merge_aggregates([expected], functions)
+                else:
+                    assert b''.join(results) == expected
+
+            bench.report('s3select_scan_range', query=name, size=obj_size, parts=parts,
+                         full=full.summary(), split=split.summary(),
+                         speedup=full.percentile(50) / split.percentile(50))
@@ -9,25 +9,25 @@ from . import (
     get_new_bucket_name,
     get_prefix,
     make_iam_name,
+    nuke_each,
     nuke_prefixed_buckets,
 )
-from .iam import iam_root, iam_alt_root
+from .iam import iam_root, iam_alt_root, retry_throttled
 from .utils import assert_raises, _get_status_and_error_code
 
 def get_new_topic_name():
     return get_new_bucket_name()
 
-def nuke_topics(client, prefix):
+def topic_list(client):
     p = client.get_paginator('list_topics')
-    for response in p.paginate():
-        for topic in response['Topics']:
-            arn = topic['TopicArn']
-            if prefix not in arn:
-                pass
-            try:
-                client.delete_topic(TopicArn=arn)
-            except:
-                pass
+    return [topic for response in p.paginate() for topic in response['Topics']]
+
+def nuke_topics(client, prefix):
+    # only topics named with our prefix, deleted concurrently
+    arns = [topic['TopicArn'] for topic in topic_list(client)
+            if topic['TopicArn'].rsplit(':', 1)[-1].startswith(prefix)]
+    nuke_each(lambda client, arn: retry_throttled(client.delete_topic, TopicArn=arn),
+              client, arns, missing_codes=('NotFound',))
 
 @pytest.fixture
 def sns(iam_root):
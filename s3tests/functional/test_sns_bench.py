@@ -0,0 +1,162 @@
+import hashlib
+import random
+import time
+
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_iam_root_client,
+    get_new_bucket_name,
+    get_prefix,
+    nuke_prefixed_buckets,
+    )
+from . import bench
+from .bench import bench_config
+from .iam import iam_root
+from .notification import notification_receiver
+from .test_sns import get_new_topic_name, nuke_topics, topic_list
+
+def _create_topic(client, name, i):
+    # the attributes a bucket notification topic usually carries
+    attributes = {
+        'push-endpoint': 'http://localhost:10900',
+        'persistent': 'false',
+        'OpaqueData': 'bench-{}'.format(i),
+        }
+    return client.create_topic(Name=name, Attributes=attributes)['TopicArn']
+
+@pytest.mark.iam_account
+@pytest.mark.sns
+@pytest.mark.benchmark
+def test_sns_topic_scale_benchmark(iam_root, bench_config):
+    levels = sorted(bench.option('sns topics', [100, 1000, 5000]))
+    samples = bench.option('sns samples', 100)
+    workers = bench.get_workers()
+
+    client = get_iam_root_client(service_name='sns',
+                                 config=Config(max_pool_connections=workers))
+    rng = random.Random(0)
+    arns = []
+    try:
+        for level in levels:
+            create = bench.Latencies('create_topic')
+            arns += bench.run_concurrent(lambda i: _create_topic(client, get_new_topic_name(), i),
+                                         range(len(arns), level), workers=workers, latencies=create)
+
+            pages = bench.Latencies('list_topics')
+            start = time.perf_counter()
+            listed = [topic['TopicArn'] for response in bench.timed_iter(
+                          client.get_paginator('list_topics').paginate(), pages)
+                      for topic in response['Topics']]
+            list_all = time.perf_counter() - start
+            assert set(arns) <= set(listed)
+
+            sample = [rng.choice(arns) for _ in range(samples)]
+            get = bench.Latencies('get_topic_attributes')
+            attributes = bench.run_concurrent(lambda arn: client.get_topic_attributes(TopicArn=arn)['Attributes'],
+                                              sample, workers=workers, latencies=get)
+            assert all(a['TopicArn'] == arn for a, arn in zip(attributes, sample))
+
+            bench.report('sns_topic_scale', topics=level, listed=len(listed), workers=workers,
+                         create_topic=create.summary(), list_topics_pages=pages.summary(),
+                         list_all=list_all, get_topic_attributes=get.summary())
+
+        delete = bench.Latencies('delete_topic')
+        bench.run_concurrent(lambda arn: client.delete_topic(TopicArn=arn), arns,
+                             workers=workers, latencies=delete)
+        remaining = set(arns) & set(t['TopicArn'] for t in topic_list(client))
+        assert not remaining
+        bench.report('sns_topic_scale_delete', topics=len(arns), workers=workers,
+                     delete_topic=delete.summary())
+    finally:
+        nuke_topics(client, get_prefix())
+
+def _body(key, n, size):
+    # distinct per write, so the etag in each event says which write it is
+    body = '{}:{}:'.format(key, n).encode()
+    return body + b'x' * max(0, size - len(body))
+
+@pytest.mark.iam_account
+@pytest.mark.sns
+@pytest.mark.benchmark
+@pytest.mark.parametrize('persistent', ['false', 'true'])
+def test_bucket_notification_delivery_benchmark(iam_root, bench_config, notification_receiver, persistent):
+    """
+    Write objects to a bucket whose ObjectCreated events are pushed to the
+    local receiver, and measure the time from the start of each write to
+    the receipt of its event, the delivery throughput, and how many events
+    were lost, duplicated or delivered out of order. Keys are written
+    concurrently, the writes of one key one after another.
+    """
+    num_keys = bench.option('notification keys', 200)
+    writes_per_key = bench.option('notification writes per key', 5)
+    size = bench.option('notification object size', 1024)
+    timeout = bench.option('notification timeout', 60)
+    workers = bench.get_workers()
+
+    config = Config(max_pool_connections=workers)
+    sns = get_iam_root_client(service_name='sns', config=config)
+    # clear region_name to work around Invalid region: region was not a valid DNS name.
+    s3 = get_iam_root_client(service_name='s3', region_name=None, config=config)
+    try:
+        topic_arn = sns.create_topic(Name=get_new_topic_name(), Attributes={
+            'push-endpoint': notification_receiver.endpoint,
+            'persistent': persistent,
+            })['TopicArn']
+        bucket = get_new_bucket_name()
+        s3.create_bucket(Bucket=bucket)
+        s3.put_bucket_notification_configuration(Bucket=bucket, NotificationConfiguration={
+            'TopicConfigurations': [{
+                'Id': 'bench',
+                'TopicArn': topic_arn,
+                'Events': ['s3:ObjectCreated:*'],
+                }]})
+
+        writes = {}
+        puts = bench.Latencies('put')
+        def write_key(key):
+            for n in range(writes_per_key):
+                body = _body(key, n, size)
+                start = time.perf_counter()
+                s3.put_object(Bucket=bucket, Key=key, Body=body)
+                puts.add(time.perf_counter() - start)
+                writes[hashlib.md5(body).hexdigest()] = (key, n, start)
+
+        start = time.perf_counter()
+        bench.run_concurrent(write_key, ['key{}'.format(i) for i in range(num_keys)], workers=workers)
+        expected = num_keys * writes_per_key
+        events = notification_receiver.wait(expected, timeout=timeout, idle=min(timeout, 10))
+
+        delivery = bench.Latencies('delivery')
+        delivered = set()
+        duplicates = unknown = 0
+        order = {}
+        for event in events:
+            etag = event.record['s3']['object'].get('eTag', '').strip('"')
+            write = writes.get(etag)
+            if write is None:
+                unknown += 1
+                continue
+            if etag in delivered:
+                duplicates += 1
+                continue
+            delivered.add(etag)
+            key, n, write_start = write
+            delivery.add(event.received - write_start)
+            order.setdefault(key, []).append(n)
+        out_of_order = sum(1 for ns in order.values() if ns != sorted(ns))
+        elapsed = (events[-1].received - start) if events else None
+
+        bench.report('bucket_notification_delivery', persistent=persistent, keys=num_keys,
+                     writes_per_key=writes_per_key, object_size=size, workers=workers,
+                     put=puts.summary(), delivery=delivery.summary(),
+                     events_per_sec=len(delivered) / elapsed if elapsed else None,
+                     expected=expected, delivered=len(delivered), lost=expected - len(delivered),
+                     duplicates=duplicates, unknown=unknown, posts=notification_receiver.posts,
+                     keys_out_of_order=out_of_order)
+    finally:
+        nuke_prefixed_buckets(get_prefix(), s3)
+        nuke_topics(sns, get_prefix())
@@ -55,6 +55,7 @@ from . import(
     get_azp,
     get_user_token
     )
+from .oidc import oidc_issuer, oidc_provider
 
 log = logging.getLogger(__name__)
 
@@ -449,6 +450,55 @@ def test_assume_role_with_web_identity():
     OpenIDConnectProviderArn=oidc_response["OpenIDConnectProviderArn"]
     )
 
+@pytest.mark.test_of_sts
+@pytest.mark.token_claims_trust_policy_test
+@pytest.mark.fails_on_dbstore
+def test_assume_role_with_web_identity_local_issuer(oidc_issuer, oidc_provider):
+    iam_client=get_iam_client()
+    sts_client=get_sts_client()
+    default_endpoint=get_config_endpoint()
+    role_session_name=get_parameter_name()
+
+    policy_document = json.dumps({
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Effect": "Allow",
+            "Principal": {"Federated": [oidc_provider]},
+            "Action": ["sts:AssumeRoleWithWebIdentity"],
+            "Condition": {"StringEquals": {oidc_issuer.condition_prefix+":sub": "alice"}}
+        }]
+    })
+    (role_error,role_response,general_role_name)=create_role(iam_client,'/',None,policy_document,None,None,None)
+    assert role_response['Role']['Arn'] == 'arn:aws:iam:::role/'+general_role_name+''
+
+    role_policy = "{\"Version\":\"2012-10-17\",\"Statement\":{\"Effect\":\"Allow\",\"Action\":\"s3:*\",\"Resource\":\"arn:aws:s3:::*\"}}"
+    (role_err,response)=put_role_policy(iam_client,general_role_name,None,role_policy)
+    assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+
+    resp=sts_client.assume_role_with_web_identity(RoleArn=role_response['Role']['Arn'],RoleSessionName=role_session_name,WebIdentityToken=oidc_issuer.token(sub='alice'))
+    assert resp['ResponseMetadata']['HTTPStatusCode'] == 200
+
+    s3_client = boto3.client('s3',
+        aws_access_key_id = resp['Credentials']['AccessKeyId'],
+        aws_secret_access_key = resp['Credentials']['SecretAccessKey'],
+        aws_session_token = resp['Credentials']['SessionToken'],
+        endpoint_url=default_endpoint,
+        region_name='',
+        )
+    bucket_name = get_new_bucket_name()
+    s3bucket = s3_client.create_bucket(Bucket=bucket_name)
+    assert s3bucket['ResponseMetadata']['HTTPStatusCode'] == 200
+    bkt = s3_client.delete_bucket(Bucket=bucket_name)
+    assert bkt['ResponseMetadata']['HTTPStatusCode'] == 204
+
+    # the trust policy only admits alice
+    resp_error=None
+    try:
+        sts_client.assume_role_with_web_identity(RoleArn=role_response['Role']['Arn'],RoleSessionName=role_session_name,WebIdentityToken=oidc_issuer.token(sub='bob'))
+    except ClientError as e:
+        resp_error = e.response.get("Error", {}).get("Code")
+    assert resp_error == 'AccessDenied'
+
 '''
 @pytest.mark.webidentity_test
 def test_assume_role_with_web_identity_invalid_webtoken():
@@ -0,0 +1,168 @@
+import contextlib
+import json
+
+import boto3
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_alt_user_id,
+    get_config_endpoint,
+    get_config_ssl_verify,
+    get_iam_client,
+    get_main_aws_access_key,
+    get_main_aws_secret_key,
+    get_new_bucket_name,
+    get_sts_client,
+    )
+from . import bench
+from .bench import bench_config
+from .oidc import oidc_issuer
+from .test_sts import create_role, put_role_policy, put_user_policy
+
+role_policy = json.dumps({
+    'Version': '2012-10-17',
+    'Statement': {'Effect': 'Allow', 'Action': 's3:*', 'Resource': 'arn:aws:s3:::*'},
+    })
+
+def _s3_client(credentials, workers=10):
+    return boto3.client('s3',
+                        aws_access_key_id=credentials['AccessKeyId'],
+                        aws_secret_access_key=credentials['SecretAccessKey'],
+                        aws_session_token=credentials.get('SessionToken'),
+                        endpoint_url=get_config_endpoint(),
+                        verify=get_config_ssl_verify(),
+                        region_name='',
+                        config=Config(signature_version='s3v4', max_pool_connections=workers))
+
+@contextlib.contextmanager
+def _role(iam_client, trust_policy):
+    (role_err, role_response, role_name) = create_role(iam_client, '/', None, trust_policy, None, None, None)
+    assert role_response, role_err
+    try:
+        (role_err, response) = put_role_policy(iam_client, role_name, 'Policy', role_policy)
+        assert response, role_err
+        yield role_response['Role']['Arn']
+    finally:
+        try:
+            iam_client.delete_role_policy(RoleName=role_name, PolicyName='Policy')
+        finally:
+            iam_client.delete_role(RoleName=role_name)
+
+@contextlib.contextmanager
+def _issuer(mode, sts_client, oidc_issuer):
+    """
+    Yield a function that issues a new set of credentials with the given
+    STS call. 'static' yields the main user's long-term keys instead, as
+    the baseline for first-request latency. Web identity tokens come from
+    the local oidc_issuer.
+    """
+    iam_client = get_iam_client()
+    if mode == 'static':
+        yield lambda: {'AccessKeyId': get_main_aws_access_key(),
+                       'SecretAccessKey': get_main_aws_secret_key()}
+
+    elif mode == 'assume_role':
+        trust_policy = json.dumps({
+            'Version': '2012-10-17',
+            'Statement': [{'Effect': 'Allow', 'Action': ['sts:AssumeRole'],
+                           'Principal': {'AWS': ['arn:aws:iam:::user/' + get_alt_user_id()]}}],
+            })
+        with _role(iam_client, trust_policy) as role_arn:
+            yield lambda: sts_client.assume_role(RoleArn=role_arn,
+                                                 RoleSessionName='bench')['Credentials']
+
+    elif mode == 'get_session_token':
+        user_policy = json.dumps({
+            'Version': '2012-10-17',
+            'Statement': [
+                {'Effect': 'Deny', 'Action': 's3:*', 'Resource': ['*'],
+                 'Condition': {'BoolIfExists': {'sts:authentication': 'false'}}},
+                {'Effect': 'Allow', 'Action': 'sts:GetSessionToken', 'Resource': '*',
+                 'Condition': {'BoolIfExists': {'sts:authentication': 'false'}}},
+                ],
+            })
+        (resp_err, resp, policy_name) = put_user_policy(iam_client, get_alt_user_id(), None, user_policy)
+        assert resp, resp_err
+        try:
+            yield lambda: sts_client.get_session_token()['Credentials']
+        finally:
+            iam_client.delete_user_policy(UserName=get_alt_user_id(), PolicyName=policy_name)
+
+    elif mode == 'assume_role_with_web_identity':
+        # a fresh token from the local issuer for every call
+        oidc_arn = iam_client.create_open_id_connect_provider(
+            Url=oidc_issuer.url, ClientIDList=[oidc_issuer.default_aud],
+            ThumbprintList=[oidc_issuer.thumbprint])['OpenIDConnectProviderArn']
+        try:
+            trust_policy = json.dumps({
+                'Version': '2012-10-17',
+                'Statement': [{'Effect': 'Allow', 'Action': ['sts:AssumeRoleWithWebIdentity'],
+                               'Principal': {'Federated': [oidc_arn]},
+                               'Condition': {'StringEquals': {
+                                   oidc_issuer.condition_prefix + ':app_id': oidc_issuer.default_aud}}}],
+                })
+            with _role(iam_client, trust_policy) as role_arn:
+                yield lambda: sts_client.assume_role_with_web_identity(
+                    RoleArn=role_arn, RoleSessionName='bench',
+                    WebIdentityToken=oidc_issuer.token())['Credentials']
+        finally:
+            iam_client.delete_open_id_connect_provider(OpenIDConnectProviderArn=oidc_arn)
+
+@pytest.mark.test_of_sts
+@pytest.mark.fails_on_dbstore
+@pytest.mark.benchmark
+@pytest.mark.parametrize('mode', ['static', 'assume_role', 'get_session_token',
+                                  'assume_role_with_web_identity'])
+def test_sts_credentials_benchmark(request, bench_config, mode):
+    # only web identity needs the local issuer, the other modes run without it
+    oidc_issuer = None
+    if mode == 'assume_role_with_web_identity':
+        oidc_issuer = request.getfixturevalue('oidc_issuer')
+    levels = bench.option('sts concurrency', [1, 4, 16])
+    num_requests = bench.option('sts requests', 200)
+    sessions = bench.option('sts sessions', 20)
+    per_session = bench.option('sts requests per session', 10)
+
+    sts_client = get_sts_client(config=Config(signature_version='s3v4',
+                                              max_pool_connections=max(levels)))
+    with _issuer(mode, sts_client, oidc_issuer) as issue:
+        if mode != 'static':
+            for workers in levels:
+                issues = bench.Latencies(mode)
+                fetches = dict(oidc_issuer.requests) if oidc_issuer else None
+                bench.run_concurrent(lambda _: issue(), range(num_requests),
+                                     workers=workers, latencies=issues)
+                if oidc_issuer:
+                    # how often the gateway went back to the issuer for its keys
+                    fetches = {name: count - fetches[name]
+                               for name, count in oidc_issuer.requests.items()}
+                bench.report('sts_issue', mode=mode, workers=workers, requests=num_requests,
+                             issue=issues.summary(), oidc_issuer_requests=fetches)
+
+        # the bucket belongs to the principal behind the credentials, so it
+        # is created and removed with them rather than left to the cleanup
+        bucket_name = get_new_bucket_name()
+        owner = _s3_client(issue())
+        owner.create_bucket(Bucket=bucket_name)
+        try:
+            # a new client per session, so its first request carries both the
+            # connection setup and the first use of the credentials
+            first = bench.Latencies('first_request')
+            subsequent = bench.Latencies('subsequent_request')
+            for _ in range(sessions):
+                client = _s3_client(issue())
+                with first.time():
+                    client.head_bucket(Bucket=bucket_name)
+                for _ in range(per_session):
+                    with subsequent.time():
+                        client.head_bucket(Bucket=bucket_name)
+        finally:
+            owner.delete_bucket(Bucket=bucket_name)
+
+        bench.report('sts_first_request', mode=mode, sessions=sessions,
+                     requests_per_session=per_session, first_request=first.summary(),
+                     subsequent_request=subsequent.summary(),
+                     first_over_subsequent=first.percentile(50) / subsequent.percentile(50))
@@ -0,0 +1,114 @@
+import random
+import time
+
+import pytest
+from botocore.client import Config
+
+from . import (
+    configfile,
+    setup_teardown,
+    get_client,
+    get_new_bucket,
+    list_versions,
+    )
+from . import bench
+from .bench import bench_config
+from .test_s3 import check_configure_versioning_retry, create_multiple_versions
+
+def _add_versions(client, bucket_name, key, count, marker_every):
+    """
+    Add count versions of key, every marker_every'th of them a delete
+    marker, and always end on an object version so the key stays
+    readable. Returns the ids of the new object versions.
+    """
+    if marker_every == 1:
+        raise ValueError('marker_every must leave room for object versions')
+    version_ids = []
+    while count > 0:
+        n = min(count, marker_every - 1) if marker_every else count
+        ids, _ = create_multiple_versions(client, bucket_name, key, n)
+        version_ids += ids
+        count -= n
+        if marker_every and count > 1:
+            client.delete_object(Bucket=bucket_name, Key=key)
+            count -= 1
+    return version_ids
+
+@pytest.mark.versioning
+@pytest.mark.benchmark
+def test_versioned_churn_benchmark(bench_config):
+    levels = sorted(bench.option('versions per key', [100, 1000, 5000]))
+    num_keys = bench.option('versions keys', 4)
+    marker_every = bench.option('versions delete marker every', 10)
+    samples = bench.option('versions samples', 100)
+    page_size = bench.option('versions page size', 1000)
+    workers = bench.get_workers()
+
+    client = get_client(Config(signature_version='s3v4',
+                               max_pool_connections=max(workers, num_keys)))
+    bucket_name = get_new_bucket(client)
+    check_configure_versioning_retry(bucket_name, "Enabled", "Enabled")
+
+    keys = ['obj{}'.format(i) for i in range(num_keys)]
+    version_ids = {key: [] for key in keys}
+    rng = random.Random(0)
+    current = 0
+    deleted = 0
+
+    for level in levels:
+        # grow every key to level versions, keys in parallel
+        adds = bench.Latencies('add_versions')
+        count = level - current
+        new_ids = bench.run_concurrent(
+                lambda key: _add_versions(client, bucket_name, key, count, marker_every),
+                keys, workers=num_keys, latencies=adds)
+        for key, ids in zip(keys, new_ids):
+            version_ids[key] += ids
+        current = level
+
+        get_latest = bench.Latencies('get_latest')
+        bench.run_concurrent(
+                lambda key: client.get_object(Bucket=bucket_name, Key=key)['Body'].read(),
+                [rng.choice(keys) for _ in range(samples)], workers=workers, latencies=get_latest)
+
+        sample = [(key, rng.choice(version_ids[key])) for key in
+                  (rng.choice(keys) for _ in range(samples))]
+        get_version = bench.Latencies('get_version')
+        bench.run_concurrent(
+                lambda kv: client.get_object(Bucket=bucket_name, Key=kv[0], VersionId=kv[1])['Body'].read(),
+                sample, workers=workers, latencies=get_version)
+
+        pages = bench.Latencies('list_versions_page')
+        start = time.perf_counter()
+        listed = sum(len(batch) for batch in
+                     bench.timed_iter(list_versions(client, bucket_name, page_size), pages))
+        list_elapsed = time.perf_counter() - start
+        assert listed == num_keys * level - deleted
+
+        key_pages = bench.Latencies('list_key_versions_page')
+        paginator = client.get_paginator('list_object_versions')
+        for _ in bench.timed_iter(paginator.paginate(Bucket=bucket_name, Prefix=keys[0],
+                                                     PaginationConfig={'PageSize': page_size}),
+                                  key_pages):
+            pass
+
+        # delete a sample of older versions concurrently, never the latest
+        victims = set()
+        for key in keys:
+            older = version_ids[key][:-1]
+            victims.update((key, v) for v in rng.sample(older, min(len(older), samples // num_keys)))
+        deletes = bench.Latencies('delete_version')
+        bench.run_concurrent(
+                lambda kv: client.delete_object(Bucket=bucket_name, Key=kv[0], VersionId=kv[1]),
+                sorted(victims), workers=workers, latencies=deletes)
+        for key in keys:
+            version_ids[key] = [v for v in version_ids[key] if (key, v) not in victims]
+        deleted += len(victims)
+
+        bench.report('versioned_churn', versions_per_key=level, keys=num_keys,
+                     delete_marker_every=marker_every, listed=listed,
+                     list_elapsed=list_elapsed, add_versions=adds.summary(),
+                     get_latest=get_latest.summary(), get_version=get_version.summary(),
+                     list_versions_page=pages.summary(),
+                     list_key_versions_page=key_pages.summary(),
+                     delete_version=deletes.summary())
@@ -19,4 +19,8 @@ setup(
         'gevent >=1.0',
         'isodate >=0.4.4',
         ],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'oidc': ['cryptography'],
+        },
     )